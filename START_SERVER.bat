@@ -13,5 +13,5 @@ echo ======================================================
 echo.
 
 cd /d "%~dp0"
-python narudzbe/api_server.py
+python narudzbe/serve.py
 pause
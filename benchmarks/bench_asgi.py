@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Auto Servis Pro - Flask vs ASGI API benchmark
+Pokreće oba servera nad istom lokalnom bazom i mjeri req/s i p99 latenciju
+
+    python benchmarks/bench_asgi.py [--clients 16] [--requests 300] [--sse-clients 200]
+
+Needs uvicorn for the ASGI server. --sse-clients keeps that many idle
+/api/stream connections open during the run (the case where a thread per
+connection hurts).
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+NARUDZBE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'narudzbe'))
+
+SERVERS = {
+    'flask': "import api_server; api_server.app.run(host='127.0.0.1', port={port}, threaded=True)",
+    'asgi': "import uvicorn, asgi_server; uvicorn.run(asgi_server.app, host='127.0.0.1', "
+            "port={port}, log_level='warning')",
+}
+
+PATHS = ['/api/services', '/api/dashboard', '/api/appointments?limit=20']
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def request(conn, method, path, body=None, token=None):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = conn.getresponse()
+    data = response.read()
+    return response.status, data
+
+
+def start_server(kind, workdir):
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=NARUDZBE, DB_POOL_SIZE='8')
+    proc = subprocess.Popen([sys.executable, '-c', SERVERS[kind].format(port=port)], cwd=workdir,
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            if request(conn, 'GET', '/api/health')[0] == 200:
+                return proc, port
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"{kind} server did not start")
+
+
+def open_idle_streams(port, token, count):
+    """Open count SSE connections and leave them idle."""
+    streams = []
+    for _ in range(count):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        conn.request('GET', f'/api/stream?token={token}')
+        response = conn.getresponse()
+        response.fp.readline()
+        streams.append(conn)
+    return streams
+
+
+def run_load(port, token, clients, requests_per_client):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def client(n):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = []
+        for i in range(requests_per_client):
+            path = PATHS[(n + i) % len(PATHS)]
+            start = time.perf_counter()
+            try:
+                status, _ = request(conn, 'GET', path, token=token)
+            except (OSError, http.client.HTTPException) as e:
+                errors.append(str(e))
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            local.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50': p(0.50),
+        'p99': p(0.99),
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=300, help='requests per client')
+    parser.add_argument('--sse-clients', type=int, default=0)
+    parser.add_argument('--servers', default='flask,asgi')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for kind in args.servers.split(','):
+            proc, port = start_server(kind, workdir)
+            streams = []
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', port)
+                status, data = request(conn, 'POST', '/api/auth/login',
+                                       {'username': 'admin', 'password': 'admin123'})
+                token = json.loads(data)['token']
+                streams = open_idle_streams(port, token, args.sse_clients)
+                run_load(port, token, 2, 20)  # warm caches and the pool
+                results.append((kind, run_load(port, token, args.clients, args.requests)))
+            finally:
+                for stream in streams:
+                    stream.close()
+                proc.terminate()
+                proc.wait(timeout=15)
+
+    total = args.clients * args.requests
+    print("=" * 64)
+    print(f"  {args.clients} clients x {args.requests} GETs = {total} requests"
+          f" ({args.sse_clients} idle SSE clients)")
+    print(f"  Paths: {', '.join(PATHS)}")
+    print("=" * 64)
+    print(f"  {'server':<8} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'errors':>8}")
+    for kind, r in results:
+        print(f"  {kind:<8} {r['rps']:10.0f} {r['p50']:10.2f} {r['p99']:10.2f} {r['errors']:8d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Auto Servis Pro - Connection pool benchmark
+Poredi pooled konekcije sa starim connect-per-call pristupom
+
+    python benchmarks/bench_connection_pool.py [--threads 8] [--calls 2000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'narudzbe'))
+from database import AutoServiceDB
+
+
+def run(db, threads, calls):
+    """Run mixed point lookups from several threads, return elapsed seconds."""
+    def worker():
+        for i in range(calls):
+            db.get_user_by_id(1 + i % 2)
+            db.get_service_by_id(1 + i % 20)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--pool-size', type=int, default=5)
+    args = parser.parse_args()
+
+    total = args.threads * args.calls * 2
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        legacy = AutoServiceDB(db_path, pool_size=0)
+        pooled = AutoServiceDB(db_path, pool_size=args.pool_size)
+
+        results = [
+            ('connect-per-call', run(legacy, args.threads, args.calls)),
+            (f'pool (size {args.pool_size})', run(pooled, args.threads, args.calls)),
+        ]
+
+        print("=" * 60)
+        print(f"  {args.threads} threads x {args.calls * 2} queries = {total} queries")
+        print("=" * 60)
+        for name, elapsed in results:
+            print(f"  {name:<22} {elapsed:8.3f}s  {total / elapsed:10.0f} q/s")
+        print(f"\n  Speedup: {results[0][1] / results[1][1]:.1f}x")
+        print(f"  Pool stats: {pooled.pool_stats()}")
+        pooled.close()
+
+
+if __name__ == '__main__':
+    main()
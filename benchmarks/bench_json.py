@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Auto Servis Pro - JSON encoding benchmark
+Poredi stdlib jsonify, FastJSONProvider (orjson) i chunked streaming na velikoj listi termina
+
+    python benchmarks/bench_json.py [--appointments 50000] [--repeat 5]
+
+The list is the admin workshop board (/api/board) built from a generated
+database, i.e. the same list of dict(sqlite3.Row) the endpoint encodes.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'narudzbe'))
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from database import AutoServiceDB
+import json_provider
+from json_provider import FastJSONProvider, stream_json
+
+STATUSES = ['pending', 'confirmed', 'in_progress', 'completed', 'cancelled']
+
+
+def generate(db, count):
+    """Fill the database with count appointments spread over 200 users and vehicles."""
+    rng = random.Random(42)
+    conn = db.get_connection()
+    conn.executemany(
+        "INSERT INTO users (username, email, password_hash, full_name, phone) VALUES (?, ?, ?, ?, ?)",
+        [(f'klijent{i}', f'klijent{i}@example.com', 'x', f'Klijent Prezime {i}', f'06{i:07d}')
+         for i in range(200)])
+    user_ids = [r[0] for r in conn.execute("SELECT id FROM users").fetchall()]
+    conn.executemany(
+        "INSERT INTO vehicles (user_id, make, model, year, license_plate) VALUES (?, ?, ?, ?, ?)",
+        [(uid, rng.choice(['VW', 'Škoda', 'Opel', 'Renault']), 'Model', rng.randint(2000, 2024),
+          f'A{uid:03d}-K-{rng.randint(100, 999)}') for uid in user_ids])
+    vehicles = conn.execute("SELECT id, user_id FROM vehicles").fetchall()
+    service_ids = [r[0] for r in conn.execute("SELECT id FROM services").fetchall()]
+    rows = []
+    for i in range(count):
+        vehicle_id, user_id = rng.choice(vehicles)
+        rows.append((user_id, vehicle_id, rng.choice(service_ids),
+                     f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(8, 16):02d}:00',
+                     rng.choice(STATUSES), f'Napomena za termin {i}: zamjena ulja i filtera, provjera kočnica'))
+    conn.executemany(
+        "INSERT INTO appointments (user_id, vehicle_id, service_id, appointment_date, status, notes) "
+        "VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def measure(fn, repeat):
+    """Best wall time of repeat runs and peak traced memory of one run."""
+    best = float('inf')
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--appointments', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = AutoServiceDB(os.path.join(tmp, 'bench.db'))
+        generate(db, args.appointments)
+        board = db.get_board_snapshot()
+        items = board['items']
+        db.close()
+
+    stdlib_app = Flask('stdlib')
+    stdlib_app.json = DefaultJSONProvider(stdlib_app)
+    fast_app = Flask('fast')
+    fast_app.json = FastJSONProvider(fast_app)
+    envelope = {'success': True, 'cursor': board['cursor']}
+
+    def buffered(app):
+        def run():
+            with app.test_request_context():
+                return len(app.json.response({**envelope, 'items': items}).get_data())
+        return run
+
+    def streamed(app):
+        def run():
+            with app.test_request_context():
+                response = stream_json(envelope, 'items', items)
+            # Consume chunk by chunk like the server does
+            return sum(len(chunk) for chunk in response.response)
+        return run
+
+    results = [
+        ('stdlib jsonify', measure(buffered(stdlib_app), args.repeat)),
+        ('stdlib streamed', measure(streamed(stdlib_app), args.repeat)),
+    ]
+    if json_provider.orjson is not None:
+        results += [
+            ('orjson jsonify', measure(buffered(fast_app), args.repeat)),
+            ('orjson streamed', measure(streamed(fast_app), args.repeat)),
+        ]
+
+    print("=" * 68)
+    print(f"  /api/board payload: {len(items)} appointments")
+    print("=" * 68)
+    print(f"  {'encoder':<18} {'time':>10} {'items/s':>12} {'peak mem':>10} {'bytes':>12}")
+    for name, (elapsed, peak, size) in results:
+        print(f"  {name:<18} {elapsed * 1000:8.1f}ms {len(items) / elapsed:12.0f} "
+              f"{peak / 1024 / 1024:8.1f}MB {size:12d}")
+    if json_provider.orjson is None:
+        print("\n  orjson is not installed (pip install orjson) - only the stdlib encoder was measured")
+    else:
+        print(f"\n  Speedup (orjson jsonify vs stdlib jsonify): {results[0][1][0] / results[2][1][0]:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Auto Servis Pro - Reports benchmark
+Mjeri izvještaje iz taba Izvještaji nad godinom termina: prvo generisanje i keš
+
+    python benchmarks/bench_reports.py [--appointments 100000] [--repeat 5]
+
+The database is generated in a temp directory: 1000 clients, the seeded
+services and appointments spread over one year.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+NARUDZBE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'narudzbe'))
+sys.path.insert(0, NARUDZBE)
+from database import AutoServiceDB
+from reports import PERIODS, REPORTS, ReportEngine
+
+YEAR = 2026
+STATUSES = ['pending', 'confirmed', 'completed', 'completed', 'completed', 'cancelled', 'Cancelled']
+
+
+def generate(db_path, count):
+    db = AutoServiceDB(db_path)
+    rng = random.Random(24)
+    conn = db.get_connection()
+    conn.executemany(
+        "INSERT INTO users (username, email, password_hash, full_name) VALUES (?, ?, ?, ?)",
+        [(f'klijent{i}', f'klijent{i}@example.com', 'x', f'Klijent {i}') for i in range(1000)])
+    user_ids = [r[0] for r in conn.execute("SELECT id FROM users").fetchall()]
+    conn.executemany(
+        "INSERT INTO vehicles (user_id, make, model, license_plate) VALUES (?, ?, ?, ?)",
+        [(uid, 'VW', 'Golf', f'A{uid:04d}-K-001') for uid in user_ids])
+    vehicles = conn.execute("SELECT id, user_id FROM vehicles").fetchall()
+    services = conn.execute("SELECT id, price FROM services").fetchall()
+    rows = []
+    for _ in range(count):
+        vehicle_id, user_id = rng.choice(vehicles)
+        service_id, price = rng.choice(services)
+        rows.append((user_id, vehicle_id, service_id,
+                     f'{YEAR}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(8, 16):02d}:00',
+                     rng.choice(STATUSES), price))
+    conn.executemany(
+        "INSERT INTO appointments (user_id, vehicle_id, service_id, appointment_date, status, total_price) "
+        "VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    return db
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--appointments', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Generating {args.appointments} appointments...")
+        db = generate(os.path.join(tmp, 'autoservice.db'), args.appointments)
+        date_from, date_to = f'{YEAR}-01-01', f'{YEAR}-12-31'
+
+        print("=" * 60)
+        print(f"  Year-long reports, {args.appointments} appointments (median of {args.repeat})")
+        print("=" * 60)
+        print(f"  {'report':<26} {'cold':>10} {'cached':>10}")
+        for kind in REPORTS:
+            periods = ['day', 'week', 'month'] if kind in ('appointments', 'finance') else ['month']
+            for period in periods:
+                label = f"{kind} / {PERIODS[period].lower()}" if len(periods) > 1 else kind
+                # A fresh engine every time: nothing cached
+                cold = timed(lambda: ReportEngine(db).run(kind, date_from, date_to, period), args.repeat)
+                engine = ReportEngine(db)
+                engine.run(kind, date_from, date_to, period)
+                cached = timed(lambda: engine.run(kind, date_from, date_to, period), args.repeat)
+                print(f"  {label:<26} {cold * 1000:8.1f} ms {cached * 1000:8.2f} ms")
+
+        start = time.perf_counter()
+        rows = db.rebuild_rollups()
+        print(f"\n  daily rollups: {rows} rows, rebuilt from scratch in "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+        # A write invalidates the cached report
+        engine = ReportEngine(db)
+        engine.run('finance', date_from, date_to, 'month')
+        db.update_appointment_status(1, 'completed')
+        report = engine.run('finance', date_from, date_to, 'month')
+        print(f"  after a status change the report is rebuilt: {not report['cached']}")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Auto Servis Pro - Desktop startup benchmark
+Mjeri import main.py, vrijeme do login prozora i do interaktivnog admin panela
+
+    python benchmarks/bench_startup.py [--repeat 5] [--appointments 2000]
+
+Every run is a fresh interpreter (like double-clicking the exe) working on
+a generated database in a temp directory. The window timings need a
+display; without one only the import is measured.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+NARUDZBE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'narudzbe'))
+sys.path.insert(0, NARUDZBE)
+from database import AutoServiceDB
+
+# Runs in the child process; prints one JSON line
+CHILD = r'''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, %(narudzbe)r)
+import main
+result = {'import': time.perf_counter() - start}
+try:
+    root = main.tk.Tk()
+except Exception as e:
+    result['error'] = str(e)
+    print(json.dumps(result))
+    sys.exit(0)
+app = main.AutoServisApp(root)
+root.update()
+result['login_window'] = time.perf_counter() - start
+
+admin = next(u for u in app.db.get_all_users() if u['role'] == 'admin')
+panel_start = time.perf_counter()
+app.current_user = admin
+app.current_role = 'admin'
+app.show_admin_panel()
+# Interactive = first tab built and its table filled
+while app.admin_notebook.select() in app._tab_builders or app.loader.loading('appointments'):
+    root.update()
+    time.sleep(0.001)
+root.update()
+result['admin_panel'] = time.perf_counter() - panel_start
+app._on_close()
+print(json.dumps(result))
+'''
+
+
+def generate(db_path, count):
+    """Appointments for the admin board, spread over 100 clients."""
+    db = AutoServiceDB(db_path)
+    rng = random.Random(7)
+    conn = db.get_connection()
+    conn.executemany(
+        "INSERT INTO users (username, email, password_hash, full_name) VALUES (?, ?, ?, ?)",
+        [(f'klijent{i}', f'klijent{i}@example.com', 'x', f'Klijent {i}') for i in range(100)])
+    user_ids = [r[0] for r in conn.execute("SELECT id FROM users WHERE role != 'admin'").fetchall()]
+    conn.executemany(
+        "INSERT INTO vehicles (user_id, make, model, license_plate) VALUES (?, ?, ?, ?)",
+        [(uid, 'VW', 'Golf', f'A{uid:03d}-K-001') for uid in user_ids])
+    vehicles = conn.execute("SELECT id, user_id FROM vehicles").fetchall()
+    service_ids = [r[0] for r in conn.execute("SELECT id FROM services").fetchall()]
+    rows = []
+    for _ in range(count):
+        vehicle_id, user_id = rng.choice(vehicles)
+        rows.append((user_id, vehicle_id, rng.choice(service_ids),
+                     f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(8, 16):02d}:00',
+                     rng.choice(['pending', 'confirmed', 'completed'])))
+    conn.executemany(
+        "INSERT INTO appointments (user_id, vehicle_id, service_id, appointment_date, status) "
+        "VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    db.close()
+
+
+def run_child(cwd):
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', CHILD % {'narudzbe': NARUDZBE}],
+                         cwd=cwd, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result['process'] = time.perf_counter() - start
+    return result
+
+
+def import_breakdown(cwd, top):
+    """Cumulative time of main.py's direct imports from one -X importtime run."""
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                         cwd=cwd, capture_output=True, text=True, check=True,
+                         env={**os.environ, 'PYTHONPATH': NARUDZBE})
+    parsed = []
+    for line in out.stderr.splitlines()[1:]:
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        # One space, then two more per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        parsed.append((depth, int(cumulative), name.strip()))
+
+    # Children are printed before their parent: main's direct imports are
+    # the depth-1 lines right above it
+    index = next(i for i, (depth, _, name) in enumerate(parsed) if depth == 0 and name == 'main')
+    direct = []
+    for depth, cumulative, name in reversed(parsed[:index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            direct.append((cumulative, name))
+    return parsed[index][1], sorted(direct, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--appointments', type=int, default=2000)
+    parser.add_argument('--top', type=int, default=8, help='heaviest direct imports to list')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        generate(os.path.join(tmp, 'autoservice.db'), args.appointments)
+        run_child(tmp)  # warm-up: OS file cache, .pyc files, first-run seeding
+        runs = [run_child(tmp) for _ in range(args.repeat)]
+        main_total, direct = import_breakdown(tmp, args.top)
+
+    print("=" * 60)
+    print(f"  Desktop startup, {args.repeat} runs, {args.appointments} appointments (median)")
+    print("=" * 60)
+    rows = [('process start -> import main', 'import'),
+            ('process start -> login window', 'login_window'),
+            ('admin panel interactive', 'admin_panel'),
+            ('whole process (incl. interpreter)', 'process')]
+    for label, key in rows:
+        values = [r[key] for r in runs if key in r]
+        if values:
+            print(f"  {label:<36} {statistics.median(values) * 1000:8.1f} ms")
+    if 'error' in runs[0]:
+        print(f"\n  No window timings (Tk: {runs[0]['error']})")
+
+    print(f"\n  import main: {main_total / 1000:.1f} ms (-X importtime), heaviest direct imports:")
+    for cumulative, name in direct:
+        print(f"    {name:<28} {cumulative / 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
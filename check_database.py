@@ -1,4 +1,47 @@
+import os
 import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'narudzbe'))
+from database import AutoServiceDB
+from migrations import LATEST_VERSION
+from query_log import read_entries
+
+# Najčešći upiti (pravi pozivi AutoServiceDB metoda) i indeks koji svaki mora koristiti
+HOT_QUERIES = [
+    ('get_user_appointments', 'idx_appointments_user_date', lambda db: db.get_user_appointments(1)),
+    ('get_all_appointments(status)', 'idx_appointments_status_date',
+     lambda db: db.get_all_appointments(status='scheduled')),
+    ('get_user_notifications', 'idx_notifications_user_sent', lambda db: db.get_user_notifications(1)),
+    ('get_user_notifications(unread)', 'idx_notifications_user_read_sent',
+     lambda db: db.get_user_notifications(1, unread_only=True)),
+    ('get_unread_count', 'idx_notifications_user_read_sent', lambda db: db.get_unread_count(1)),
+    ('get_user_vehicles', 'idx_vehicles_user', lambda db: db.get_user_vehicles(1)),
+    ('verify_reset_token', 'idx_users_reset_token', lambda db: db.verify_reset_token('x', 'nova-lozinka')),
+]
+
+
+def hot_query_plans():
+    """Pokreni HOT_QUERIES nad svježe migriranom privremenom bazom i vrati plan svakog upita.
+
+    The slow query log with a 0 ms threshold records every statement a DB
+    method runs, with its EXPLAIN QUERY PLAN, so the plans come from the
+    SQL the code actually issues.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, 'queries.jsonl')
+        db = AutoServiceDB(os.path.join(tmp, 'check.db'), pool_size=0,
+                           slow_query_ms=0, slow_query_log=log_path)
+        plans = {}
+        for name, _, call in HOT_QUERIES:
+            seen = len(read_entries(log_path))
+            call(db)
+            steps = [step for entry in read_entries(log_path)[seen:] for step in entry['plan'] or []]
+            plans[name] = ' | '.join(steps)
+        db.close()
+    return plans
+
 
 conn = sqlite3.connect('narudzbe/autoservice.db')
 c = conn.cursor()
@@ -40,8 +83,28 @@ c.execute('SELECT name, price, category FROM services LIMIT 10')
 for s in c.fetchall():
     print(f"  🔧 {s[0]} - {s[1]} KM ({s[2]})")
 
+print("\n" + "-"*50)
+print("  INDEKSI (EXPLAIN QUERY PLAN):")
+print("-"*50)
+c.execute('PRAGMA user_version')
+print(f"  Verzija šeme (narudzbe/autoservice.db): {c.fetchone()[0]}, najnovija: {LATEST_VERSION}")
+print("  Planovi upita iz svježe migrirane privremene baze:")
+missing = 0
+plans = hot_query_plans()
+for name, index, _ in HOT_QUERIES:
+    plan = plans[name]
+    if f"INDEX {index} " in plan + ' ':
+        print(f"  ✅ {name} -> {index}")
+    else:
+        missing += 1
+        print(f"  ❌ {name}: {plan}")
+
 conn.close()
 
 print("\n" + "="*50)
+if missing:
+    print(f"  {missing} UPITA BEZ INDEKSA ❌")
+    print("="*50 + "\n")
+    sys.exit(1)
 print("  PROVJERA ZAVRŠENA ✅")
 print("="*50 + "\n")
@@ -3,43 +3,102 @@ Auto Servis Pro - REST API Server
 Kompletan Flask API server sa svim endpointima za Auto Servis Pro aplikaciju
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from functools import wraps
 from datetime import datetime
 import secrets
+import json
 import os
 from database import AutoServiceDB
+from jobs import JobManager
+from session_store import create_session_store, SessionSweeper
+from http_cache import conditional, POLICY_PUBLIC, POLICY_PRIVATE
+from event_hub import RESYNC
+import metrics as app_metrics
+import profiling
+from json_provider import FastJSONProvider, json_response, provider_name
+import threading
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', secrets.token_hex(32))
+# orjson when installed (stdlib json otherwise) for every jsonify()
+app.json = FastJSONProvider(app)
 CORS(app)
 
-# Initialize database
-db = AutoServiceDB()
+# Initialize database (pooled connections, shared by all request threads)
+db = AutoServiceDB(
+    pool_size=int(os.environ.get('DB_POOL_SIZE', 8)),
+    profile=os.environ.get('DB_PROFILE', 'balanced'),
+    # DB_SLOW_QUERY_MS=50 logs slower statements; summary: python narudzbe/query_log.py
+    slow_query_ms=float(os.environ['DB_SLOW_QUERY_MS']) if os.environ.get('DB_SLOW_QUERY_MS') else None,
+    slow_query_log=os.environ.get('DB_SLOW_QUERY_LOG', 'slow_queries.jsonl')
+)
 
-# Active sessions storage (in production use Redis or similar)
-active_sessions = {}
+# Background jobs (async broadcast etc.)
+jobs = JobManager()
+
+# Session store: 'memory' for a single process, 'sqlite' when several
+# worker processes share autoservice.db
+sessions = create_session_store(
+    os.environ.get('SESSION_BACKEND', 'memory'),
+    db_path=db.db_path,
+    ttl=int(os.environ.get('SESSION_TTL', 8 * 3600)),
+    max_entries=int(os.environ.get('SESSION_MAX', 10000)),
+    on_connect=db._configure_connection
+)
+session_sweeper = SessionSweeper(sessions, interval=float(os.environ.get('SESSION_SWEEP_INTERVAL', 300))).start()
+
+# Request/DB latency histograms for /metrics (METRICS_TOKEN, if set, guards the endpoint)
+metrics = app_metrics.Metrics()
+app_metrics.instrument_db(db, metrics)
+app_metrics.instrument_app(app, metrics)
+metrics.add_collector(app_metrics.db_collector(db))
+metrics.add_collector(app_metrics.session_collector(sessions))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+
+def _is_admin_request() -> bool:
+    token = _request_token()
+    user = sessions.get(token) if token else None
+    return user is not None and user.get('role') == 'admin'
+
+
+# Per-request profiling: X-Profile / ?profile= (admin or signed token) or PROFILE_SAMPLE_RATE
+profiler = profiling.RequestProfiler(
+    app.config['SECRET_KEY'].encode(),
+    capacity=int(os.environ.get('PROFILE_HISTORY', 20)),
+    sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),
+    sample_mode=os.environ.get('PROFILE_SAMPLE_MODE', 'cprofile')
+)
+profiling.instrument_app(app, profiler, _is_admin_request)
 
 
 # ==================== DECORATORS ====================
 
+def _request_token():
+    """Bearer token from the Authorization header (or None)."""
+    token = request.headers.get('Authorization')
+    if token and token.startswith('Bearer '):
+        token = token[7:]
+    return token or None
+
+
 def require_auth(f):
     """Decorator to require authentication."""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        token = request.headers.get('Authorization')
+        token = _request_token()
         if not token:
             return jsonify({'error': 'Authorization token required'}), 401
         
-        if token.startswith('Bearer '):
-            token = token[7:]
-        
-        if token not in active_sessions:
+        user = sessions.get(token)
+        if user is None:
             return jsonify({'error': 'Invalid or expired token'}), 401
         
-        request.current_user = active_sessions[token]
+        request.current_user = user
+        request.session_token = token
         return f(*args, **kwargs)
     return decorated_function
 
@@ -48,21 +107,19 @@ def require_admin(f):
     """Decorator to require admin role."""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        token = request.headers.get('Authorization')
+        token = _request_token()
         if not token:
             return jsonify({'error': 'Authorization token required'}), 401
         
-        if token.startswith('Bearer '):
-            token = token[7:]
-        
-        if token not in active_sessions:
+        user = sessions.get(token)
+        if user is None:
             return jsonify({'error': 'Invalid or expired token'}), 401
         
-        user = active_sessions[token]
         if user.get('role') != 'admin':
             return jsonify({'error': 'Admin access required'}), 403
         
         request.current_user = user
+        request.session_token = token
         return f(*args, **kwargs)
     return decorated_function
 
@@ -78,7 +135,9 @@ def index():
         'endpoints': {
             'auth': {
                 'POST /api/auth/login': 'Login user',
-                'POST /api/auth/register': 'Register new user'
+                'POST /api/auth/register': 'Register new user',
+                'POST /api/auth/logout': 'End current session',
+                'POST /api/auth/change-password': 'Change password (revokes all sessions, returns a new token)'
             },
             'services': {
                 'GET /api/services': 'Get all services',
@@ -86,8 +145,11 @@ def index():
                 'PUT /api/services/<id>': 'Update service (admin)',
                 'DELETE /api/services/<id>': 'Delete service (admin)'
             },
+            'users': {
+                'GET /api/users?limit=&cursor=&role=': 'List users (admin, paginated)'
+            },
             'appointments': {
-                'GET /api/appointments': 'Get appointments',
+                'GET /api/appointments?limit=&cursor=&status=&from=&to=': 'Get appointments (paginated)',
                 'POST /api/appointments': 'Create new appointment',
                 'PUT /api/appointments/<id>': 'Update appointment',
                 'DELETE /api/appointments/<id>': 'Cancel appointment'
@@ -97,16 +159,40 @@ def index():
                 'POST /api/vehicles': 'Add new vehicle'
             },
             'notifications': {
-                'GET /api/notifications': 'Get user notifications',
+                'GET /api/notifications?limit=&cursor=&unread=': 'Get user notifications (paginated)',
                 'PUT /api/notifications/<id>/read': 'Mark notification as read',
-                'POST /api/notifications/broadcast': 'Broadcast notification (admin)'
+                'POST /api/notifications/broadcast': 'Broadcast notification (admin, {"async": true} returns a job id)',
+                'GET /api/notifications/broadcast/<job_id>': 'Async broadcast progress (admin)'
             },
             'settings': {
                 'GET /api/settings': 'Get settings',
                 'POST /api/settings': 'Update settings (admin)'
             },
+            'search': {
+                'GET /api/search?q=<text>&type=<all|appointments|users|services|vehicles>': 'Full-text search'
+            },
+            'stream': {
+                'GET /api/stream?token=': 'Server-Sent Events (notification, appointment_created, appointment_status); resumes from Last-Event-ID'
+            },
+            'board': {
+                'GET /api/board?status=&from=&to=': 'Workshop board snapshot with delta cursor (admin)',
+                'GET /api/board/changes?since=': 'Board deltas since cursor (admin)',
+                'GET /api/board/stream?token=&since=': 'Board deltas as SSE, resumes from Last-Event-ID (admin)'
+            },
+            'dashboard': {
+                'GET /api/dashboard?upcoming=5': 'Counts, upcoming appointments and vehicles in one call',
+                'POST /api/batch': 'Run several GET sub-requests in one round-trip ({"requests": [{"path": ...}]})'
+            },
             'health': {
-                'GET /api/health': 'Health check'
+                'GET /api/health': 'Health check',
+                'GET /metrics': 'Prometheus metrics (request/DB latency, pool, cache, sessions)'
+            },
+            'profiling': {
+                'any request + X-Profile: <token|cprofile|sample>': 'Profile this request (mode names need an admin token), response has X-Profile-Id',
+                'GET /api/admin/profiles': 'Stored request profiles (admin)',
+                'GET /api/admin/profiles/<id>?format=text|pstats|collapsed': 'Profile report, pstats file or flamegraph stacks (admin)',
+                'POST /api/admin/profiles/token': 'Signed profiling token ({"ttl": 600, "mode": "cprofile"}) (admin)',
+                'PUT /api/admin/profiles/sampling': 'Profile a share of all requests ({"rate": 0.01}) (admin)'
             }
         }
     })
@@ -122,7 +208,14 @@ def health_check():
         return jsonify({
             'status': 'healthy',
             'timestamp': datetime.now().isoformat(),
-            'database': 'connected'
+            'database': 'connected',
+            'pool': db.pool_stats(),
+            'contention': db.contention_stats(),
+            'cache': db.cache_stats(),
+            'sessions': sessions.stats(),
+            'events': db.event_stats(),
+            'slow_queries': db.slow_query_stats(),
+            'json': provider_name()
         }), 200
     except Exception as e:
         return jsonify({
@@ -132,6 +225,14 @@ def health_check():
         }), 500
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Metrics in the Prometheus text exposition format."""
+    if METRICS_TOKEN and _request_token() != METRICS_TOKEN:
+        return jsonify({'error': 'Invalid metrics token'}), 401
+    return Response(metrics.render(), content_type=app_metrics.CONTENT_TYPE)
+
+
 # ==================== AUTH ENDPOINTS ====================
 
 @app.route('/api/auth/login', methods=['POST'])
@@ -155,9 +256,7 @@ def login():
         if not user:
             return jsonify({'error': 'Invalid credentials'}), 401
         
-        # Generate token
-        token = secrets.token_urlsafe(32)
-        active_sessions[token] = user
+        token = sessions.create(user)
         
         return jsonify({
             'success': True,
@@ -197,9 +296,7 @@ def register():
             # Get created user
             user = db.get_user_by_id(user_id)
             
-            # Generate token
-            token = secrets.token_urlsafe(32)
-            active_sessions[token] = user
+            token = sessions.create(user)
             
             return jsonify({
                 'success': True,
@@ -214,9 +311,73 @@ def register():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/auth/logout', methods=['POST'])
+@require_auth
+def logout():
+    """End the current session."""
+    sessions.revoke(request.session_token)
+    return jsonify({'success': True}), 200
+
+
+@app.route('/api/auth/change-password', methods=['POST'])
+@require_auth
+def change_password():
+    """Change password; every session of the user is revoked and a new token issued."""
+    try:
+        data = request.get_json() or {}
+        old_password = data.get('old_password')
+        new_password = data.get('new_password')
+        
+        if not old_password or not new_password:
+            return jsonify({'error': 'old_password and new_password required'}), 400
+        
+        user = request.current_user
+        success, message = db.change_user_password(user['id'], old_password, new_password)
+        if not success:
+            return jsonify({'error': message}), 400
+        
+        sessions.revoke_user(user['id'])
+        token = sessions.create(user)
+        
+        return jsonify({
+            'success': True,
+            'message': message,
+            'token': token,
+            'session_token': token
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# ==================== USERS ENDPOINTS ====================
+
+@app.route('/api/users', methods=['GET'])
+@require_admin
+def get_users():
+    """Get users (admin only, keyset paginated: limit, cursor, role)."""
+    try:
+        page = db.get_users_page(
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor'),
+            role=request.args.get('role')
+        )
+        return jsonify({
+            'success': True,
+            'users': page['items'],
+            'next_cursor': page['next_cursor'],
+            'has_more': page['has_more']
+        }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 # ==================== SERVICES ENDPOINTS ====================
 
 @app.route('/api/services', methods=['GET'])
+@conditional(db, ['services'], POLICY_PUBLIC, per_user=False)
 def get_services():
     """Get all services."""
     try:
@@ -318,21 +479,37 @@ def delete_service(service_id):
 
 @app.route('/api/appointments', methods=['GET'])
 @require_auth
+@conditional(db, ['appointments', 'services', 'vehicles', 'users'], POLICY_PRIVATE)
 def get_appointments():
-    """Get appointments."""
+    """Get appointments (keyset paginated: limit, cursor, status, from, to)."""
     try:
         user = request.current_user
-        
-        # Admin can see all appointments
-        if user.get('role') == 'admin':
-            appointments = db.get_all_appointments()
-        else:
-            appointments = db.get_user_appointments(user['id'])
-        
-        return jsonify({
+        filters = {
+            'status': request.args.get('status'),
+            'date_from': request.args.get('from'),
+            'date_to': request.args.get('to'),
+            # Admin can see all appointments
+            'user_id': None if user.get('role') == 'admin' else user['id'],
+        }
+
+        page = db.get_appointments_page(
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor'),
+            **filters
+        )
+
+        response = {
             'success': True,
-            'appointments': appointments
-        }), 200
+            'appointments': page['items'],
+            'next_cursor': page['next_cursor'],
+            'has_more': page['has_more']
+        }
+        if request.args.get('include_total'):
+            response['total'] = db.count_appointments(**filters)
+
+        return jsonify(response), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -353,7 +530,8 @@ def create_appointment():
         if not vehicle_id or not service_id or not appointment_date:
             return jsonify({'error': 'Vehicle, service and date required'}), 400
         
-        appointment_id = db.create_appointment(
+        # Price lookup, insert and confirmation notification commit together
+        success, message, appointment_id = db.create_appointment(
             user_id=user['id'],
             vehicle_id=int(vehicle_id),
             service_id=int(service_id),
@@ -361,24 +539,15 @@ def create_appointment():
             notes=notes
         )
         
-        if appointment_id:
+        if success:
             appointment = db.get_appointment_by_id(appointment_id)
             
-            # Create notification
-            db.create_notification(
-                user_id=user['id'],
-                title='Appointment Confirmed',
-                message=f'Your appointment has been scheduled for {appointment_date}',
-                notification_type='appointment',
-                related_appointment_id=appointment_id
-            )
-            
             return jsonify({
                 'success': True,
                 'appointment': appointment
             }), 201
         else:
-            return jsonify({'error': 'Failed to create appointment'}), 500
+            return jsonify({'error': message or 'Failed to create appointment'}), 500
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -439,21 +608,26 @@ def cancel_appointment(appointment_id):
         if user['role'] != 'admin' and appointment['user_id'] != user['id']:
             return jsonify({'error': 'Not authorized'}), 403
         
-        success = db.update_appointment(
-            appointment_id=appointment_id,
-            status='cancelled'
-        )
-        
-        if success:
-            # Create notification
-            db.create_notification(
-                user_id=appointment['user_id'],
-                title='Appointment Cancelled',
-                message=f'Your appointment has been cancelled',
-                notification_type='appointment',
-                related_appointment_id=appointment_id
+        # Status change and notification are one unit of work
+        with db.transaction():
+            success = db.update_appointment(
+                appointment_id=appointment_id,
+                status='cancelled'
             )
             
+            if success:
+                notified, _ = db.create_notification(
+                    user_id=appointment['user_id'],
+                    title='Appointment Cancelled',
+                    message=f'Your appointment has been cancelled',
+                    notification_type='appointment',
+                    related_appointment_id=appointment_id
+                )
+                if not notified:
+                    # Raising rolls the status change back too
+                    raise RuntimeError('Failed to create cancellation notification')
+        
+        if success:
             return jsonify({
                 'success': True,
                 'message': 'Appointment cancelled successfully'
@@ -469,6 +643,7 @@ def cancel_appointment(appointment_id):
 
 @app.route('/api/vehicles', methods=['GET'])
 @require_auth
+@conditional(db, ['vehicles'], POLICY_PRIVATE)
 def get_vehicles():
     """Get user vehicles."""
     try:
@@ -535,15 +710,31 @@ def create_vehicle():
 @app.route('/api/notifications', methods=['GET'])
 @require_auth
 def get_notifications():
-    """Get user notifications."""
+    """Get user notifications (keyset paginated: limit, cursor, unread, from, to)."""
     try:
         user = request.current_user
-        notifications = db.get_user_notifications(user['id'])
-        
-        return jsonify({
+        page = db.get_notifications_page(
+            user['id'],
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor'),
+            unread_only=request.args.get('unread') in ('1', 'true'),
+            since=request.args.get('from'),
+            until=request.args.get('to')
+        )
+
+        response = {
             'success': True,
-            'notifications': notifications
-        }), 200
+            'notifications': page['items'],
+            'next_cursor': page['next_cursor'],
+            'has_more': page['has_more']
+        }
+        if request.args.get('include_total'):
+            response['total'] = db.get_notification_count(user['id'])
+            response['unread'] = db.get_unread_count(user['id'])
+
+        return jsonify(response), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -590,22 +781,27 @@ def broadcast_notification():
         if not title or not message:
             return jsonify({'error': 'Title and message required'}), 400
         
-        # Get all active users
-        users = db.get_all_users()
-        count = 0
-        
-        for user in users:
-            if user.get('is_active'):
-                db.create_notification(
-                    user_id=user['id'],
-                    title=title,
-                    message=message,
-                    notification_type=notification_type
+        if data.get('async'):
+            job_id = jobs.submit(
+                'broadcast',
+                lambda progress: db.broadcast_notification_batched(
+                    title, message, notification_type,
+                    batch_size=max(1, int(data.get('batch_size', 500))),
+                    progress=progress
                 )
-                count += 1
+            )
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status_url': f'/api/notifications/broadcast/{job_id}'
+            }), 202
+
+        # Single INSERT ... SELECT, one transaction for all users
+        count = db.broadcast_notification(title, message, notification_type)
         
         return jsonify({
             'success': True,
+            'count': count,
             'message': f'Notification sent to {count} users'
         }), 200
         
@@ -613,20 +809,72 @@ def broadcast_notification():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/notifications/broadcast/<job_id>', methods=['GET'])
+@require_admin
+def broadcast_status(job_id):
+    """Progress of an async broadcast job (admin only)."""
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job}), 200
+
+
+# ==================== SEARCH ENDPOINTS ====================
+
+SEARCH_TYPES = ('appointments', 'users', 'services', 'vehicles')
+
+
+@app.route('/api/search', methods=['GET'])
+@require_auth
+def search():
+    """Full-text search (prefix matching, ranked, with highlighted snippets)."""
+    try:
+        user = request.current_user
+        query = request.args.get('q', '').strip()
+        search_type = request.args.get('type', 'all')
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+
+        if not query:
+            return jsonify({'error': 'Query parameter q required'}), 400
+
+        if search_type != 'all' and search_type not in SEARCH_TYPES:
+            return jsonify({'error': f'Unknown search type: {search_type}'}), 400
+
+        types = SEARCH_TYPES if search_type == 'all' else (search_type,)
+        is_admin = user.get('role') == 'admin'
+        # Customers only see the catalog and their own vehicles/appointments
+        owner_id = None if is_admin else user['id']
+
+        results = {}
+        if 'appointments' in types:
+            results['appointments'] = db.search_appointments(query, limit=limit, user_id=owner_id)
+        if 'users' in types and is_admin:
+            results['users'] = db.search_users(query, limit=limit)
+        if 'services' in types:
+            results['services'] = db.search_services(query, limit=limit)
+        if 'vehicles' in types:
+            results['vehicles'] = db.search_vehicles(query, limit=limit, user_id=owner_id)
+
+        return jsonify({
+            'success': True,
+            'query': query,
+            'full_text': db.fts_enabled,
+            'results': results
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 # ==================== SETTINGS ENDPOINTS ====================
 
 @app.route('/api/settings', methods=['GET'])
+@conditional(db, ['settings'], POLICY_PUBLIC, per_user=False)
 def get_settings():
     """Get settings."""
     try:
-        settings = db.get_all_settings()
-        
-        # Convert to dict for easier access
-        settings_dict = {s['key']: s['value'] for s in settings}
-        
         return jsonify({
             'success': True,
-            'settings': settings_dict
+            'settings': db.get_all_settings()
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -642,8 +890,9 @@ def update_settings():
         if not isinstance(data, dict):
             return jsonify({'error': 'Settings must be a dictionary'}), 400
         
-        for key, value in data.items():
-            db.set_setting(key, value)
+        with db.transaction():
+            for key, value in data.items():
+                db.set_setting(key, value)
         
         return jsonify({
             'success': True,
@@ -654,6 +903,270 @@ def update_settings():
         return jsonify({'error': str(e)}), 500
 
 
+# ==================== DASHBOARD & BATCH ENDPOINTS ====================
+
+MAX_BATCH_REQUESTS = 20
+
+
+@app.route('/api/dashboard', methods=['GET'])
+@require_auth
+def get_dashboard():
+    """Everything the dashboard needs for first paint, in one request."""
+    try:
+        user = request.current_user
+        dashboard = db.get_dashboard(
+            user['id'],
+            all_users=user.get('role') == 'admin',
+            upcoming_limit=min(request.args.get('upcoming', 5, type=int), 50)
+        )
+        return jsonify({'success': True, **dashboard}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/batch', methods=['POST'])
+@require_auth
+def batch():
+    """Run several GET sub-requests in one round-trip.
+
+    Body: {"requests": [{"path": "/api/vehicles"}, {"path": "/api/services"}]}
+    Sub-requests run with the caller's token, in order, inside one read
+    transaction (one connection, one consistent snapshot).
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('requests')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'requests must be a non-empty list'}), 400
+    if len(items) > MAX_BATCH_REQUESTS:
+        return jsonify({'error': f'At most {MAX_BATCH_REQUESTS} requests per batch'}), 400
+
+    headers = {'Authorization': request.headers.get('Authorization', '')}
+    responses = []
+    try:
+        with db.transaction(immediate=False):
+            for item in items:
+                path = item.get('path', '') if isinstance(item, dict) else ''
+                method = (item.get('method') or 'GET').upper() if isinstance(item, dict) else 'GET'
+                if method != 'GET' or not path.startswith('/api/') or path.startswith('/api/batch'):
+                    responses.append({'path': path, 'status': 400,
+                                      'body': {'error': 'Only GET /api/... sub-requests are allowed'}})
+                    continue
+                with app.test_request_context(path, method='GET', headers=headers):
+                    sub_response = app.full_dispatch_request()
+                responses.append({
+                    'path': path,
+                    'status': sub_response.status_code,
+                    'body': sub_response.get_json(silent=True)
+                })
+        return jsonify({'success': True, 'responses': responses}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# ==================== LIVE EVENTS (SSE) ====================
+
+SSE_KEEPALIVE = float(os.environ.get('SSE_KEEPALIVE', 15))
+
+# Set on shutdown so open streams end instead of holding the process
+stream_shutdown = threading.Event()
+
+
+def _stream_user():
+    """Session user for a stream request (header token or ?token=)."""
+    token = _request_token() or request.args.get('token')
+    return sessions.get(token) if token else None
+
+
+@app.route('/api/stream', methods=['GET'])
+def stream():
+    """Server-Sent Events: notifications and appointment changes as they happen.
+
+    EventSource cannot send headers, so the token may also be given as
+    ?token=. Reconnecting clients send Last-Event-ID and get the events
+    they missed; 'resync' means the gap was too long and they should reload.
+    """
+    user = _stream_user()
+    if user is None:
+        return jsonify({'error': 'Invalid or expired token'}), 401
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    events = db.events.listen(user['id'], user.get('role') == 'admin', last_event_id,
+                              keepalive=SSE_KEEPALIVE, stop=stream_shutdown)
+
+    def generate():
+        yield f"retry: 3000\n: connected {db.events.last_id}\n\n"
+        try:
+            for event in events:
+                if event is None:
+                    yield ": keepalive\n\n"
+                elif event == RESYNC:
+                    yield f"id: {db.events.last_id}\nevent: resync\ndata: {{}}\n\n"
+                else:
+                    yield event.to_sse()
+        finally:
+            events.close()
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
+# ==================== WORKSHOP BOARD ====================
+
+BOARD_POLL_INTERVAL = float(os.environ.get('BOARD_POLL_INTERVAL', 2))
+
+
+@app.route('/api/board', methods=['GET'])
+@require_admin
+def get_board():
+    """Workshop board snapshot (admin): all appointments with versions plus a delta cursor."""
+    try:
+        board = db.get_board_snapshot(
+            status=request.args.get('status'),
+            date_from=request.args.get('from'),
+            date_to=request.args.get('to')
+        )
+        # Thousands of rows for a busy shop: streamed in chunks past STREAM_THRESHOLD
+        return json_response({'success': True, 'cursor': board['cursor']}, 'items', board['items'])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/board/changes', methods=['GET'])
+@require_admin
+def get_board_changes():
+    """Board deltas since a cursor (admin, polling fallback for the stream)."""
+    try:
+        since = request.args.get('since', type=int)
+        if since is None:
+            return jsonify({'error': 'since is required'}), 400
+        delta = db.get_board_changes(since, limit=request.args.get('limit', 500, type=int))
+        return jsonify({'success': True, **delta}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/board/stream', methods=['GET'])
+def board_stream():
+    """Board deltas pushed as SSE 'board' events (admin).
+
+    Start from the snapshot's cursor (?since=); the event id is the cursor,
+    so a reconnect resumes through Last-Event-ID. Writes made in this
+    process wake the stream at once; changes from other processes (the
+    desktop app, other workers) are picked up every BOARD_POLL_INTERVAL s.
+    """
+    user = _stream_user()
+    if user is None:
+        return jsonify({'error': 'Invalid or expired token'}), 401
+    if user.get('role') != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        since = int(since) if since else db.get_board_cursor()
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    wakeups = db.events.listen(user['id'], True, keepalive=BOARD_POLL_INTERVAL,
+                               stop=stream_shutdown)
+
+    def deltas():
+        nonlocal since
+        while True:
+            delta = db.get_board_changes(since)
+            if delta['changes'] or delta['reset']:
+                since = delta['cursor']
+                yield f"id: {since}\nevent: board\ndata: {json.dumps(delta, default=str)}\n\n"
+            if not delta['has_more']:
+                return
+
+    def generate():
+        yield "retry: 3000\n\n"
+        idle = 0.0
+        try:
+            yield from deltas()
+            for wakeup in wakeups:
+                sent = False
+                for message in deltas():
+                    sent = True
+                    yield message
+                idle = 0.0 if sent else idle + BOARD_POLL_INTERVAL
+                if idle >= SSE_KEEPALIVE:
+                    idle = 0.0
+                    yield ": keepalive\n\n"
+        finally:
+            wakeups.close()
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
+# ==================== PROFILING ====================
+
+@app.route('/api/admin/profiles', methods=['GET'])
+@require_admin
+def list_profiles():
+    """Stored request profiles, newest first (admin)."""
+    return jsonify({'success': True, 'profiles': profiler.list(), 'stats': profiler.stats()}), 200
+
+
+@app.route('/api/admin/profiles/<int:profile_id>', methods=['GET'])
+@require_admin
+def get_profile(profile_id):
+    """One profile as ?format=text|pstats|collapsed (admin)."""
+    profile = profiler.get(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Profile not found'}), 404
+
+    fmt = request.args.get('format', 'text')
+    if fmt not in profiling.FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(profiling.FORMATS)}"}), 400
+    try:
+        body, content_type = profiler.render(profile, fmt, limit=request.args.get('limit', 50, type=int))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    response = Response(body, content_type=content_type)
+    if fmt == 'pstats':
+        response.headers['Content-Disposition'] = f'attachment; filename=profile-{profile_id}.prof'
+    return response
+
+
+@app.route('/api/admin/profiles/token', methods=['POST'])
+@require_admin
+def create_profile_token():
+    """Signed token that profiles any request sending it as X-Profile (admin)."""
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode', 'cprofile')
+    if mode not in profiling.MODES:
+        return jsonify({'error': f"mode must be one of: {', '.join(profiling.MODES)}"}), 400
+    ttl = min(max(int(data.get('ttl', 600)), 1), 24 * 3600)
+    return jsonify({'success': True, 'token': profiler.make_token(ttl, mode), 'expires_in': ttl}), 200
+
+
+@app.route('/api/admin/profiles/sampling', methods=['PUT'])
+@require_admin
+def set_profile_sampling():
+    """Profile a random share of all requests: {"rate": 0.01, "mode": "sample"} (admin)."""
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode')
+    if mode is not None and mode not in profiling.MODES:
+        return jsonify({'error': f"mode must be one of: {', '.join(profiling.MODES)}"}), 400
+    try:
+        profiler.set_sampling(data.get('rate', 0), mode)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'rate must be a number between 0 and 1'}), 400
+    return jsonify({'success': True, 'stats': profiler.stats()}), 200
+
+
 # ==================== ERROR HANDLERS ====================
 
 @app.errorhandler(404)
@@ -688,6 +1201,7 @@ if __name__ == '__main__':
     print(f"   Login:  http://localhost:7000/api/auth/login")
     print(f"\n👤 Demo accounts:")
     print(f"   admin/admin123 | user/user123")
+    print(f"\n⚠️  Development server - za mrezu koristite: python narudzbe/serve.py")
     print("=" * 60)
     
     app.run(
@@ -0,0 +1,506 @@
+"""
+Auto Servis Pro - ASGI API server
+Async entry point for the same API: live streams and hot reads run natively
+on the event loop, every other route runs the Flask app on a bounded executor
+
+    uvicorn asgi_server:app --host 0.0.0.0 --port 7000
+"""
+
+import asyncio
+import functools
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import parse_qs
+
+import api_server
+from api_server import app as flask_app, db, sessions, jobs, session_sweeper, stream_shutdown
+from event_hub import RESYNC
+from http_cache import compute_etag, POLICY_PUBLIC
+
+SHUTDOWN_TIMEOUT = float(os.environ.get('SHUTDOWN_TIMEOUT', 10))
+
+
+class AsyncDB:
+    """Async facade over AutoServiceDB.
+
+    Every call runs on a thread pool no larger than the connection pool, so
+    the event loop never blocks on SQLite and a burst of requests queues for
+    a worker instead of piling up waiting for a pooled connection.
+
+        services = await adb.get_all_services()
+    """
+
+    def __init__(self, db, max_workers: int = None):
+        self.db = db
+        if max_workers is None:
+            max_workers = db.pool.max_size if db.pool is not None else 4
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='db')
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run any blocking callable on the DB executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def __getattr__(self, name):
+        attr = getattr(self.db, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+        return call
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+class Request:
+    """The parts of an ASGI HTTP request the native handlers need."""
+
+    def __init__(self, scope: Dict, body: bytes):
+        self.scope = scope
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query_string = scope.get('query_string', b'').decode('latin-1')
+        self.args = {k: v[0] for k, v in parse_qs(self.query_string).items()}
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1')
+                        for k, v in scope.get('headers', [])}
+        self.body = body
+
+    @property
+    def full_path(self) -> str:
+        # Same shape as Flask's request.full_path, so ETags match
+        return f"{self.path}?{self.query_string}"
+
+    def token(self) -> Optional[str]:
+        token = self.headers.get('authorization')
+        if token and token.startswith('Bearer '):
+            token = token[7:]
+        return token or self.args.get('token') or None
+
+    def if_none_match(self, etag: str) -> bool:
+        header = self.headers.get('if-none-match')
+        if not header:
+            return False
+        tags = [t.strip() for t in header.split(',')]
+        tags = [t[2:] if t.startswith('W/') else t for t in tags]
+        return '*' in tags or any(t.strip('"') == etag for t in tags)
+
+
+async def send_json(send, status: int, data: Any, headers: Dict[str, str] = None):
+    body = json.dumps(data, default=str).encode('utf-8')
+    raw_headers = [(b'content-type', b'application/json'),
+                   (b'content-length', str(len(body)).encode())]
+    for name, value in (headers or {}).items():
+        raw_headers.append((name.lower().encode('latin-1'), value.encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+class AsgiApp:
+    """ASGI application serving the Auto Servis Pro API.
+
+    Native (async) routes: /api/health, /api/services, /api/dashboard,
+    /api/stream and /api/board/stream. An idle SSE client costs one
+    asyncio.Event and one small task instead of a thread. Everything else is
+    handed to the Flask app through a WSGI call on the DB executor, so the
+    routes, auth and error handling stay defined in one place.
+
+    Native routes are counted and timed in /metrics like the Flask ones
+    (time to the response start, so a stream counts once when it opens),
+    but without the per-request DB call count, since their DB calls run on
+    executor threads. The request profiler (X-Profile) only sees routes
+    served through Flask.
+
+    Graceful shutdown (ASGI lifespan): new requests get 503, open streams
+    end, in-flight requests get SHUTDOWN_TIMEOUT seconds to finish, then
+    the executor, background jobs and pooled connections are closed.
+    """
+
+    def __init__(self, flask_app, db, sessions, max_workers: int = None, metrics=None):
+        self.flask_app = flask_app
+        self.db = db
+        self.metrics = metrics
+        self.adb = AsyncDB(db, max_workers)
+        self.sessions = sessions
+        self.closing = False
+        self._loop = None
+        self._wakers = set()
+        self._in_flight = 0
+        self._idle = None
+        self.routes = {
+            ('GET', '/api/health'): self.health,
+            ('GET', '/api/services'): self.services,
+            ('GET', '/api/dashboard'): self.dashboard,
+            ('GET', '/api/stream'): self.stream,
+            ('GET', '/api/board/stream'): self.board_stream,
+        }
+
+    # ---------- ASGI entry ----------
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        self._attach_loop()
+
+        if self.closing:
+            await send_json(send, 503, {'error': 'Server is shutting down'},
+                            {'Connection': 'close', 'Retry-After': '5'})
+            return
+
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        request = Request(scope, body)
+        handler = self.routes.get((request.method, request.path))
+
+        self._in_flight += 1
+        self._idle.clear()
+        try:
+            if handler is not None:
+                await self.call_native(handler, request, receive, send)
+            else:
+                await self.call_flask(request, send)
+        finally:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._idle.set()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self._attach_loop()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def begin_shutdown(self):
+        """Refuse new requests and end open streams (safe from any thread).
+
+        Servers wait for open connections before the lifespan shutdown, so
+        call this as soon as the exit signal arrives (serve() does); SSE
+        clients then disconnect at once instead of holding the shutdown.
+        """
+        self.closing = True
+        stream_shutdown.set()
+        self.db.events.wake_all()
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake_all)
+
+    async def shutdown(self):
+        """Stop accepting work, end streams, drain requests, release resources."""
+        self.begin_shutdown()
+        if self._in_flight:
+            try:
+                await asyncio.wait_for(self._idle.wait(), SHUTDOWN_TIMEOUT)
+            except asyncio.TimeoutError:
+                print(f"Shutdown: {self._in_flight} request(s) still running after {SHUTDOWN_TIMEOUT}s")
+        if self._loop is not None:
+            self.db.events.remove_waker(self._threadsafe_wake)
+        session_sweeper.stop()
+        jobs.shutdown(wait=False)
+        self.adb.shutdown(wait=True)
+        self.db.close()
+
+    def _attach_loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._idle = asyncio.Event()
+            self._idle.set()
+            self.db.events.add_waker(self._threadsafe_wake)
+
+    # ---------- event hub bridge ----------
+
+    def _threadsafe_wake(self):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake_all)
+
+    def _wake_all(self):
+        for waker in self._wakers:
+            waker.set()
+
+    async def _watch_disconnect(self, receive, wake: asyncio.Event, state: Dict):
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                state['disconnected'] = True
+                wake.set()
+                return
+
+    # ---------- helpers ----------
+
+    async def current_user(self, request: Request, send, admin: bool = False) -> Optional[Dict]:
+        token = request.token()
+        if not token:
+            await send_json(send, 401, {'error': 'Authorization token required'})
+            return None
+        user = await self.adb.run(self.sessions.get, token)
+        if user is None:
+            await send_json(send, 401, {'error': 'Invalid or expired token'})
+            return None
+        if admin and user.get('role') != 'admin':
+            await send_json(send, 403, {'error': 'Admin access required'})
+            return None
+        return user
+
+    async def call_native(self, handler, request: Request, receive, send):
+        """Run a native route, recorded in /metrics under its path."""
+        if self.metrics is None:
+            await handler(request, receive, send)
+            return
+        scope = self.metrics.begin_request(count_db_calls=False)
+        status = None
+
+        async def observed_send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start' and status is None:
+                status = message['status']
+                self.metrics.end_request(scope, request.path, request.method, status)
+            await send(message)
+
+        try:
+            await handler(request, receive, observed_send)
+        finally:
+            if status is None:
+                self.metrics.end_request(scope, request.path, request.method, 500)
+
+    async def call_flask(self, request: Request, send):
+        """Run one request through the Flask (WSGI) app on the DB executor."""
+        scope = request.scope
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': request.method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': request.path,
+            'QUERY_STRING': request.query_string,
+            'SERVER_NAME': str(server[0]),
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(request.body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+            'CONTENT_LENGTH': str(len(request.body)),
+        }
+        for name, value in request.headers.items():
+            key = name.upper().replace('-', '_')
+            if key == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+            elif key != 'CONTENT_LENGTH':
+                environ[f'HTTP_{key}'] = value
+
+        def run():
+            started = {}
+
+            def start_response(status, headers, exc_info=None):
+                started['status'] = int(status.split(' ', 1)[0])
+                started['headers'] = headers
+
+            result = self.flask_app(environ, start_response)
+            try:
+                body = b''.join(result)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+            return started['status'], started['headers'], body
+
+        status, headers, body = await self.adb.run(run)
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    # ---------- native routes ----------
+
+    async def health(self, request, receive, send):
+        try:
+            await self.adb.run(lambda: self.db.get_connection().close())
+            await send_json(send, 200, {
+                'status': 'healthy',
+                'timestamp': datetime.now().isoformat(),
+                'database': 'connected',
+                'server': 'asgi',
+                'executor_workers': self.adb.max_workers,
+                'in_flight': self._in_flight,
+                'pool': self.db.pool_stats(),
+                'contention': self.db.contention_stats(),
+                'cache': self.db.cache_stats(),
+                'sessions': await self.adb.run(self.sessions.stats),
+                'events': self.db.event_stats(),
+            })
+        except Exception as e:
+            await send_json(send, 500, {
+                'status': 'unhealthy',
+                'timestamp': datetime.now().isoformat(),
+                'error': str(e)
+            })
+
+    async def services(self, request, receive, send):
+        try:
+            versions = await self.adb.get_table_versions('services')
+            etag = compute_etag(versions, request.full_path)
+            headers = {'ETag': f'"{etag}"', 'Cache-Control': POLICY_PUBLIC}
+            if request.if_none_match(etag):
+                await send({'type': 'http.response.start', 'status': 304,
+                            'headers': [(k.lower().encode(), v.encode()) for k, v in headers.items()]})
+                await send({'type': 'http.response.body', 'body': b''})
+                return
+            services = await self.adb.get_all_services()
+            await send_json(send, 200, {'success': True, 'services': services}, headers)
+        except Exception as e:
+            await send_json(send, 500, {'error': str(e)})
+
+    async def dashboard(self, request, receive, send):
+        user = await self.current_user(request, send)
+        if user is None:
+            return
+        try:
+            upcoming = min(int(request.args.get('upcoming', 5)), 50)
+        except ValueError:
+            upcoming = 5
+        try:
+            dashboard = await self.adb.get_dashboard(
+                user['id'], all_users=user.get('role') == 'admin', upcoming_limit=upcoming)
+            await send_json(send, 200, {'success': True, **dashboard})
+        except Exception as e:
+            await send_json(send, 500, {'error': str(e)})
+
+    async def _sse(self, receive, send, produce, timeout: float):
+        """Common SSE plumbing: headers, keepalive, disconnect and shutdown.
+
+        produce() returns the messages to send after each wake-up (an event
+        was published, or ``timeout`` seconds passed); it is called once up
+        front.
+        """
+        wake = asyncio.Event()
+        state = {'disconnected': False}
+        watcher = asyncio.ensure_future(self._watch_disconnect(receive, wake, state))
+        self._wakers.add(wake)
+        self.db.events.subscriber_joined()
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ]})
+            await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+            idle = 0.0
+            while not (self.closing or state['disconnected']):
+                messages = await produce()
+                if messages:
+                    idle = 0.0
+                    await send({'type': 'http.response.body',
+                                'body': ''.join(messages).encode('utf-8'), 'more_body': True})
+                elif idle >= api_server.SSE_KEEPALIVE:
+                    idle = 0.0
+                    await send({'type': 'http.response.body', 'body': b': keepalive\n\n',
+                                'more_body': True})
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    idle += timeout
+                wake.clear()
+            if not state['disconnected']:
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            self._wakers.discard(wake)
+            self.db.events.subscriber_left()
+            watcher.cancel()
+
+    async def stream(self, request, receive, send):
+        """Async twin of /api/stream (same events, same Last-Event-ID resume)."""
+        user = await self.current_user(request, send)
+        if user is None:
+            return
+        last_event_id = request.headers.get('last-event-id') or request.args.get('last_event_id')
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            last_event_id = None
+
+        hub = self.db.events
+        is_admin = user.get('role') == 'admin'
+        position = {}
+        position['last_seen'], resync = hub.start_position(last_event_id)
+
+        async def produce():
+            messages = []
+            if position.pop('resync', False):
+                messages.append(f"id: {hub.last_id}\nevent: {RESYNC}\ndata: {{}}\n\n")
+            events = hub.events_after(position['last_seen'])
+            if events:
+                position['last_seen'] = events[-1].id
+                messages += [e.to_sse() for e in events if e.visible_to(user['id'], is_admin)]
+            return messages
+
+        if resync:
+            position['resync'] = True
+        await self._sse(receive, send, produce, api_server.SSE_KEEPALIVE)
+
+    async def board_stream(self, request, receive, send):
+        """Async twin of /api/board/stream."""
+        user = await self.current_user(request, send, admin=True)
+        if user is None:
+            return
+        since = request.headers.get('last-event-id') or request.args.get('since')
+        try:
+            since = int(since) if since else await self.adb.get_board_cursor()
+        except ValueError:
+            await send_json(send, 400, {'error': 'Invalid cursor'})
+            return
+        position = {'since': since}
+
+        async def produce():
+            messages = []
+            while True:
+                delta = await self.adb.get_board_changes(position['since'])
+                if delta['changes'] or delta['reset']:
+                    position['since'] = delta['cursor']
+                    messages.append(f"id: {delta['cursor']}\nevent: board\n"
+                                    f"data: {json.dumps(delta, default=str)}\n\n")
+                if not delta['has_more']:
+                    return messages
+
+        await self._sse(receive, send, produce, api_server.BOARD_POLL_INTERVAL)
+
+
+app = AsgiApp(flask_app, db, sessions, metrics=api_server.metrics)
+
+
+def serve(host: str = '0.0.0.0', port: int = 7000, **options):
+    """Run the ASGI app on uvicorn with graceful shutdown of open streams."""
+    import uvicorn
+
+    class Server(uvicorn.Server):
+        def handle_exit(self, sig, frame):
+            app.begin_shutdown()
+            super().handle_exit(sig, frame)
+
+    options.setdefault('timeout_graceful_shutdown', int(SHUTDOWN_TIMEOUT))
+    Server(uvicorn.Config(app, host=host, port=port, **options)).run()
+
+
+if __name__ == '__main__':
+    serve(port=int(os.environ.get('PORT', 7000)))
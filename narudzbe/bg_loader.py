@@ -0,0 +1,181 @@
+"""
+Auto Servis Pro - Background loader
+Pokreće upite za desktop aplikaciju na pozadinskim nitima i vraća rezultate u Tk nit,
+tako da zaključana baza (npr. dok API server piše) ne zamrzava prozor
+"""
+
+import queue
+import sys
+from typing import Any, Callable, Dict, Optional
+
+# How often the Tk thread checks for finished loads while any are running (ms)
+POLL_MS = 25
+
+# activate() has not been called yet: every group runs
+_ALL = object()
+
+
+class _Load:
+    """One submitted load: what to run and who gets the result."""
+
+    __slots__ = ('key', 'query', 'on_done', 'on_error', 'group', 'cancelled')
+
+    def __init__(self, key, query, on_done, on_error, group):
+        self.key = key
+        self.query = query
+        self.on_done = on_done
+        self.on_error = on_error
+        self.group = group
+        self.cancelled = False
+
+    def copy(self) -> '_Load':
+        return _Load(self.key, self.query, self.on_done, self.on_error, self.group)
+
+
+class BackgroundLoader:
+    """Runs query() callables on a worker pool, callbacks on the Tk thread.
+
+    Loads are identified by key ('users', 'services', ...). Submitting a key
+    that is already loading does not start a second query: the newest
+    request waits and runs once when the current one finishes, whose result
+    is then dropped as stale, so ten refresh clicks cost at most two
+    queries. Loads may belong to a group (a notebook tab); activate(group)
+    cancels the loads of other groups and re-runs the ones of this group
+    that were cancelled earlier. Loads submitted for an inactive group wait
+    the same way until their tab is shown.
+
+    All methods must be called from the Tk thread. Tk widgets are only ever
+    touched there: workers just put results on a queue that a root.after()
+    pump drains.
+    """
+
+    def __init__(self, root, workers: int = 2, poll_ms: int = POLL_MS):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.workers = workers
+        # Created with the first load: concurrent.futures is slow to import
+        # and nothing is loaded before the login screen is up
+        self._executor = None
+        self._results = queue.SimpleQueue()
+        self._running: Dict[str, _Load] = {}
+        self._waiting: Dict[str, _Load] = {}   # newest request per running key
+        self._parked: Dict[str, _Load] = {}    # for inactive groups, re-run by activate()
+        self._active = _ALL
+        self._pump_job = None
+        self.stats = {'submitted': 0, 'coalesced': 0, 'cancelled': 0, 'stale': 0, 'failed': 0}
+
+    def submit(self, key: str, query: Callable[[], Any], on_done: Callable[[Any], None],
+               on_error: Callable[[Exception], None] = None, group: str = None):
+        """Run query() in the background and call on_done(result) on the Tk thread."""
+        self.stats['submitted'] += 1
+        self._parked.pop(key, None)
+        load = _Load(key, query, on_done, on_error, group)
+        if group is not None and self._active is not _ALL and group != self._active:
+            self._cancel(key)
+            self._parked[key] = load
+            return
+        if key in self._running:
+            if key in self._waiting:
+                self.stats['coalesced'] += 1
+            self._waiting[key] = load
+            return
+        self._start(load)
+
+    def loading(self, key: str) -> bool:
+        return key in self._running or key in self._waiting
+
+    def cancel(self, key: str = None):
+        """Drop the result of key's load (of every load without key); nothing is re-run."""
+        keys = [key] if key is not None else list(set(self._running) | set(self._waiting))
+        for k in keys:
+            self._cancel(k)
+        if key is None:
+            self._parked.clear()
+            self._active = _ALL
+        else:
+            self._parked.pop(key, None)
+
+    def activate(self, group: Optional[str]):
+        """The user switched to group's tab: park other tabs' loads, resume this one's."""
+        self._active = group
+        for key in list(set(self._running) | set(self._waiting)):
+            load = self._waiting.get(key) or self._running[key]
+            if load.group is not None and load.group != group and not load.cancelled:
+                self._parked[key] = load.copy()
+                self._cancel(key)
+        for key, load in list(self._parked.items()):
+            if load.group == group:
+                del self._parked[key]
+                self.submit(key, load.query, load.on_done, load.on_error, load.group)
+
+    def shutdown(self):
+        self.cancel()
+        if self._pump_job is not None:
+            self.root.after_cancel(self._pump_job)
+            self._pump_job = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ---- internals ---------------------------------------------------------
+
+    def _cancel(self, key: str):
+        load = self._running.get(key)
+        if load is not None and not load.cancelled:
+            load.cancelled = True
+            self.stats['cancelled'] += 1
+        if self._waiting.pop(key, None) is not None:
+            self.stats['cancelled'] += 1
+
+    def _start(self, load: _Load):
+        self._running[load.key] = load
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ui-loader')
+        self._executor.submit(self._run, load)
+        if self._pump_job is None:
+            self._pump_job = self.root.after(self.poll_ms, self._pump)
+
+    def _run(self, load: _Load):
+        # Worker thread: no Tk calls here
+        if load.cancelled:
+            self._results.put((load, None, None))
+            return
+        try:
+            self._results.put((load, load.query(), None))
+        except Exception as e:
+            self._results.put((load, None, e))
+
+    def _pump(self):
+        self._pump_job = None
+        while True:
+            try:
+                load, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._finish(load, result, error)
+        if self._running and self._pump_job is None:
+            self._pump_job = self.root.after(self.poll_ms, self._pump)
+
+    def _finish(self, load: _Load, result, error):
+        if self._running.get(load.key) is load:
+            del self._running[load.key]
+        newer = self._waiting.pop(load.key, None)
+        if newer is not None:
+            self._start(newer)
+        if load.cancelled or newer is not None:
+            self.stats['stale'] += 1
+            return
+
+        if error is not None:
+            self.stats['failed'] += 1
+            if load.on_error is None:
+                print(f"Greška pri učitavanju '{load.key}': {error}")
+                return
+        try:
+            if error is not None:
+                load.on_error(error)
+            else:
+                load.on_done(result)
+        except Exception:
+            # Same reporting as any other Tk callback, and the pump keeps going
+            self.root.report_callback_exception(*sys.exc_info())
@@ -0,0 +1,133 @@
+"""
+Auto Servis Pro - Catalog cache
+Versioned in-process read-through cache for rarely changing tables
+"""
+
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class CatalogCache:
+    """Read-through cache keyed by table version.
+
+    Every entry remembers the table_versions counter of the table it was
+    loaded from. Staleness is detected in two steps:
+
+    1. ``PRAGMA data_version`` on a dedicated monitor connection. It changes
+       whenever *any other* connection commits, whether that is another
+       pooled connection in this process or the Tk app / another API worker
+       sharing the file. If it has not moved, cached entries are served
+       without touching any table.
+    2. Only when it has moved, table_versions (bumped by triggers) tells
+       which catalogs actually changed, so an unrelated write such as a new
+       notification does not throw away the service list.
+
+    Writers in this process also call ``invalidate()`` directly.
+    """
+
+    def __init__(self, db_path: str, on_connect: Callable = None):
+        self.db_path = db_path
+        self._on_connect = on_connect
+        self._monitor = None
+        self._lock = threading.RLock()
+        self._entries: Dict[Hashable, tuple] = {}
+        self._versions: Dict[str, int] = {}
+        self._data_version = None
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.external_changes = 0
+
+    def _monitor_conn(self) -> sqlite3.Connection:
+        if self._monitor is None:
+            self._monitor = sqlite3.connect(self.db_path, check_same_thread=False)
+            if self._on_connect:
+                self._on_connect(self._monitor)
+        return self._monitor
+
+    def _read_versions(self) -> Dict[str, int]:
+        rows = self._monitor_conn().execute("SELECT name, version FROM table_versions").fetchall()
+        return {name: version for name, version in rows}
+
+    def _sync(self):
+        """Drop entries whose table changed since they were loaded."""
+        data_version = self._monitor_conn().execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+
+        versions = self._read_versions()
+        changed = {table for table, version in versions.items()
+                   if self._versions.get(table) != version}
+        self._versions = versions
+        if changed:
+            stale = [key for key, (table, version, _) in self._entries.items()
+                     if table in changed and versions.get(table) != version]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self.external_changes += 1
+
+    def get(self, key: Hashable, table: str, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for key, loading it from table on a miss."""
+        with self._lock:
+            self._sync()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            version = self._versions.get(table)
+
+        # Load outside the lock, then keep the value only if no sync has
+        # seen the table change meanwhile: a value loaded before a write
+        # must not be stored under the version that came after it.
+        value = loader()
+
+        with self._lock:
+            if self._versions.get(table) == version:
+                self._entries[key] = (table, version, value)
+        return value
+
+    def table_versions(self, tables) -> tuple:
+        """Current table_versions counters for tables (None if not tracked)."""
+        with self._lock:
+            self._sync()
+            return tuple(self._versions.get(table) for table in tables)
+
+    def invalidate(self, table: str = None):
+        """Drop cached entries for one table (or everything)."""
+        with self._lock:
+            if table is None:
+                self._entries.clear()
+                self._versions.clear()
+            else:
+                for key in [k for k, (t, _, _) in self._entries.items() if t == table]:
+                    del self._entries[key]
+                # A load already in flight must not store its value either
+                self._versions.pop(table, None)
+            # Force the next get() to re-read table_versions
+            self._data_version = None
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'external_changes': self.external_changes,
+                'entries': len(self._entries),
+            }
+
+    def close(self):
+        with self._lock:
+            self._entries.clear()
+            if self._monitor is not None:
+                self._monitor.close()
+                self._monitor = None
@@ -0,0 +1,226 @@
+"""
+Auto Servis Pro - SQLite connection pool
+Bounded pool of reusable sqlite3 connections for AutoServiceDB
+"""
+
+import sqlite3
+import threading
+import time
+import weakref
+from queue import LifoQueue, Empty
+from typing import Dict, Any
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes free within the timeout."""
+
+
+class PooledConnection:
+    """Wrapper around a pooled sqlite3 connection.
+
+    Behaves like a regular connection, but ``close()`` hands the connection
+    back to the pool instead of closing the underlying file handle.
+    """
+
+    def __init__(self, pool, conn: sqlite3.Connection):
+        self._pool = pool
+        self._conn = conn
+        self._depth = 1
+        self._released = False
+
+    def __del__(self):
+        # Methods that raise before close() still return their connection,
+        # the same way an unreferenced sqlite3 connection closes itself.
+        if not self._released:
+            self._depth = 1
+            try:
+                self._pool._release(self)
+            except Exception:
+                pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    @property
+    def raw(self) -> sqlite3.Connection:
+        """Underlying sqlite3 connection."""
+        return self._conn
+
+    def cursor(self, *args, **kwargs):
+        return self._conn.cursor(*args, **kwargs)
+
+    def execute(self, *args, **kwargs):
+        return self._conn.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self._conn.executemany(*args, **kwargs)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        """Release the connection back to the pool."""
+        self._pool._release(self)
+
+
+class ConnectionPool:
+    """Bounded, thread-aware pool of SQLite connections.
+
+    A thread that already holds a connection gets the same one back on
+    nested ``acquire()`` calls (e.g. ``update_appointment_status`` calling
+    ``create_notification``), so a single request can never deadlock the
+    pool against itself. Connections are opened with
+    ``check_same_thread=False`` because they migrate between Flask worker
+    threads, but each one is only ever used by its current holder.
+    """
+
+    def __init__(self, db_path: str, max_size: int = 5, timeout: float = 30.0,
+                 on_connect=None, factory=sqlite3.Connection):
+        self.db_path = db_path
+        self.max_size = max(1, int(max_size))
+        self.timeout = timeout
+        self._on_connect = on_connect
+        self._factory = factory
+        self._idle = LifoQueue()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._created = 0
+        self._in_use = 0
+        self._acquires = 0
+        self._reuses = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=self._factory)
+        conn.row_factory = sqlite3.Row
+        if self._on_connect:
+            self._on_connect(conn)
+        return conn
+
+    def acquire(self) -> PooledConnection:
+        """Check out a connection, blocking up to ``timeout`` seconds."""
+        ref = getattr(self._local, 'conn', None)
+        held = ref() if ref is not None else None
+        if held is not None and not held._released:
+            held._depth += 1
+            return held
+
+        if self._closed:
+            raise PoolTimeout("Connection pool is closed")
+
+        conn = None
+        with self._lock:
+            self._acquires += 1
+            try:
+                conn = self._idle.get_nowait()
+                self._reuses += 1
+            except Empty:
+                if self._created < self.max_size:
+                    self._created += 1
+                    conn = False  # open outside the lock
+
+        if conn is False:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        elif conn is None:
+            start = time.perf_counter()
+            try:
+                conn = self._idle.get(timeout=self.timeout)
+            except Empty:
+                with self._lock:
+                    self._timeouts += 1
+                raise PoolTimeout(
+                    f"No database connection available after {self.timeout}s "
+                    f"(pool size {self.max_size})"
+                )
+            waited = time.perf_counter() - start
+            with self._lock:
+                self._waits += 1
+                self._reuses += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+
+        with self._lock:
+            self._in_use += 1
+
+        pooled = PooledConnection(self, conn)
+        self._local.conn = weakref.ref(pooled)
+        return pooled
+
+    def _release(self, pooled: PooledConnection):
+        pooled._depth -= 1
+        if pooled._depth > 0 or pooled._released:
+            return
+        pooled._released = True
+
+        conn = pooled._conn
+        # Never hand out a connection with a half-finished transaction
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+                self._in_use -= 1
+            return
+
+        with self._lock:
+            self._in_use -= 1
+            if self._closed:
+                self._created -= 1
+                conn.close()
+                return
+        self._idle.put(conn)
+
+    def close(self):
+        """Close all idle connections; busy ones are closed on release."""
+        self._closed = True
+        self.drain()
+
+    def drain(self):
+        """Close idle connections but keep the pool usable; new ones open on demand."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size and wait-time statistics."""
+        with self._lock:
+            return {
+                'max_size': self.max_size,
+                'open': self._created,
+                'in_use': self._in_use,
+                'idle': self._created - self._in_use,
+                'acquires': self._acquires,
+                'reuses': self._reuses,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'wait_time_total_ms': round(self._wait_total * 1000, 3),
+                'wait_time_avg_ms': round(self._wait_total * 1000 / self._waits, 3) if self._waits else 0.0,
+                'wait_time_max_ms': round(self._wait_max * 1000, 3),
+            }
@@ -2,22 +2,164 @@ import sqlite3
 import hashlib
 import secrets
 import json
+import copy
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any, Tuple
+from connection_pool import ConnectionPool
+from migrations import migrate, get_schema_version
+from db_tuning import resolve_profile, apply_pragmas, retry_on_busy, is_busy_error, ContentionStats
+import search_index
+import rollups
+from pagination import clamp_limit, decode_cursor, date_upper_bound, build_page
+from unit_of_work import UnitOfWork
+from catalog_cache import CatalogCache
+from event_hub import EventHub
+
+# Never returned by the user getters (and so never sent by the API)
+SECRET_USER_COLUMNS = ('password_hash', 'reset_token', 'reset_token_expiry')
 
 
 class AutoServiceDB:
-    def __init__(self, db_path: str = "autoservice.db"):
-        """Initialize database connection and create tables if they don't exist."""
+    def __init__(self, db_path: str = "autoservice.db", pool_size: int = 5,
+                 pool_timeout: float = 30.0, profile=None, slow_query_ms: float = None,
+                 slow_query_log: str = 'slow_queries.jsonl'):
+        """Initialize database connection and create tables if they don't exist.
+
+        pool_size=0 disables pooling and opens a new connection per call.
+        profile is a name from db_tuning.PROFILES or a dict of overrides.
+        slow_query_ms turns on the slow query log (query_log.SlowQueryLog):
+        statements slower than that go to slow_query_log with their plan.
+        """
         self.db_path = db_path
+        self.profile = resolve_profile(profile)
+        self.contention = ContentionStats()
+        self._tx_local = threading.local()
+        self.slow_queries = None
+        self._connection_factory = sqlite3.Connection
+        if slow_query_ms is not None:
+            # Imported only when used: it pulls in logging
+            from query_log import SlowQueryLog
+            self.slow_queries = SlowQueryLog(slow_query_log, slow_query_ms)
+            self._connection_factory = self.slow_queries.connection_factory()
+        self.pool = ConnectionPool(db_path, pool_size, pool_timeout,
+                                   on_connect=self._configure_connection,
+                                   factory=self._connection_factory) if pool_size > 0 else None
         self.init_database()
+        self.prune_appointment_changes()
+        self.catalog_cache = CatalogCache(db_path, on_connect=self._configure_connection)
+        # Live events for /api/stream; only writes made through this object are seen
+        self.events = EventHub()
+
+    def _configure_connection(self, conn):
+        """Apply PRAGMA profile to a new connection."""
+        apply_pragmas(conn, self.profile)
 
     def get_connection(self):
-        """Get database connection."""
-        conn = sqlite3.connect(self.db_path)
+        """Get database connection (pooled unless pooling is disabled)."""
+        tx = getattr(self._tx_local, 'tx', None)
+        if tx is not None:
+            return tx
+        if self.pool is not None:
+            return self.pool.acquire()
+        conn = sqlite3.connect(self.db_path, factory=self._connection_factory)
         conn.row_factory = sqlite3.Row
+        self._configure_connection(conn)
         return conn
 
+    @contextmanager
+    def transaction(self, immediate: bool = True):
+        """Unit of work: every DB call inside the block shares one transaction.
+
+            with db.transaction() as tx:
+                ok, message, appointment_id = db.create_appointment(...)
+                db.create_notification(..., related_appointment_id=appointment_id)
+
+        Commits once on success, rolls back if the block raises. Methods that
+        normally return a failure tuple raise inside the block instead, so a
+        failed step can never be committed half done. Nested
+        transaction() blocks join the outer one. immediate=True takes the
+        write lock up front so the block cannot fail halfway on a lock upgrade.
+        """
+        outer = getattr(self._tx_local, 'tx', None)
+        if outer is not None:
+            yield outer
+            return
+
+        conn = self.get_connection()
+        tx = UnitOfWork(conn)
+        committed = False
+        try:
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            self._tx_local.tx = tx
+            try:
+                yield tx
+            finally:
+                self._tx_local.tx = None
+            tx._finish(commit=True)
+            committed = True
+        finally:
+            if not committed:
+                tx._finish(commit=False)
+            conn.close()
+
+    def in_transaction(self) -> bool:
+        """True if the current thread is inside db.transaction()."""
+        return getattr(self._tx_local, 'tx', None) is not None
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool statistics."""
+        if self.pool is None:
+            return {'max_size': 0, 'pooling': False}
+        stats = self.pool.stats()
+        stats['pooling'] = True
+        return stats
+
+    def contention_stats(self) -> Dict[str, Any]:
+        """Lock contention seen so far (SQLITE_BUSY errors and retries)."""
+        stats = self.contention.snapshot()
+        conn = self.get_connection()
+        stats['journal_mode'] = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        conn.close()
+        return stats
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Catalog cache hit/miss counters."""
+        return self.catalog_cache.stats()
+
+    def _publish(self, event: str, data: Dict[str, Any], user_ids=None, admins: bool = False):
+        """Publish a live event once the current write is committed."""
+        tx = getattr(self._tx_local, 'tx', None)
+        if tx is not None:
+            tx.after_commit(lambda: self.events.publish(event, data, user_ids, admins))
+        else:
+            self.events.publish(event, data, user_ids, admins)
+
+    def event_stats(self) -> Dict[str, Any]:
+        """Live event hub counters."""
+        return self.events.stats()
+
+    def slow_query_stats(self) -> Optional[Dict[str, Any]]:
+        """Slow query log counters (None when the log is off)."""
+        return self.slow_queries.stats() if self.slow_queries is not None else None
+
+    def close(self):
+        """Close pooled connections."""
+        self.catalog_cache.close()
+        if self.pool is not None:
+            self.pool.close()
+        if self.slow_queries is not None:
+            self.slow_queries.close()
+
+    def release_connections(self):
+        """Close idle connections but stay usable (call before forking workers)."""
+        self.catalog_cache.close()
+        if self.pool is not None:
+            self.pool.drain()
+
     def init_database(self):
         """Create all necessary tables."""
         conn = self.get_connection()
@@ -139,6 +281,10 @@ class AutoServiceDB:
         ''')
 
         conn.commit()
+
+        # Numbered schema steps (indexes etc.) on top of the base tables
+        migrate(conn)
+        self.fts_enabled = search_index.search_index_exists(conn)
         conn.close()
 
         # Create default data
@@ -146,6 +292,22 @@ class AutoServiceDB:
         self._create_default_vehicle_types()
         self._create_default_services()
 
+    def get_schema_version(self) -> int:
+        """Vrati verziju šeme (PRAGMA user_version)."""
+        conn = self.get_connection()
+        version = get_schema_version(conn)
+        conn.close()
+        return version
+
+    def explain_query_plan(self, query: str, params: tuple = ()) -> List[str]:
+        """Vrati EXPLAIN QUERY PLAN detalje za upit."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"EXPLAIN QUERY PLAN {query}", params)
+        plan = [row['detail'] for row in cursor.fetchall()]
+        conn.close()
+        return plan
+
     def _create_default_users(self):
         """Kreiraj default admin i test korisnika."""
         conn = self.get_connection()
@@ -256,6 +418,14 @@ class AutoServiceDB:
         """Hash password using SHA-256."""
         return hashlib.sha256(password.encode()).hexdigest()
 
+    @staticmethod
+    def _public_user(user) -> Dict:
+        """User row as a dict without the password hash and the reset token."""
+        user_dict = dict(user)
+        for column in SECRET_USER_COLUMNS:
+            user_dict.pop(column, None)
+        return user_dict
+
     # ==================== USER METHODS ====================
 
     def create_user(self, username: str, email: str, password: str, 
@@ -298,10 +468,8 @@ class AutoServiceDB:
                 UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?
             ''', (user['id'],))
             conn.commit()
-            user_dict = dict(user)
-            user_dict.pop('password_hash', None)
             conn.close()
-            return user_dict
+            return self._public_user(user)
         
         conn.close()
         return None
@@ -324,10 +492,8 @@ class AutoServiceDB:
                 UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?
             ''', (user['id'],))
             conn.commit()
-            user_dict = dict(user)
-            user_dict.pop('password_hash', None)
             conn.close()
-            return user_dict
+            return self._public_user(user)
         
         conn.close()
         return None
@@ -366,12 +532,43 @@ class AutoServiceDB:
         users = cursor.fetchall()
         conn.close()
         
-        result = []
-        for user in users:
-            user_dict = dict(user)
-            user_dict.pop('password_hash', None)
-            result.append(user_dict)
-        return result
+        return [self._public_user(user) for user in users]
+
+    def has_users(self) -> bool:
+        """Da li postoji ijedan korisnik (bez učitavanja tabele)."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT EXISTS(SELECT 1 FROM users)")
+        exists = bool(cursor.fetchone()[0])
+        conn.close()
+        return exists
+
+    def get_users_page(self, limit: int = None, cursor: str = None,
+                       role: str = None) -> Dict[str, Any]:
+        """Get one keyset page of users, newest first."""
+        limit = clamp_limit(limit)
+        clauses, params = [], []
+        if role:
+            clauses.append("role = ?")
+            params.append(role)
+        if cursor:
+            created_at, last_id = decode_cursor(cursor)
+            clauses.append("(created_at, id) < (?, ?)")
+            params.extend([created_at, last_id])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        conn = self.get_connection()
+        cursor_ = conn.cursor()
+        cursor_.execute(f"""
+            SELECT * FROM users {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        """, params + [limit + 1])
+        rows = cursor_.fetchall()
+        conn.close()
+
+        users = [self._public_user(user) for user in rows]
+        return build_page(users, limit, 'created_at')
 
     def get_user_by_id(self, user_id: int) -> Optional[Dict]:
         """Get user by ID."""
@@ -382,9 +579,7 @@ class AutoServiceDB:
         conn.close()
         
         if user:
-            user_dict = dict(user)
-            user_dict.pop('password_hash', None)
-            return user_dict
+            return self._public_user(user)
         return None
 
     def delete_user(self, user_id: int) -> bool:
@@ -587,6 +782,7 @@ class AutoServiceDB:
         service_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        self.catalog_cache.invalidate('services')
         return service_id
 
     def get_all_services(self) -> List[Dict]:
@@ -738,9 +934,17 @@ class AutoServiceDB:
         
         query = f"UPDATE appointments SET {', '.join(updates)} WHERE id = ?"
         cursor.execute(query, values)
-        conn.commit()
         success = cursor.rowcount > 0
+        owner = None
+        if success and kwargs.get('status'):
+            cursor.execute("SELECT user_id FROM appointments WHERE id = ?", (appointment_id,))
+            owner = cursor.fetchone()
+        conn.commit()
         conn.close()
+        if owner:
+            self._publish('appointment_status',
+                          {'appointment_id': appointment_id, 'status': kwargs['status']},
+                          [owner['user_id']], admins=True)
         return success
 
     def delete_appointment(self, appointment_id: int) -> bool:
@@ -850,8 +1054,8 @@ class AutoServiceDB:
             conn.close()
             return False, f"Greška: {str(e)}", None
 
-    def get_all_services(self, active_only: bool = True) -> List[Dict]:
-        """Get all services."""
+    def _load_services(self, active_only: bool) -> List[Dict]:
+        """Učitaj usluge iz baze (bez keša)."""
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -864,13 +1068,33 @@ class AutoServiceDB:
         conn.close()
         return [dict(s) for s in services]
 
-    def get_service_by_id(self, service_id: int) -> Optional[Dict]:
-        """Get service by ID."""
+    def _services_by_id(self) -> Dict[int, Dict]:
+        """Keširana mapa id -> usluga (uključujući neaktivne)."""
+        return self.catalog_cache.get(
+            ('services_by_id',), 'services',
+            lambda: {s['id']: s for s in self._load_services(active_only=False)}
+        )
+
+    def get_all_services(self, active_only: bool = True) -> List[Dict]:
+        """Get all services (served from the catalog cache)."""
+        services = self.catalog_cache.get(
+            ('services', active_only), 'services',
+            lambda: self._load_services(active_only)
+        )
+        return [dict(s) for s in services]
+
+    def has_services(self) -> bool:
+        """Da li postoji ijedna aktivna usluga (bez učitavanja kataloga)."""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM services WHERE id = ?", (service_id,))
-        service = cursor.fetchone()
+        cursor.execute("SELECT EXISTS(SELECT 1 FROM services WHERE is_active = 1)")
+        exists = bool(cursor.fetchone()[0])
         conn.close()
+        return exists
+
+    def get_service_by_id(self, service_id: int) -> Optional[Dict]:
+        """Get service by ID (served from the catalog cache)."""
+        service = self._services_by_id().get(service_id)
         return dict(service) if service else None
 
     def update_service(self, service_id: int, **kwargs) -> bool:
@@ -898,6 +1122,7 @@ class AutoServiceDB:
         conn.commit()
         success = cursor.rowcount > 0
         conn.close()
+        self.catalog_cache.invalidate('services')
         return success
 
     def delete_service(self, service_id: int) -> bool:
@@ -908,38 +1133,47 @@ class AutoServiceDB:
         conn.commit()
         success = cursor.rowcount > 0
         conn.close()
+        self.catalog_cache.invalidate('services')
         return success
 
     # ==================== APPOINTMENT METHODS ====================
 
     def create_appointment(self, user_id: int, vehicle_id: int, service_id: int,
                           appointment_date: str, notes: str = "") -> Tuple[bool, str, Optional[int]]:
-        """Create a new appointment."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        """Create a new appointment (price lookup, insert and notification in one commit).
+
+        Inside an outer db.transaction() errors are raised instead of
+        returned, so the outer unit of work rolls back.
+        """
+        nested = self.in_transaction()
         try:
-            # Get service price
-            cursor.execute("SELECT price FROM services WHERE id = ?", (service_id,))
-            service = cursor.fetchone()
-            total_price = service['price'] if service else 0
-            
-            cursor.execute('''
-                INSERT INTO appointments (user_id, vehicle_id, service_id, appointment_date, 
-                                        notes, total_price, status)
-                VALUES (?, ?, ?, ?, ?, ?, 'scheduled')
-            ''', (user_id, vehicle_id, service_id, appointment_date, notes, total_price))
-            
-            appointment_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
-            
-            # Send notification
-            self.send_appointment_notification(user_id, appointment_id, 'created')
-            
+            with self.transaction() as tx:
+                cursor = tx.cursor()
+
+                # Get service price
+                cursor.execute("SELECT price FROM services WHERE id = ?", (service_id,))
+                service = cursor.fetchone()
+                total_price = service['price'] if service else 0
+
+                cursor.execute('''
+                    INSERT INTO appointments (user_id, vehicle_id, service_id, appointment_date, 
+                                            notes, total_price, status)
+                    VALUES (?, ?, ?, ?, ?, ?, 'scheduled')
+                ''', (user_id, vehicle_id, service_id, appointment_date, notes, total_price))
+
+                appointment_id = cursor.lastrowid
+
+                # Send notification
+                self.send_appointment_notification(user_id, appointment_id, 'created')
+                self._publish('appointment_created',
+                              {'appointment_id': appointment_id, 'status': 'scheduled',
+                               'appointment_date': appointment_date},
+                              [user_id], admins=True)
+
             return True, "Termin uspešno kreiran", appointment_id
         except Exception as e:
-            conn.close()
+            if nested or is_busy_error(e):
+                raise
             return False, f"Greška: {str(e)}", None
 
     def get_user_appointments(self, user_id: int, status: str = None) -> List[Dict]:
@@ -1001,37 +1235,292 @@ class AutoServiceDB:
         conn.close()
         return [dict(a) for a in appointments]
 
-    def update_appointment_status(self, appointment_id: int, status: str, 
-                                  technician_notes: str = None) -> bool:
-        """Update appointment status."""
+    def _appointment_filters(self, status: str = None, date_from: str = None,
+                             date_to: str = None, user_id: int = None) -> Tuple[List[str], List]:
+        """WHERE uslovi za listanje termina."""
+        clauses, params = [], []
+        if user_id is not None:
+            clauses.append("a.user_id = ?")
+            params.append(user_id)
+        if status:
+            clauses.append("a.status = ?")
+            params.append(status)
+        if date_from:
+            clauses.append("a.appointment_date >= ?")
+            params.append(date_from)
+        if date_to:
+            op, bound = date_upper_bound(date_to)
+            clauses.append(f"a.appointment_date {op} ?")
+            params.append(bound)
+        return clauses, params
+
+    def get_appointments_page(self, limit: int = None, cursor: str = None,
+                              status: str = None, date_from: str = None,
+                              date_to: str = None, user_id: int = None) -> Dict[str, Any]:
+        """Get one keyset page of appointments ordered by (appointment_date, id) DESC.
+
+        Returns {'items', 'next_cursor', 'has_more'}; pass next_cursor back
+        to get the following page. Cost is O(page) at any depth.
+        """
+        limit = clamp_limit(limit)
+        clauses, params = self._appointment_filters(status, date_from, date_to, user_id)
+        if cursor:
+            last_date, last_id = decode_cursor(cursor)
+            clauses.append("(a.appointment_date, a.id) < (?, ?)")
+            params.extend([last_date, last_id])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        conn = self.get_connection()
+        cursor_ = conn.cursor()
+        cursor_.execute(f"""
+            SELECT a.*, s.name as service_name, v.make, v.model, v.license_plate,
+                   u.full_name as user_name, u.email, u.phone
+            FROM appointments a
+            JOIN services s ON a.service_id = s.id
+            JOIN vehicles v ON a.vehicle_id = v.id
+            JOIN users u ON a.user_id = u.id
+            {where}
+            ORDER BY a.appointment_date DESC, a.id DESC
+            LIMIT ?
+        """, params + [limit + 1])
+        rows = [dict(a) for a in cursor_.fetchall()]
+        conn.close()
+        return build_page(rows, limit, 'appointment_date')
+
+    def count_appointments(self, status: str = None, date_from: str = None,
+                           date_to: str = None, user_id: int = None) -> int:
+        """Count appointments matching the same filters as get_appointments_page."""
+        clauses, params = self._appointment_filters(status, date_from, date_to, user_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
         conn = self.get_connection()
         cursor = conn.cursor()
-        
-        if status == 'completed':
-            cursor.execute('''
-                UPDATE appointments 
-                SET status = ?, technician_notes = ?, completed_at = CURRENT_TIMESTAMP,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            ''', (status, technician_notes, appointment_id))
-        else:
+        cursor.execute(f"SELECT COUNT(*) as count FROM appointments a {where}", params)
+        count = cursor.fetchone()['count']
+        conn.close()
+        return count
+
+    def get_dashboard(self, user_id: int, all_users: bool = False,
+                      upcoming_limit: int = 5) -> Dict[str, Any]:
+        """Sve za kontrolnu tablu u jednoj transakciji (jedna konekcija, jedan snimak).
+
+        Appointment counts and the next appointments cover every user when
+        all_users is True (admin); vehicles and notifications are always the
+        user's own. Statuses are compared lower-cased everywhere, like the
+        rollups, because the desktop writes 'Completed'/'Cancelled'.
+        """
+        today = datetime.now().strftime('%Y-%m-%d')
+        scope, scope_params = ("", []) if all_users else ("AND a.user_id = ?", [user_id])
+
+        with self.transaction(immediate=False) as tx:
+            cursor = tx.cursor()
+            if all_users:
+                # Every appointment: O(days) rollup rows instead of the whole table
+                cursor.execute(f'''
+                    SELECT COALESCE(SUM(r.count), 0) as total,
+                           COALESCE(SUM(CASE WHEN r.status NOT IN ('completed', 'cancelled')
+                                             AND r.day >= ? THEN r.count END), 0) as upcoming,
+                           COALESCE(SUM(CASE WHEN r.status = 'completed' THEN r.count END), 0) as completed
+                    FROM {rollups.TABLE} r
+                ''', [today])
+            else:
+                cursor.execute(f'''
+                    SELECT COUNT(*) as total,
+                           COALESCE(SUM(LOWER(a.status) NOT IN ('completed', 'cancelled')
+                                        AND a.appointment_date >= ?), 0) as upcoming,
+                           COALESCE(SUM(LOWER(a.status) = 'completed'), 0) as completed
+                    FROM appointments a
+                    WHERE 1 = 1 {scope}
+                ''', [today] + scope_params)
+            appointment_counts = dict(cursor.fetchone())
+
+            cursor.execute(f'''
+                SELECT a.*, s.name as service_name, v.make, v.model, v.license_plate
+                FROM appointments a
+                JOIN services s ON a.service_id = s.id
+                JOIN vehicles v ON a.vehicle_id = v.id
+                WHERE a.appointment_date >= ?
+                  AND LOWER(a.status) NOT IN ('completed', 'cancelled') {scope}
+                ORDER BY a.appointment_date, a.id
+                LIMIT ?
+            ''', [today] + scope_params + [upcoming_limit])
+            upcoming = [dict(a) for a in cursor.fetchall()]
+
             cursor.execute('''
-                UPDATE appointments 
-                SET status = ?, technician_notes = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            ''', (status, technician_notes, appointment_id))
-        
+                SELECT COUNT(*) as total, COALESCE(SUM(is_read = 0), 0) as unread
+                FROM notifications WHERE user_id = ?
+            ''', (user_id,))
+            notification_counts = dict(cursor.fetchone())
+
+            vehicles = self.get_user_vehicles(user_id)
+
+        return {
+            'counts': {
+                'appointments': appointment_counts['total'],
+                'upcoming_appointments': appointment_counts['upcoming'],
+                'completed_appointments': appointment_counts['completed'],
+                'vehicles': len(vehicles),
+                'notifications': notification_counts['total'],
+                'unread_notifications': notification_counts['unread'],
+            },
+            'upcoming_appointments': upcoming,
+            'vehicles': vehicles,
+        }
+
+    # Row shape shared by the board snapshot and its deltas
+    _BOARD_SELECT = '''
+        a.*, s.name as service_name, v.make, v.model, v.license_plate,
+        u.full_name as user_name, u.username
+    '''
+    _BOARD_JOINS = '''
+        LEFT JOIN services s ON a.service_id = s.id
+        LEFT JOIN vehicles v ON a.vehicle_id = v.id
+        LEFT JOIN users u ON a.user_id = u.id
+    '''
+
+    def get_board_snapshot(self, status: str = None, date_from: str = None,
+                           date_to: str = None) -> Dict[str, Any]:
+        """Radionička tabla: svi termini sa verzijom + cursor za get_board_changes().
+
+        Each item carries 'version' (seq of its last change, 0 if it has not
+        changed since the change log exists); 'cursor' is where to start
+        asking for deltas.
+        """
+        clauses, params = self._appointment_filters(status, date_from, date_to)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self.transaction(immediate=False) as tx:
+            cursor = tx.cursor()
+            cursor.execute("SELECT COALESCE(MAX(seq), 0) as seq FROM appointment_changes")
+            board_cursor = cursor.fetchone()['seq']
+            cursor.execute(f'''
+                SELECT {self._BOARD_SELECT},
+                       COALESCE((SELECT MAX(c.seq) FROM appointment_changes c
+                                 WHERE c.appointment_id = a.id), 0) as version
+                FROM appointments a
+                {self._BOARD_JOINS}
+                {where}
+                ORDER BY a.appointment_date DESC, a.id DESC
+            ''', params)
+            items = [dict(a) for a in cursor.fetchall()]
+
+        return {'items': items, 'cursor': board_cursor}
+
+    def get_board_cursor(self) -> int:
+        """Posljednji seq u logu promjena termina (0 ako je prazan)."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(MAX(seq), 0) as seq FROM appointment_changes")
+        seq = cursor.fetchone()['seq']
+        conn.close()
+        return seq
+
+    def get_board_changes(self, since: int, limit: int = 500) -> Dict[str, Any]:
+        """Delte radioničke table posle cursora since.
+
+        Several changes of one appointment collapse into one delta carrying
+        the current row (None when deleted), keyed by 'id' and 'version'.
+        'reset' is True when since is older than the kept log (or from a
+        different database); the client must then reload the snapshot.
+        Sees changes from every process, including the desktop app.
+        """
+        limit = max(1, min(int(limit), 2000))
+        with self.transaction(immediate=False) as tx:
+            cursor = tx.cursor()
+            cursor.execute("SELECT MIN(seq) as lo, MAX(seq) as hi FROM appointment_changes")
+            bounds = cursor.fetchone()
+            lo, hi = bounds['lo'], bounds['hi'] or 0
+            if since > hi or (lo is not None and since < lo - 1):
+                return {'changes': [], 'cursor': hi, 'reset': True, 'has_more': False}
+            if since == hi:
+                return {'changes': [], 'cursor': since, 'reset': False, 'has_more': False}
+
+            cursor.execute(f'''
+                WITH changed AS (
+                    SELECT appointment_id, MAX(seq) as version
+                    FROM appointment_changes
+                    WHERE seq > ?
+                    GROUP BY appointment_id
+                    ORDER BY version
+                    LIMIT ?
+                )
+                SELECT ch.appointment_id as change_id, ch.version as change_version,
+                       c.change as change_kind, {self._BOARD_SELECT}
+                FROM changed ch
+                JOIN appointment_changes c ON c.seq = ch.version
+                LEFT JOIN appointments a ON a.id = ch.appointment_id
+                {self._BOARD_JOINS}
+                ORDER BY ch.version
+            ''', (since, limit))
+            rows = cursor.fetchall()
+
+        changes = []
+        for row in rows:
+            row = dict(row)
+            change = {
+                'id': row.pop('change_id'),
+                'version': row.pop('change_version'),
+                'change': row.pop('change_kind'),
+            }
+            if row['id'] is None:
+                change['change'] = 'deleted'
+                change['appointment'] = None
+            else:
+                row['version'] = change['version']
+                change['appointment'] = row
+            changes.append(change)
+
+        return {
+            'changes': changes,
+            'cursor': changes[-1]['version'] if changes else since,
+            'reset': False,
+            'has_more': len(changes) == limit,
+        }
+
+    def prune_appointment_changes(self, keep: int = 50000) -> int:
+        """Obriši najstarije zapise iz loga promjena (zadrži posljednjih keep)."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            DELETE FROM appointment_changes
+            WHERE seq <= (SELECT COALESCE(MAX(seq), 0) FROM appointment_changes) - ?
+        ''', (keep,))
+        removed = cursor.rowcount
         conn.commit()
-        success = cursor.rowcount > 0
-        
-        if success:
-            # Get user_id for notification
-            cursor.execute("SELECT user_id FROM appointments WHERE id = ?", (appointment_id,))
-            result = cursor.fetchone()
-            if result:
-                self.send_appointment_notification(result['user_id'], appointment_id, status)
-        
         conn.close()
+        return removed
+
+    def update_appointment_status(self, appointment_id: int, status: str,
+                                  technician_notes: str = None) -> bool:
+        """Update appointment status (update and notification in one commit)."""
+        with self.transaction() as tx:
+            cursor = tx.cursor()
+
+            if status == 'completed':
+                cursor.execute('''
+                    UPDATE appointments 
+                    SET status = ?, technician_notes = ?, completed_at = CURRENT_TIMESTAMP,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (status, technician_notes, appointment_id))
+            else:
+                cursor.execute('''
+                    UPDATE appointments 
+                    SET status = ?, technician_notes = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (status, technician_notes, appointment_id))
+
+            success = cursor.rowcount > 0
+
+            if success:
+                # Get user_id for notification
+                cursor.execute("SELECT user_id FROM appointments WHERE id = ?", (appointment_id,))
+                result = cursor.fetchone()
+                if result:
+                    self.send_appointment_notification(result['user_id'], appointment_id, status)
+                    self._publish('appointment_status',
+                                  {'appointment_id': appointment_id, 'status': status},
+                                  [result['user_id']], admins=True)
+
         return success
 
     def delete_appointment(self, appointment_id: int) -> bool:
@@ -1049,7 +1538,8 @@ class AutoServiceDB:
     def create_notification(self, user_id: Optional[int], title: str, message: str,
                           notification_type: str = 'info', 
                           related_appointment_id: int = None) -> Tuple[bool, Optional[int]]:
-        """Create a notification."""
+        """Create a notification (raises instead of returning False inside db.transaction())."""
+        nested = self.in_transaction()
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -1062,9 +1552,16 @@ class AutoServiceDB:
             notification_id = cursor.lastrowid
             conn.commit()
             conn.close()
+            self._publish('notification', {
+                'id': notification_id, 'title': title, 'message': message,
+                'notification_type': notification_type,
+                'related_appointment_id': related_appointment_id,
+            }, None if user_id is None else [user_id])
             return True, notification_id
-        except Exception:
+        except Exception as e:
             conn.close()
+            if nested or is_busy_error(e):
+                raise
             return False, None
 
     def get_user_notifications(self, user_id: int, unread_only: bool = False) -> List[Dict]:
@@ -1099,6 +1596,38 @@ class AutoServiceDB:
         conn.close()
         return success
 
+    def get_notifications_page(self, user_id: int, limit: int = None, cursor: str = None,
+                               unread_only: bool = False, since: str = None,
+                               until: str = None) -> Dict[str, Any]:
+        """Get one keyset page of a user's notifications ordered by (sent_at, id) DESC."""
+        limit = clamp_limit(limit)
+        clauses, params = ["user_id = ?"], [user_id]
+        if unread_only:
+            clauses.append("is_read = 0")
+        if since:
+            clauses.append("sent_at >= ?")
+            params.append(since)
+        if until:
+            op, bound = date_upper_bound(until)
+            clauses.append(f"sent_at {op} ?")
+            params.append(bound)
+        if cursor:
+            last_sent, last_id = decode_cursor(cursor)
+            clauses.append("(sent_at, id) < (?, ?)")
+            params.extend([last_sent, last_id])
+
+        conn = self.get_connection()
+        cursor_ = conn.cursor()
+        cursor_.execute(f"""
+            SELECT * FROM notifications
+            WHERE {' AND '.join(clauses)}
+            ORDER BY sent_at DESC, id DESC
+            LIMIT ?
+        """, params + [limit + 1])
+        rows = [dict(n) for n in cursor_.fetchall()]
+        conn.close()
+        return build_page(rows, limit, 'sent_at')
+
     def mark_all_notifications_read(self, user_id: int) -> bool:
         """Mark all notifications as read for a user."""
         conn = self.get_connection()
@@ -1127,6 +1656,15 @@ class AutoServiceDB:
         conn.close()
         return result['count'] if result else 0
 
+    def get_notification_count(self, user_id: int) -> int:
+        """Get total count of a user's notifications."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) as count FROM notifications WHERE user_id = ?", (user_id,))
+        result = cursor.fetchone()
+        conn.close()
+        return result['count'] if result else 0
+
     def send_appointment_notification(self, user_id: int, appointment_id: int, action: str):
         """Send notification about appointment."""
         messages = {
@@ -1141,40 +1679,117 @@ class AutoServiceDB:
         title, message = messages.get(action, ('Obaveštenje', 'Ažuriranje termina.'))
         self.create_notification(user_id, title, message, 'appointment', appointment_id)
 
-    def broadcast_notification(self, title: str, message: str, 
-                              notification_type: str = 'info') -> int:
-        """Send notification to all users."""
+    def broadcast_notification(self, title: str, message: str,
+                               notification_type: str = 'info',
+                               user_ids: List[int] = None) -> int:
+        """Send notification to all active users (or the given ids) in one transaction."""
         conn = self.get_connection()
         cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE is_active = 1")
-        users = cursor.fetchall()
-        
-        count = 0
-        for user in users:
-            success, _ = self.create_notification(user['id'], title, message, notification_type)
-            if success:
-                count += 1
-        
+
+        if user_ids is None:
+            cursor.execute('''
+                INSERT INTO notifications (user_id, title, message, notification_type)
+                SELECT id, ?, ?, ? FROM users WHERE is_active = 1
+            ''', (title, message, notification_type))
+        else:
+            cursor.executemany('''
+                INSERT INTO notifications (user_id, title, message, notification_type)
+                VALUES (?, ?, ?, ?)
+            ''', [(user_id, title, message, notification_type) for user_id in user_ids])
+
+        count = cursor.rowcount
+        conn.commit()
         conn.close()
+        if count:
+            self._publish('notification', {
+                'title': title, 'message': message,
+                'notification_type': notification_type, 'broadcast': True,
+            }, user_ids)
         return count
 
+    def broadcast_notification_batched(self, title: str, message: str,
+                                       notification_type: str = 'info',
+                                       batch_size: int = 500,
+                                       progress=None) -> int:
+        """Broadcast in batches, one short transaction per batch.
+
+        Other writers can interleave between batches, and progress(done, total)
+        is called after each one. Used by the async broadcast job.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM users WHERE is_active = 1 ORDER BY id")
+        user_ids = [row['id'] for row in cursor.fetchall()]
+        conn.close()
+
+        total = len(user_ids)
+        done = 0
+        if progress:
+            progress(done, total)
+        for start in range(0, total, batch_size):
+            done += self.broadcast_notification(title, message, notification_type,
+                                                user_ids=user_ids[start:start + batch_size])
+            if progress:
+                progress(done, total)
+        return done
+
     # ==================== SETTINGS METHODS ====================
 
-    def get_setting(self, key: str, default: Any = None) -> Any:
-        """Get a setting value."""
+    def _load_settings(self) -> Dict[str, Any]:
+        """Učitaj i dekodiraj sva podešavanja iz baze (bez keša)."""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT value FROM settings WHERE key = ?", (key,))
-        result = cursor.fetchone()
+        cursor.execute("SELECT key, value FROM settings")
+        settings = cursor.fetchall()
         conn.close()
         
-        if result:
+        result = {}
+        for setting in settings:
             try:
-                return json.loads(result['value'])
+                result[setting['key']] = json.loads(setting['value'])
             except:
-                return result['value']
-        return default
+                result[setting['key']] = setting['value']
+        
+        return result
+
+    def _settings(self) -> Dict[str, Any]:
+        """Dekodirana podešavanja iz keša (dijeljena, ne mijenjati)."""
+        return self.catalog_cache.get(('settings',), 'settings', self._load_settings)
+
+    def get_setting(self, key: str, default: Any = None) -> Any:
+        """Get a setting value."""
+        value = self._settings().get(key, default)
+        return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+    def get_setting_str(self, key: str, default: str = "") -> str:
+        """Get a setting as text."""
+        value = self._settings().get(key)
+        if value is None:
+            return default
+        return value if isinstance(value, str) else json.dumps(value)
+
+    def get_setting_int(self, key: str, default: int = 0) -> int:
+        """Get a setting as an integer (default if missing or not a number)."""
+        try:
+            return int(self._settings().get(key, default))
+        except (TypeError, ValueError):
+            return default
+
+    def get_setting_float(self, key: str, default: float = 0.0) -> float:
+        """Get a setting as a float (default if missing or not a number)."""
+        try:
+            return float(self._settings().get(key, default))
+        except (TypeError, ValueError):
+            return default
+
+    def get_setting_bool(self, key: str, default: bool = False) -> bool:
+        """Get a setting as a boolean ('1', 'true', 'da', 'on' ... count as True)."""
+        value = self._settings().get(key)
+        if value is None:
+            return default
+        if isinstance(value, str):
+            return value.strip().lower() in ('1', 'true', 'yes', 'da', 'on')
+        return bool(value)
 
     def set_setting(self, key: str, value: Any, description: str = None) -> bool:
         """Set a setting value."""
@@ -1200,29 +1815,135 @@ class AutoServiceDB:
         
         conn.commit()
         conn.close()
+        self.catalog_cache.invalidate('settings')
         return True
 
     def get_all_settings(self) -> Dict[str, Any]:
-        """Get all settings."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT key, value FROM settings")
-        settings = cursor.fetchall()
-        conn.close()
-        
-        result = {}
-        for setting in settings:
+        """Get all settings (decoded, served from the cache)."""
+        return copy.deepcopy(self._settings())
+
+    def get_table_versions(self, *tables: str) -> Tuple:
+        """Verzije tabela iz table_versions (mijenjaju se pri svakoj izmjeni, iz bilo kog procesa)."""
+        return self.catalog_cache.table_versions(tables)
+
+    # ==================== REPORT METHODS ====================
+
+    # Period buckets over the rollup day ('YYYY-MM-DD'); weeks start on Monday
+    _REPORT_PERIODS = {
+        'day': "r.day",
+        'week': "date(r.day, '-6 days', 'weekday 1')",
+        'month': "substr(r.day, 1, 7)",
+    }
+
+    def _report_where(self, date_from: str = None, date_to: str = None) -> Tuple[str, List]:
+        clauses, params = self._appointment_filters(date_from=date_from, date_to=date_to)
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def _rollup_where(self, date_from: str = None, date_to: str = None) -> Tuple[str, List]:
+        """WHERE za dnevne zbirove; granice su cijeli dani (YYYY-MM-DD), obje uključene."""
+        clauses, params = [], []
+        for column_op, value in (("r.day >= ?", date_from), ("r.day <= ?", date_to)):
+            if not value:
+                continue
             try:
-                result[setting['key']] = json.loads(setting['value'])
-            except:
-                result[setting['key']] = setting['value']
-        
-        return result
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                raise ValueError(f"Izvještaji rade sa cijelim danima (YYYY-MM-DD), ne: {value}")
+            clauses.append(column_op)
+            params.append(value)
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def get_appointment_totals(self, date_from: str = None, date_to: str = None,
+                               period: str = 'day') -> List[Dict]:
+        """Broj termina i iznos po periodu (day/week/month) i statusu.
+
+        Reads the daily rollups, so a year costs a few thousand rows however
+        many appointments there are. Status is lower-cased, the Tk app and
+        the API do not agree on case.
+        """
+        if period not in self._REPORT_PERIODS:
+            raise ValueError(f"Nepoznat period: {period}")
+        where, params = self._rollup_where(date_from, date_to)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT {self._REPORT_PERIODS[period]} as period, r.status,
+                   SUM(r.count) as count,
+                   ROUND(SUM(r.revenue), 2) as revenue
+            FROM {rollups.TABLE} r
+            {where}
+            GROUP BY 1, 2
+            ORDER BY 1, 2
+        ''', params)
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(r) for r in rows]
+
+    def get_service_totals(self, date_from: str = None, date_to: str = None) -> List[Dict]:
+        """Broj termina, iznos i zakazane minute po usluzi i statusu (iz dnevnih zbirova)."""
+        where, params = self._rollup_where(date_from, date_to)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        # Group first, then look up the (few) services
+        cursor.execute(f'''
+            SELECT t.service_id, s.name as service_name, t.status, t.count, t.revenue, t.minutes
+            FROM (
+                SELECT r.service_id, r.status, SUM(r.count) as count,
+                       ROUND(SUM(r.revenue), 2) as revenue, SUM(r.minutes) as minutes
+                FROM {rollups.TABLE} r
+                {where}
+                GROUP BY 1, 2
+            ) t
+            LEFT JOIN services s ON s.id = t.service_id
+            ORDER BY t.service_id, t.status
+        ''', params)
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(r) for r in rows]
+
+    def rebuild_rollups(self) -> int:
+        """Ponovo izgradi dnevne zbirove iz tabele termina; vraća broj redova."""
+        with self.transaction() as tx:
+            rollups.rebuild_rollups(tx)
+            count = tx.execute(f"SELECT COUNT(*) FROM {rollups.TABLE}").fetchone()[0]
+        return count
+
+    def get_customer_totals(self, date_from: str = None, date_to: str = None,
+                            limit: int = None) -> List[Dict]:
+        """Aktivnost klijenata: termini, završeni/otkazani, prihod i posljednji termin."""
+        where, params = self._report_where(date_from, date_to)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT t.*, u.full_name, u.username, u.email
+            FROM (
+                SELECT a.user_id, COUNT(*) as count,
+                       SUM(LOWER(a.status) = 'completed') as completed,
+                       SUM(LOWER(a.status) = 'cancelled') as cancelled,
+                       COALESCE(SUM(CASE WHEN LOWER(a.status) = 'completed'
+                                         THEN a.total_price END), 0) as revenue,
+                       MAX(a.appointment_date) as last_appointment
+                FROM appointments a
+                {where}
+                GROUP BY a.user_id
+            ) t
+            LEFT JOIN users u ON u.id = t.user_id
+            ORDER BY t.revenue DESC, t.count DESC, t.user_id
+            LIMIT ?
+        ''', params + [limit if limit is not None else -1])
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(r) for r in rows]
 
     # ==================== VEHICLE TYPES METHODS ====================
 
     def get_all_vehicle_types(self) -> List[Dict]:
-        """Vrati sve tipove vozila."""
+        """Vrati sve tipove vozila (iz keša kataloga)."""
+        types = self.catalog_cache.get(('vehicle_types',), 'vehicle_types', self._load_vehicle_types)
+        return [dict(t) for t in types]
+
+    def _load_vehicle_types(self) -> List[Dict]:
+        """Učitaj tipove vozila iz baze (bez keša)."""
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute("""
@@ -1249,6 +1970,7 @@ class AutoServiceDB:
             type_id = cursor.lastrowid
             conn.commit()
             conn.close()
+            self.catalog_cache.invalidate('vehicle_types')
             return True, "Tip vozila kreiran uspješno", type_id
         except sqlite3.IntegrityError:
             conn.close()
@@ -1278,6 +2000,7 @@ class AutoServiceDB:
             cursor.execute("DELETE FROM vehicle_types WHERE id = ?", (type_id,))
             conn.commit()
             conn.close()
+            self.catalog_cache.invalidate('vehicle_types')
             return True, "Tip vozila obrisan"
         except Exception as e:
             conn.close()
@@ -1285,78 +2008,179 @@ class AutoServiceDB:
 
     # ==================== SEARCH METHODS ====================
 
-    def search_appointments(self, query: str) -> List[Dict]:
+    def rebuild_search_index(self) -> bool:
+        """Ponovo izgradi FTS indekse iz osnovnih tabela."""
+        conn = self.get_connection()
+        if not search_index.search_index_exists(conn):
+            search_index.create_search_index(conn)
+        else:
+            search_index.rebuild_search_index(conn)
+        conn.commit()
+        self.fts_enabled = search_index.search_index_exists(conn)
+        conn.close()
+        return self.fts_enabled
+
+    def _snippet(self, table: str) -> str:
+        """SQL izraz za isječak sa označenim pogocima."""
+        return (f"snippet({table}, -1, '{search_index.HIGHLIGHT_OPEN}', "
+                f"'{search_index.HIGHLIGHT_CLOSE}', '…', 12)")
+
+    def search_appointments(self, query: str, limit: int = 100,
+                            user_id: int = None) -> List[Dict]:
         """Pretraži termine po vozilu, useru ili statusu."""
         conn = self.get_connection()
         cursor = conn.cursor()
-        
-        search_pattern = f"%{query}%"
-        cursor.execute("""
-            SELECT a.*, u.username, u.full_name, v.make, v.model, v.license_plate, s.name as service_name
-            FROM appointments a
-            JOIN users u ON a.user_id = u.id
-            JOIN vehicles v ON a.vehicle_id = v.id
-            JOIN services s ON a.service_id = s.id
-            WHERE v.license_plate LIKE ? OR v.make LIKE ? OR v.model LIKE ?
-               OR u.username LIKE ? OR u.full_name LIKE ?
-               OR a.status LIKE ? OR s.name LIKE ?
-            ORDER BY a.appointment_date DESC
-            LIMIT 100
-        """, (search_pattern, search_pattern, search_pattern, search_pattern, search_pattern, search_pattern, search_pattern))
-        
+
+        if self.fts_enabled:
+            match = search_index.build_match_query(query)
+            if not match:
+                conn.close()
+                return []
+            user_filter = "AND a.user_id = ?" if user_id is not None else ""
+            params = [match] + ([user_id] if user_id is not None else []) + [limit]
+            cursor.execute(f"""
+                SELECT a.*, u.username, u.full_name, v.make, v.model, v.license_plate,
+                       s.name as service_name, {self._snippet('appointments_fts')} as snippet,
+                       appointments_fts.rank as rank
+                FROM appointments_fts
+                JOIN appointments a ON a.id = appointments_fts.rowid
+                JOIN users u ON a.user_id = u.id
+                JOIN vehicles v ON a.vehicle_id = v.id
+                JOIN services s ON a.service_id = s.id
+                WHERE appointments_fts MATCH ? {user_filter}
+                ORDER BY appointments_fts.rank, a.appointment_date DESC
+                LIMIT ?
+            """, params)
+        else:
+            search_pattern = f"%{query}%"
+            user_filter = "AND a.user_id = ?" if user_id is not None else ""
+            params = [search_pattern] * 7 + ([user_id] if user_id is not None else []) + [limit]
+            cursor.execute(f"""
+                SELECT a.*, u.username, u.full_name, v.make, v.model, v.license_plate, s.name as service_name
+                FROM appointments a
+                JOIN users u ON a.user_id = u.id
+                JOIN vehicles v ON a.vehicle_id = v.id
+                JOIN services s ON a.service_id = s.id
+                WHERE (v.license_plate LIKE ? OR v.make LIKE ? OR v.model LIKE ?
+                   OR u.username LIKE ? OR u.full_name LIKE ?
+                   OR a.status LIKE ? OR s.name LIKE ?) {user_filter}
+                ORDER BY a.appointment_date DESC
+                LIMIT ?
+            """, params)
+
         results = cursor.fetchall()
         conn.close()
         return [dict(r) for r in results]
 
-    def search_users(self, query: str) -> List[Dict]:
+    def search_users(self, query: str, limit: int = 50) -> List[Dict]:
         """Pretraži korisnike po imenu, emailu ili usernameu."""
         conn = self.get_connection()
         cursor = conn.cursor()
-        
-        search_pattern = f"%{query}%"
-        cursor.execute("""
-            SELECT id, username, email, full_name, phone, role, created_at
-            FROM users
-            WHERE username LIKE ? OR email LIKE ? OR full_name LIKE ? OR phone LIKE ?
-            LIMIT 50
-        """, (search_pattern, search_pattern, search_pattern, search_pattern))
-        
+
+        if self.fts_enabled:
+            match = search_index.build_match_query(query)
+            if not match:
+                conn.close()
+                return []
+            cursor.execute(f"""
+                SELECT u.id, u.username, u.email, u.full_name, u.phone, u.role, u.created_at,
+                       {self._snippet('users_fts')} as snippet, users_fts.rank as rank
+                FROM users_fts
+                JOIN users u ON u.id = users_fts.rowid
+                WHERE users_fts MATCH ?
+                ORDER BY users_fts.rank
+                LIMIT ?
+            """, (match, limit))
+        else:
+            search_pattern = f"%{query}%"
+            cursor.execute("""
+                SELECT id, username, email, full_name, phone, role, created_at
+                FROM users
+                WHERE username LIKE ? OR email LIKE ? OR full_name LIKE ? OR phone LIKE ?
+                LIMIT ?
+            """, (search_pattern, search_pattern, search_pattern, search_pattern, limit))
+
         results = cursor.fetchall()
         conn.close()
         return [dict(r) for r in results]
 
-    def search_services(self, query: str) -> List[Dict]:
+    def search_services(self, query: str, limit: int = 50) -> List[Dict]:
         """Pretraži usluge po nazivu ili kategoriji."""
         conn = self.get_connection()
         cursor = conn.cursor()
-        
-        search_pattern = f"%{query}%"
-        cursor.execute("""
-            SELECT * FROM services
-            WHERE name LIKE ? OR category LIKE ? OR description LIKE ?
-            ORDER BY name
-            LIMIT 50
-        """, (search_pattern, search_pattern, search_pattern))
-        
+
+        if self.fts_enabled:
+            match = search_index.build_match_query(query)
+            if not match:
+                conn.close()
+                return []
+            # Pogodak u nazivu vrijedi više od pogotka u opisu
+            cursor.execute(f"""
+                SELECT s.*, {self._snippet('services_fts')} as snippet,
+                       bm25(services_fts, 10.0, 5.0, 1.0) as rank
+                FROM services_fts
+                JOIN services s ON s.id = services_fts.rowid
+                WHERE services_fts MATCH ?
+                ORDER BY rank, s.name
+                LIMIT ?
+            """, (match, limit))
+        else:
+            search_pattern = f"%{query}%"
+            cursor.execute("""
+                SELECT * FROM services
+                WHERE name LIKE ? OR category LIKE ? OR description LIKE ?
+                ORDER BY name
+                LIMIT ?
+            """, (search_pattern, search_pattern, search_pattern, limit))
+
         results = cursor.fetchall()
         conn.close()
         return [dict(r) for r in results]
 
-    def search_vehicles(self, query: str) -> List[Dict]:
+    def search_vehicles(self, query: str, limit: int = 50, user_id: int = None) -> List[Dict]:
         """Pretraži vozila po registraciji, marki ili modelu."""
         conn = self.get_connection()
         cursor = conn.cursor()
-        
-        search_pattern = f"%{query}%"
-        cursor.execute("""
-            SELECT v.*, u.username, u.full_name
-            FROM vehicles v
-            JOIN users u ON v.user_id = u.id
-            WHERE v.license_plate LIKE ? OR v.make LIKE ? OR v.model LIKE ? OR v.vin LIKE ?
-            ORDER BY v.license_plate
-            LIMIT 50
-        """, (search_pattern, search_pattern, search_pattern, search_pattern))
-        
+
+        if self.fts_enabled:
+            match = search_index.build_match_query(query)
+            if not match:
+                conn.close()
+                return []
+            user_filter = "AND v.user_id = ?" if user_id is not None else ""
+            params = [match] + ([user_id] if user_id is not None else []) + [limit]
+            cursor.execute(f"""
+                SELECT v.*, u.username, u.full_name,
+                       {self._snippet('vehicles_fts')} as snippet, vehicles_fts.rank as rank
+                FROM vehicles_fts
+                JOIN vehicles v ON v.id = vehicles_fts.rowid
+                JOIN users u ON v.user_id = u.id
+                WHERE vehicles_fts MATCH ? {user_filter}
+                ORDER BY vehicles_fts.rank, v.license_plate
+                LIMIT ?
+            """, params)
+        else:
+            search_pattern = f"%{query}%"
+            user_filter = "AND v.user_id = ?" if user_id is not None else ""
+            params = [search_pattern] * 4 + ([user_id] if user_id is not None else []) + [limit]
+            cursor.execute(f"""
+                SELECT v.*, u.username, u.full_name
+                FROM vehicles v
+                JOIN users u ON v.user_id = u.id
+                WHERE (v.license_plate LIKE ? OR v.make LIKE ? OR v.model LIKE ? OR v.vin LIKE ?) {user_filter}
+                ORDER BY v.license_plate
+                LIMIT ?
+            """, params)
+
         results = cursor.fetchall()
         conn.close()
         return [dict(r) for r in results]
+
+# Every public DB method restarts from the top when SQLite reports BUSY
+# (batched broadcast commits per batch, so each batch retries on its own)
+_NO_RETRY = {'get_connection', 'pool_stats', 'contention_stats', 'cache_stats', 'event_stats',
+             'slow_query_stats', 'close',
+             'broadcast_notification_batched', 'transaction', 'in_transaction'}
+for _name, _method in list(vars(AutoServiceDB).items()):
+    if callable(_method) and not _name.startswith('_') and _name not in _NO_RETRY:
+        setattr(AutoServiceDB, _name, retry_on_busy(_method))
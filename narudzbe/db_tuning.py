@@ -0,0 +1,169 @@
+"""
+Auto Servis Pro - SQLite tuning
+PRAGMA performance profiles and SQLITE_BUSY retry with backoff
+"""
+
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+from typing import Dict, Any, Union
+
+# Named performance profiles. 'balanced' lets the Tk desktop app and the
+# API server share one autoservice.db: WAL lets readers run alongside a
+# writer, synchronous=NORMAL is durable in WAL mode except on power loss.
+PROFILES = {
+    'legacy': {
+        'busy_retries': 0,
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'cache_size': -16000,       # negative = KiB, so 16 MB
+        'mmap_size': 64 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_retries': 5,
+        'busy_backoff': 0.05,
+    },
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'busy_timeout': 10000,
+        'cache_size': -8000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_retries': 8,
+        'busy_backoff': 0.1,
+    },
+}
+
+DEFAULT_PROFILE = 'balanced'
+
+# Order matters: busy_timeout first so switching journal_mode waits for locks
+PRAGMA_ORDER = ('busy_timeout', 'journal_mode', 'synchronous', 'cache_size',
+                'mmap_size', 'temp_store')
+
+
+def resolve_profile(profile: Union[str, Dict[str, Any], None]) -> Dict[str, Any]:
+    """Turn a profile name or dict of overrides into a full profile dict."""
+    if profile is None:
+        profile = DEFAULT_PROFILE
+    if isinstance(profile, str):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown database profile '{profile}' "
+                             f"(available: {', '.join(PROFILES)})")
+        return dict(PROFILES[profile])
+    resolved = dict(PROFILES[profile.get('base', DEFAULT_PROFILE)])
+    resolved.update({k: v for k, v in profile.items() if k != 'base'})
+    return resolved
+
+
+def apply_pragmas(conn: sqlite3.Connection, profile: Dict[str, Any]):
+    """Apply the profile's PRAGMAs to a freshly opened connection."""
+    for name in PRAGMA_ORDER:
+        if name in profile and profile[name] is not None:
+            value = profile[name]
+            if isinstance(value, str) and not value.isalnum():
+                raise ValueError(f"Invalid value for PRAGMA {name}: {value!r}")
+            conn.execute(f"PRAGMA {name} = {value}").fetchall()
+
+
+def is_busy_error(error: Exception) -> bool:
+    """True for SQLITE_BUSY / SQLITE_LOCKED style errors."""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+class ContentionStats:
+    """Thread-safe counters for lock contention seen by AutoServiceDB."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.busy_errors = 0
+        self.retries = 0
+        self.recovered = 0
+        self.failed = 0
+        self.backoff_total = 0.0
+        self.last_busy_at = None
+        self.by_method = {}
+
+    def record_busy(self, method: str):
+        with self._lock:
+            self.busy_errors += 1
+            self.last_busy_at = datetime.now().isoformat()
+            self.by_method[method] = self.by_method.get(method, 0) + 1
+
+    def record_retry(self, delay: float):
+        with self._lock:
+            self.retries += 1
+            self.backoff_total += delay
+
+    def record_outcome(self, recovered: bool):
+        with self._lock:
+            if recovered:
+                self.recovered += 1
+            else:
+                self.failed += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'busy_errors': self.busy_errors,
+                'retries': self.retries,
+                'recovered': self.recovered,
+                'failed': self.failed,
+                'backoff_total_ms': round(self.backoff_total * 1000, 3),
+                'last_busy_at': self.last_busy_at,
+                'by_method': dict(self.by_method),
+            }
+
+
+_retry_state = threading.local()
+
+
+def retry_on_busy(method):
+    """Retry an AutoServiceDB method with exponential backoff on SQLITE_BUSY.
+
+    Only the outermost call on a thread retries; nested calls (a method that
+    calls another method) and calls inside db.transaction() let the error
+    bubble up so the whole unit of work restarts from the top.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if getattr(_retry_state, 'active', False) or self.in_transaction():
+            return method(self, *args, **kwargs)
+
+        profile = self.profile
+        attempts = int(profile.get('busy_retries', 0))
+        backoff = float(profile.get('busy_backoff', 0.05))
+        busy_seen = False
+
+        _retry_state.active = True
+        try:
+            for attempt in range(attempts + 1):
+                try:
+                    result = method(self, *args, **kwargs)
+                except sqlite3.OperationalError as e:
+                    if not is_busy_error(e):
+                        raise
+                    busy_seen = True
+                    self.contention.record_busy(method.__name__)
+                    if attempt >= attempts:
+                        self.contention.record_outcome(False)
+                        raise
+                    delay = min(backoff * (2 ** attempt), 2.0) * (0.5 + random.random())
+                    self.contention.record_retry(delay)
+                    time.sleep(delay)
+                    continue
+                if busy_seen:
+                    self.contention.record_outcome(True)
+                return result
+        finally:
+            _retry_state.active = False
+
+    return wrapper
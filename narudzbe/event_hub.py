@@ -0,0 +1,173 @@
+"""
+Auto Servis Pro - Event hub
+In-process pub/sub for live notifications and appointment changes (SSE)
+"""
+
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Iterable, Iterator, Optional
+
+
+class Event:
+    """One published event; data is already JSON-encoded for the wire."""
+
+    __slots__ = ('id', 'event', 'data', 'user_ids', 'admins')
+
+    def __init__(self, event_id: int, event: str, data: str, user_ids, admins: bool):
+        self.id = event_id
+        self.event = event
+        self.data = data
+        self.user_ids = user_ids
+        self.admins = admins
+
+    def visible_to(self, user_id: int, is_admin: bool) -> bool:
+        if self.user_ids is None:
+            return True
+        return user_id in self.user_ids or (self.admins and is_admin)
+
+    def to_sse(self) -> str:
+        return f"id: {self.id}\nevent: {self.event}\ndata: {self.data}\n\n"
+
+
+# Sent instead of a replay when Last-Event-ID is older than the history
+RESYNC = 'resync'
+
+
+class EventHub:
+    """Ring buffer of recent events plus one condition variable.
+
+    Subscribers keep nothing but the id of the last event they have seen,
+    so an idle subscriber costs one blocked waiter and no queue; publish()
+    is O(1) and wakes them all. The buffer doubles as the replay log for
+    ``Last-Event-ID`` resume.
+
+    Event ids start at the current time in milliseconds, so they keep
+    increasing across server restarts and a stale Last-Event-ID from
+    before a restart is detected as a gap (resync) instead of silently
+    skipping events.
+    """
+
+    def __init__(self, history: int = 1000):
+        self._events = deque(maxlen=history)
+        self._cond = threading.Condition()
+        self._last_id = int(time.time() * 1000)
+        self._wakers = []
+        self.published = 0
+        self.subscribers = 0
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def publish(self, event: str, data: Any, user_ids: Optional[Iterable[int]] = None,
+                admins: bool = False) -> int:
+        """Publish to user_ids (None = everyone); admins=True also reaches every admin."""
+        payload = json.dumps(data, default=str, ensure_ascii=False)
+        audience = None if user_ids is None else frozenset(user_ids)
+        with self._cond:
+            self._last_id += 1
+            self._events.append(Event(self._last_id, event, payload, audience, admins))
+            self.published += 1
+            self._cond.notify_all()
+            event_id = self._last_id
+            wakers = list(self._wakers)
+        for waker in wakers:
+            waker()
+        return event_id
+
+    def add_waker(self, waker):
+        """Call waker() after every publish (from the publishing thread).
+
+        Lets an asyncio loop wait for events without blocking a thread per
+        subscriber; the waker must be thread-safe and quick.
+        """
+        with self._cond:
+            self._wakers.append(waker)
+
+    def remove_waker(self, waker):
+        with self._cond:
+            if waker in self._wakers:
+                self._wakers.remove(waker)
+
+    def _after(self, last_seen: int) -> list:
+        """Events newer than last_seen (caller holds the lock)."""
+        if not self._events or self._events[-1].id <= last_seen:
+            return []
+        start = max(0, last_seen - self._events[0].id + 1)
+        return list(itertools.islice(self._events, start, None))
+
+    def events_after(self, last_seen: int) -> list:
+        """Events newer than last_seen, oldest first."""
+        with self._cond:
+            return self._after(last_seen)
+
+    def start_position(self, last_event_id: int = None):
+        """(last_seen, resync) for a new subscriber.
+
+        Without last_event_id the subscriber starts at the newest event.
+        resync is True when last_event_id can no longer be replayed.
+        """
+        with self._cond:
+            if last_event_id is None:
+                return self._last_id, False
+            oldest = self._events[0].id if self._events else self._last_id + 1
+            if oldest - 1 <= last_event_id <= self._last_id:
+                return last_event_id, False
+            return self._last_id, True
+
+    def listen(self, user_id: int, is_admin: bool = False, last_event_id: int = None,
+               keepalive: float = 15.0, stop: threading.Event = None) -> Iterator[Optional[Event]]:
+        """Yield events visible to the user as they are published.
+
+        Yields None every ``keepalive`` seconds of silence (send a comment so
+        dead connections are noticed), and the string RESYNC first if
+        last_event_id is too old to replay. Ends when ``stop`` is set.
+        """
+        last_seen, resync = self.start_position(last_event_id)
+        self.subscriber_joined()
+        try:
+            if resync:
+                yield RESYNC
+            while stop is None or not stop.is_set():
+                with self._cond:
+                    events = self._after(last_seen)
+                    if not events:
+                        self._cond.wait(keepalive)
+                        events = self._after(last_seen)
+                if not events:
+                    yield None
+                    continue
+                last_seen = events[-1].id
+                for event in events:
+                    if event.visible_to(user_id, is_admin):
+                        yield event
+        finally:
+            self.subscriber_left()
+
+    def wake_all(self):
+        """Wake every listener (used on shutdown together with their stop event)."""
+        with self._cond:
+            self._cond.notify_all()
+            wakers = list(self._wakers)
+        for waker in wakers:
+            waker()
+
+    def subscriber_joined(self):
+        with self._cond:
+            self.subscribers += 1
+
+    def subscriber_left(self):
+        with self._cond:
+            self.subscribers -= 1
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'subscribers': self.subscribers,
+                'published': self.published,
+                'buffered': len(self._events),
+                'last_id': self._last_id,
+            }
@@ -0,0 +1,58 @@
+"""
+Auto Servis Pro - HTTP conditional caching
+Strong ETags from table version counters, 304 answers before any work is done
+"""
+
+import hashlib
+from functools import wraps
+from typing import Iterable
+
+from flask import request, make_response
+
+# Cache-Control policies. Both force revalidation (the admin panel must
+# see its own edits at once); the win is the bodyless 304 on a match.
+POLICY_PUBLIC = 'public, no-cache'     # same body for everyone: services, settings
+POLICY_PRIVATE = 'private, no-cache'   # per-user data, never in shared caches
+
+
+def compute_etag(versions: Iterable, *scope) -> str:
+    """Strong ETag for a view: table versions + whatever else shapes the body."""
+    raw = '|'.join(str(part) for part in (*versions, *scope))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:24]
+
+
+def conditional(db, tables: Iterable[str], cache_control: str = POLICY_PRIVATE,
+                per_user: bool = True):
+    """Decorator for GET views whose body depends only on ``tables``.
+
+    The ETag is built from the tables' table_versions counters, the full
+    request path (query string included) and, for per-user views, the
+    caller's id and role, so checking it costs one cached PRAGMA and no
+    query. If the client's If-None-Match matches, the view is not called at
+    all and a bodyless 304 is returned. Put it below @require_auth so the
+    current user is known.
+    """
+    tables = tuple(tables)
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            scope = [request.full_path]
+            if per_user:
+                user = getattr(request, 'current_user', None) or {}
+                scope += [user.get('id'), user.get('role')]
+            etag = compute_etag(db.get_table_versions(*tables), *scope)
+
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = cache_control
+            if per_user:
+                response.vary.add('Authorization')
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,86 @@
+"""
+Auto Servis Pro - Background jobs
+Small in-process job runner with progress reporting for long API operations
+"""
+
+import secrets
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+
+class JobManager:
+    """Runs callables on a worker pool and keeps their status for polling.
+
+    The callable receives a ``progress(done, total)`` function as its
+    first argument. Only the most recent ``max_jobs`` jobs are retained.
+    """
+
+    def __init__(self, max_workers: int = 2, max_jobs: int = 100):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_jobs = max_jobs
+
+    def submit(self, kind: str, fn: Callable, *args, **kwargs) -> str:
+        """Queue a job and return its id."""
+        job_id = secrets.token_urlsafe(12)
+        job = {
+            'id': job_id,
+            'kind': kind,
+            'status': 'queued',
+            'done': 0,
+            'total': None,
+            'result': None,
+            'error': None,
+            'created_at': datetime.now().isoformat(),
+            'finished_at': None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+
+        def progress(done: int, total: int):
+            with self._lock:
+                job['done'] = done
+                job['total'] = total
+
+        def run():
+            with self._lock:
+                job['status'] = 'running'
+            try:
+                result = fn(progress, *args, **kwargs)
+                with self._lock:
+                    job['result'] = result
+                    job['status'] = 'done'
+            except Exception as e:
+                with self._lock:
+                    job['error'] = str(e)
+                    job['status'] = 'failed'
+            finally:
+                with self._lock:
+                    job['finished_at'] = datetime.now().isoformat()
+
+        self._executor.submit(run)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return a snapshot of the job, or None if unknown/expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = dict(job)
+        if snapshot['total']:
+            snapshot['percent'] = round(100.0 * snapshot['done'] / snapshot['total'], 1)
+        else:
+            snapshot['percent'] = 100.0 if snapshot['status'] == 'done' else 0.0
+        return snapshot
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting jobs and optionally wait for running ones."""
+        self._executor.shutdown(wait=wait)
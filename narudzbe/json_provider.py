@@ -0,0 +1,113 @@
+"""
+Auto Servis Pro - JSON provider
+Flask JSON provider that encodes with orjson when it is installed (stdlib
+json otherwise), plus chunked streaming of large arrays
+"""
+
+import itertools
+from typing import Any, Dict, Iterable
+
+from flask import Response, current_app
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Lists longer than this are streamed in chunks instead of one big string
+STREAM_THRESHOLD = 1000
+STREAM_CHUNK_SIZE = 1000
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider semantics (sorted keys, dates as HTTP dates,
+    Decimal/UUID/dataclass support) with orjson doing the encoding.
+
+    Calls that pass json.dumps keyword arguments, and installs without
+    orjson, go through the stdlib encoder unchanged.
+    """
+
+    fast = orjson is not None
+
+    def _options(self, indent: bool = False) -> int:
+        # Datetimes go through self.default like with the stdlib encoder
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj: Any, indent: bool = False) -> bytes:
+        """Encode straight to UTF-8 bytes (no str round-trip with orjson)."""
+        if not self.fast:
+            if indent:
+                return self.dumps(obj, indent=2).encode('utf-8')
+            return self.dumps(obj, separators=(',', ':')).encode('utf-8')
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options(indent))
+        except orjson.JSONEncodeError:
+            # e.g. integers above 64 bits, which the stdlib handles
+            return self.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if not self.fast or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if not self.fast or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        if not self.fast:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
+
+
+def _dumps_bytes(provider, obj: Any) -> bytes:
+    if isinstance(provider, FastJSONProvider):
+        return provider.dumps_bytes(obj)
+    return provider.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def stream_json(envelope: Dict[str, Any], key: str, items: Iterable[Any],
+                chunk_size: int = STREAM_CHUNK_SIZE) -> Response:
+    """JSON response {key: [items...], **envelope}, written chunk_size items at a time.
+
+    The array is never built as one string, so memory stays at one chunk
+    and the client starts receiving data right away. items may be any
+    iterable, including a generator reading from the database.
+    """
+    provider = current_app.json
+    iterator = iter(items)
+    tail = _dumps_bytes(provider, envelope)
+
+    def generate():
+        yield b'{' + _dumps_bytes(provider, key) + b':['
+        first = True
+        while True:
+            chunk = list(itertools.islice(iterator, chunk_size))
+            if not chunk:
+                break
+            body = _dumps_bytes(provider, chunk)[1:-1]
+            yield body if first else b',' + body
+            first = False
+        yield b']}\n' if tail == b'{}' else b'],' + tail[1:] + b'\n'
+
+    return Response(generate(), mimetype=provider.mimetype)
+
+
+def json_response(envelope: Dict[str, Any], key: str, items: list, status: int = 200):
+    """jsonify() for short lists, stream_json() once they pass STREAM_THRESHOLD."""
+    if len(items) > STREAM_THRESHOLD:
+        return stream_json(envelope, key, items), status
+    return current_app.json.response({**envelope, key: items}), status
+
+
+def provider_name() -> str:
+    return 'orjson' if orjson is not None else 'json'
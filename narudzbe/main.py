@@ -8,13 +8,12 @@ Version: 2.0.0
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 from tkinter import font as tkfont
-from tkcalendar import Calendar
 from datetime import datetime, timedelta
 from database import AutoServiceDB
+from virtual_tree import VirtualTree
+from bg_loader import BackgroundLoader
 import re
 import threading
-import subprocess
-import platform
 
 # PDF Printer je privremeno onemogućen
 # from pdf_printer import AppointmentPrinter
@@ -42,6 +41,14 @@ class AutoServisApp:
         # Database
         self.db = AutoServiceDB()
         
+        # Upiti za tabele idu u pozadini, rezultati se vraćaju u Tk nit
+        self.loader = BackgroundLoader(root)
+        self._tab_groups = {}
+        self._tab_builders = {}
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        # Izvještaji (reports.ReportEngine), napravi se kad se otvori tab
+        self.report_engine = None
+        
         # Current user
         self.current_user = None
         self.current_role = None
@@ -70,8 +77,7 @@ class AutoServisApp:
         """Inicijalizuj bazu podataka sa test podacima"""
         try:
             # Kreiraj test usere ako ne postoje
-            users = self.db.get_all_users()
-            if not users:
+            if not self.db.has_users():
                 # Admin user
                 self.db.register_user(
                     'admin@autoservis.com',
@@ -90,8 +96,7 @@ class AutoServisApp:
                 )
             
             # Kreiraj usluge ako ne postoje
-            services = self.db.get_all_services()
-            if not services:
+            if not self.db.has_services():
                 default_services = [
                     ('Redovan servis', 'Zamena ulja, filtera i pregled vozila', 8000.00, 90),
                     ('Mali servis', 'Zamena ulja i filtera', 5000.00, 60),
@@ -105,9 +110,70 @@ class AutoServisApp:
         except Exception as e:
             print(f"Error initializing database: {e}")
     
+    def _on_close(self):
+        """Zatvori prozor bez čekanja na pozadinska učitavanja"""
+        self.loader.shutdown()
+        self.root.destroy()
+    
+    def _load_async(self, key, query, on_done, widget=None, group=None):
+        """Pokreni query() u pozadini; on_done(rezultat) se poziva u Tk niti.
+        
+        Dok traje, preko widget-a stoji natpis "Učitavanje..."; ponovljeni
+        zahtjevi za isti key se spajaju u jedan.
+        """
+        if widget is not None:
+            self._show_loading(widget)
+        
+        def done(result):
+            if widget is not None:
+                self._hide_loading(widget)
+            on_done(result)
+        
+        def failed(error):
+            print(f"Greška pri učitavanju ({key}): {error}")
+            if widget is not None:
+                self._show_loading(widget, f"⚠️ Greška pri učitavanju: {error}", fg=self.DANGER)
+        
+        self.loader.submit(key, query, done, on_error=failed, group=group or key)
+    
+    def _show_loading(self, widget, text="⏳ Učitavanje...", fg=None):
+        """Natpis preko widget-a (tabele) dok se podaci učitavaju"""
+        label = getattr(widget, '_loading_label', None)
+        if label is None or not label.winfo_exists():
+            label = tk.Label(widget, font=('Arial', 11), bg=self.WHITE)
+            widget._loading_label = label
+        label.config(text=text, fg=fg or self.DARK)
+        label.place(relx=0.5, rely=0.5, anchor='center')
+        widget.config(cursor='watch')
+    
+    def _hide_loading(self, widget):
+        label = getattr(widget, '_loading_label', None)
+        if label is not None and label.winfo_exists():
+            label.place_forget()
+        widget.config(cursor='')
+    
+    def _add_lazy_tab(self, notebook, text, builder, group=None):
+        """Dodaj prazan tab; builder(frame) ga gradi tek kad se prvi put otvori"""
+        frame = tk.Frame(notebook, bg=self.WHITE)
+        notebook.add(frame, text=text)
+        self._tab_builders[str(frame)] = (builder, frame)
+        if group:
+            self._tab_groups[str(frame)] = group
+        return frame
+    
+    def _on_tab_changed(self, event):
+        """Izgradi tab pri prvom otvaranju; pauziraj učitavanja drugih tabova"""
+        tab = event.widget.select()
+        self.loader.activate(self._tab_groups.get(tab))
+        pending = self._tab_builders.pop(tab, None)
+        if pending is not None:
+            builder, frame = pending
+            builder(frame)
+    
     def show_login_screen(self):
         """Prikaži login/register ekran"""
-        # Očisti prozor
+        # Očisti prozor (rezultati starih učitavanja se odbacuju)
+        self.loader.cancel()
         for widget in self.root.winfo_children():
             widget.destroy()
         
@@ -454,6 +520,9 @@ class AutoServisApp:
     
     def _open_web_api(self):
         """Otvori Web API u browseru"""
+        import platform
+        import subprocess
+        
         url = "http://localhost:7000"
         try:
             if platform.system() == 'Windows':
@@ -613,7 +682,8 @@ class AutoServisApp:
     
     def show_admin_panel(self):
         """Prikaži admin panel"""
-        # Očisti prozor
+        # Očisti prozor (rezultati starih učitavanja se odbacuju)
+        self.loader.cancel()
         for widget in self.root.winfo_children():
             widget.destroy()
         
@@ -665,35 +735,28 @@ class AutoServisApp:
         self.admin_notebook = ttk.Notebook(content)
         self.admin_notebook.pack(fill='both', expand=True)
         
+        # Tabovi se grade tek kad se prvi put otvore; učitavanja su vezana za tab
+        self._tab_groups = {}
+        self._tab_builders = {}
+        self.admin_notebook.bind('<<NotebookTabChanged>>', self._on_tab_changed)
+        
         # Tab 1: Termini
-        appointments_tab = tk.Frame(self.admin_notebook, bg=self.WHITE)
-        self.admin_notebook.add(appointments_tab, text="📅 Termini")
-        self._create_appointments_tab(appointments_tab)
+        self._add_lazy_tab(self.admin_notebook, "📅 Termini", self._create_appointments_tab, 'appointments')
         
         # Tab 2: Korisnici
-        users_tab = tk.Frame(self.admin_notebook, bg=self.WHITE)
-        self.admin_notebook.add(users_tab, text="👥 Korisnici")
-        self._create_users_tab(users_tab)
+        self._add_lazy_tab(self.admin_notebook, "👥 Korisnici", self._create_users_tab, 'users')
         
         # Tab 3: Usluge
-        services_tab = tk.Frame(self.admin_notebook, bg=self.WHITE)
-        self.admin_notebook.add(services_tab, text="🛠️ Usluge")
-        self._create_services_tab(services_tab)
+        self._add_lazy_tab(self.admin_notebook, "🛠️ Usluge", self._create_services_tab, 'services')
         
         # Tab 4: Notifikacije
-        notifications_tab = tk.Frame(self.admin_notebook, bg=self.WHITE)
-        self.admin_notebook.add(notifications_tab, text="🔔 Notifikacije")
-        self._create_notifications_tab(notifications_tab)
+        self._add_lazy_tab(self.admin_notebook, "🔔 Notifikacije", self._create_notifications_tab)
         
         # Tab 5: Postavke
-        settings_tab = tk.Frame(self.admin_notebook, bg=self.WHITE)
-        self.admin_notebook.add(settings_tab, text="⚙️ Postavke")
-        self._create_settings_tab(settings_tab)
+        self._add_lazy_tab(self.admin_notebook, "⚙️ Postavke", self._create_settings_tab)
         
         # Tab 6: Izvještaji
-        reports_tab = tk.Frame(self.admin_notebook, bg=self.WHITE)
-        self.admin_notebook.add(reports_tab, text="📊 Izvještaji")
-        self._create_reports_tab(reports_tab)
+        self._add_lazy_tab(self.admin_notebook, "📊 Izvještaji", self._create_reports_tab, 'reports')
     
     def _create_appointments_tab(self, parent):
         """Kreira tab za termine"""
@@ -739,10 +802,10 @@ class AutoServisApp:
         self.appointments_tree = ttk.Treeview(
             table_frame,
             columns=columns,
-            show='headings',
-            yscrollcommand=scrollbar.set
+            show='headings'
         )
-        scrollbar.config(command=self.appointments_tree.yview)
+        # U tabeli su samo redovi oko vidljivog dijela (prozor se pomjera dok se skroluje)
+        self.appointments_view = VirtualTree(self.appointments_tree, scrollbar)
         
         for col in columns:
             self.appointments_tree.heading(col, text=col)
@@ -761,35 +824,116 @@ class AutoServisApp:
         # Osveži podatke
         self._refresh_appointments()
     
+    # Radionička tabla: koliko često se provjerava log promjena (ms)
+    BOARD_POLL_MS = 3000
+    
     def _refresh_appointments(self):
-        """Osveži listu termina"""
-        # Očisti tabelu
-        for item in self.appointments_tree.get_children():
-            self.appointments_tree.delete(item)
-        
-        # Dobavi termine
-        appointments = self.db.get_all_appointments()
+        """Osveži listu termina (cijela tabela, jedan upit u pozadini)"""
+        self.loader.cancel('board_poll')
+        self._load_async('appointments', self.db.get_board_snapshot,
+                         self._show_board, widget=self.appointments_tree)
+    
+    def _show_board(self, board):
+        """Prikaži snapshot table i kreni sa praćenjem promjena"""
+        self._board_cursor = board['cursor']
+        self._board_versions = {app['id']: app.get('version', 0) for app in board['items']}
+        
+        # Status se u bazi piše različito ('pending' / 'Cancelled'), pa filter ide ovdje
+        status_filter = self.appointment_filter.get().lower()
+        self.appointments_view.set_rows(
+            (str(app['id']), self._board_row_values(app)) for app in board['items']
+            if status_filter == 'svi' or (app['status'] or '').lower() == status_filter)
+        
+        self._schedule_board_poll()
+    
+    @staticmethod
+    def _split_appointment_date(app):
+        """(datum, vrijeme) iz appointment_date 'YYYY-MM-DD HH:MM'"""
+        date_part, _, time_part = str(app.get('appointment_date') or '').replace('T', ' ').partition(' ')
+        return date_part, time_part
+    
+    @staticmethod
+    def _vehicle_label(app):
+        return f"{app['make']} {app['model']}" if app.get('make') else 'N/A'
+    
+    def _board_row_values(self, app):
+        """Vrijednosti reda u tabeli termina"""
+        date_part, time_part = self._split_appointment_date(app)
+        return (
+            app['id'],
+            app.get('user_name') or app.get('username') or 'N/A',
+            app.get('service_name') or 'N/A',
+            date_part,
+            time_part,
+            app['status'],
+            self._vehicle_label(app)
+        )
+    
+    def _board_upsert(self, app, highlight=False):
+        """Dodaj ili ažuriraj jedan red na mjestu (bez ponovnog crtanja tabele)"""
+        view = self.appointments_view
+        iid = str(app['id'])
+        self._board_versions[app['id']] = app.get('version', 0)
         
-        # Filtriraj po statusu
         status_filter = self.appointment_filter.get()
-        if status_filter != 'Svi':
-            appointments = [a for a in appointments if a['status'] == status_filter]
+        if status_filter != 'Svi' and (app['status'] or '').lower() != status_filter.lower():
+            view.remove(iid)
+            return
         
-        # Popuni tabelu
-        for app in appointments:
-            user = self.db.get_user_by_id(app['user_id'])
-            service = self.db.get_service_by_id(app['service_id'])
-            vehicle = self.db.get_vehicle_by_id(app['vehicle_id']) if app.get('vehicle_id') else None
-            
-            self.appointments_tree.insert('', 'end', values=(
-                app['id'],
-                user['full_name'] if user else 'N/A',
-                service['name'] if service else 'N/A',
-                app['appointment_date'],
-                app['appointment_time'],
-                app['status'],
-                f"{vehicle['brand']} {vehicle['model']}" if vehicle else 'N/A'
-            ))
+        tags = ('changed',) if highlight else ()
+        view.upsert(iid, self._board_row_values(app), tags=tags, front=highlight)
+    
+    def _schedule_board_poll(self):
+        """(Ponovo) zakaži provjeru promjena"""
+        job = getattr(self, '_board_poll_job', None)
+        if job is not None:
+            self.root.after_cancel(job)
+        self._board_poll_job = self.root.after(self.BOARD_POLL_MS, self._poll_board)
+    
+    def _poll_board(self):
+        """Provjeri log promjena termina (iz ove ili druge aplikacije / API-ja)"""
+        # Pozvano i direktno (npr. poslije promjene statusa): zakazana provjera
+        # bi inače ostala živa i pokrenula još jedan lanac provjera
+        job = getattr(self, '_board_poll_job', None)
+        if job is not None:
+            self.root.after_cancel(job)
+        self._board_poll_job = None
+        try:
+            if not self.appointments_tree.winfo_exists():
+                return
+        except (AttributeError, tk.TclError):
+            return
+        
+        cursor = self._board_cursor
+        self.loader.submit('board_poll', lambda: self.db.get_board_changes(cursor),
+                           self._apply_board_changes, on_error=self._board_poll_failed,
+                           group='appointments')
+    
+    def _board_poll_failed(self, error):
+        print(f"Greška pri provjeri promjena termina: {error}")
+        self._schedule_board_poll()
+    
+    def _apply_board_changes(self, delta):
+        """Primijeni samo promjene termina"""
+        if delta['reset']:
+            self._refresh_appointments()
+            return
+        
+        self.appointments_tree.tag_configure('changed', background='#fff3cd')
+        for change in delta['changes']:
+            if change['version'] <= self._board_versions.get(change['id'], 0):
+                continue
+            if change['appointment'] is None:
+                self._board_versions.pop(change['id'], None)
+                self.appointments_view.remove(str(change['id']))
+            else:
+                self._board_upsert(change['appointment'], highlight=True)
+        self._board_cursor = delta['cursor']
+        
+        if delta['has_more']:
+            self._board_poll_job = self.root.after_idle(self._poll_board)
+        else:
+            self._schedule_board_poll()
     
     def _show_appointment_context_menu(self, event):
         """Prikaži context menu za termin"""
@@ -820,7 +964,7 @@ class AutoServisApp:
         appointment_id = values[0]
         
         self.db.update_appointment_status(appointment_id, status)
-        self._refresh_appointments()
+        self._poll_board()
         messagebox.showinfo("Uspeh", f"Status termina ažuriran na: {status}")
     
     def _show_appointment_details(self):
@@ -928,13 +1072,13 @@ Vozilo: {values[6]}
         self._refresh_users()
     
     def _refresh_users(self):
-        """Osveži listu korisnika"""
+        """Osveži listu korisnika (upit u pozadini)"""
+        self._load_async('users', self.db.get_all_users, self._show_users, widget=self.users_tree)
+    
+    def _show_users(self, users):
+        """Popuni tabelu korisnika"""
         # Očisti tabelu
-        for item in self.users_tree.get_children():
-            self.users_tree.delete(item)
-        
-        # Dobavi korisnike
-        users = self.db.get_all_users()
+        self.users_tree.delete(*self.users_tree.get_children())
         
         # Filtriraj po pretrazi
         search = self.user_search.get().lower()
@@ -1086,22 +1230,24 @@ Registrovan: {values[5]}
         self._refresh_services()
     
     def _refresh_services(self):
-        """Osveži listu usluga"""
+        """Osveži listu usluga (upit u pozadini)"""
+        self._load_async('services', self.db.get_all_services, self._show_services,
+                         widget=self.services_tree)
+    
+    def _show_services(self, services):
+        """Popuni tabelu usluga"""
         # Očisti tabelu
-        for item in self.services_tree.get_children():
-            self.services_tree.delete(item)
-        
-        # Dobavi usluge
-        services = self.db.get_all_services()
+        self.services_tree.delete(*self.services_tree.get_children())
         
         # Popuni tabelu
         for service in services:
+            description = service['description'] or ''
             self.services_tree.insert('', 'end', values=(
                 service['id'],
                 service['name'],
-                service['description'][:50] + '...' if len(service['description']) > 50 else service['description'],
+                description[:50] + '...' if len(description) > 50 else description,
                 f"{service['price']:.2f}",
-                service['duration']
+                service['duration_minutes']
             ))
     
     def _show_service_context_menu(self, event):
@@ -1604,9 +1750,14 @@ Registrovan: {values[5]}
     
     def _create_reports_tab(self, parent):
         """Kreira tab za izvještaje"""
+        from reports import ReportEngine, PERIODS, default_range
+        if self.report_engine is None:
+            self.report_engine = ReportEngine(self.db)
+        
         # Container
         container = tk.Frame(parent, bg=self.WHITE, padx=30, pady=30)
         container.pack(fill='both', expand=True)
+        self._reports_container = container
         
         tk.Label(
             container,
@@ -1614,17 +1765,39 @@ Registrovan: {values[5]}
             font=('Arial', 18, 'bold'),
             bg=self.WHITE,
             fg=self.PRIMARY
-        ).pack(pady=(0, 30))
+        ).pack(pady=(0, 20))
+        
+        # Period filter
+        filter_frame = tk.Frame(container, bg=self.WHITE)
+        filter_frame.pack(fill='x', pady=(0, 15))
+        
+        date_from, date_to = default_range()
+        tk.Label(filter_frame, text="Od (YYYY-MM-DD):", bg=self.WHITE).pack(side='left')
+        self.report_from_entry = tk.Entry(filter_frame, width=12)
+        self.report_from_entry.insert(0, date_from)
+        self.report_from_entry.pack(side='left', padx=5)
+        
+        tk.Label(filter_frame, text="Do:", bg=self.WHITE).pack(side='left', padx=(10, 0))
+        self.report_to_entry = tk.Entry(filter_frame, width=12)
+        self.report_to_entry.insert(0, date_to)
+        self.report_to_entry.pack(side='left', padx=5)
+        
+        tk.Label(filter_frame, text="Grupisanje:", bg=self.WHITE).pack(side='left', padx=(10, 0))
+        self._report_periods = list(PERIODS)
+        self.report_period_combo = ttk.Combobox(filter_frame, width=10, state='readonly',
+                                                values=[PERIODS[p] for p in self._report_periods])
+        self.report_period_combo.current(self._report_periods.index('month'))
+        self.report_period_combo.pack(side='left', padx=5)
         
         # Report buttons
         reports = [
-            ("📅 Izvještaj o terminima", "Pregled svih termina po datumima"),
-            ("💰 Finansijski izvještaj", "Ukupan prihod i statistika"),
-            ("👥 Izvještaj o korisnicima", "Pregled aktivnosti korisnika"),
-            ("🛠️ Izvještaj o uslugama", "Najpopularnije usluge"),
+            ('appointments', "📅 Izvještaj o terminima", "Broj termina po periodu i statusu"),
+            ('finance', "💰 Finansijski izvještaj", "Prihod po danu, sedmici ili mjesecu"),
+            ('customers', "👥 Izvještaj o korisnicima", "Pregled aktivnosti korisnika"),
+            ('services', "🛠️ Izvještaj o uslugama", "Najpopularnije usluge"),
         ]
         
-        for title, desc in reports:
+        for kind, title, desc in reports:
             report_frame = tk.Frame(container, bg=self.LIGHT, padx=20, pady=15)
             report_frame.pack(fill='x', pady=(0, 15))
             
@@ -1654,16 +1827,137 @@ Registrovan: {values[5]}
                 padx=20,
                 pady=5,
                 cursor="hand2",
-                command=lambda t=title: self._generate_report(t)
+                command=lambda k=kind: self._generate_report(k)
             ).pack(anchor='w')
     
     def _generate_report(self, report_type):
-        """Generiši izvještaj"""
-        messagebox.showinfo("Izvještaj", f"Generisanje izvještaja:\n{report_type}\n\n(Demo)")
+        """Generiši izvještaj u pozadini"""
+        from reports import parse_day
+        try:
+            date_from = parse_day(self.report_from_entry.get())
+            date_to = parse_day(self.report_to_entry.get())
+        except ValueError:
+            messagebox.showwarning("Upozorenje", "Datum mora biti u formatu YYYY-MM-DD!")
+            return
+        if date_from and date_to and date_from > date_to:
+            messagebox.showwarning("Upozorenje", "Datum 'Od' je poslije datuma 'Do'!")
+            return
+        period = self._report_periods[self.report_period_combo.current()]
+        
+        self._load_async(
+            'report',
+            lambda: self.report_engine.run(report_type, date_from, date_to, period),
+            self._show_report,
+            widget=self._reports_container,
+            group='reports'
+        )
+    
+    def _show_report(self, report):
+        """Prikaži izvještaj u novom prozoru sa izvozom u CSV i PDF"""
+        from reports import describe_range
+        window = tk.Toplevel(self.root)
+        window.title(report['title'])
+        window.geometry("900x600")
+        window.configure(bg=self.WHITE)
+        
+        header = tk.Frame(window, bg=self.WHITE, padx=20, pady=15)
+        header.pack(fill='x')
+        tk.Label(
+            header,
+            text=report['title'],
+            font=('Arial', 16, 'bold'),
+            bg=self.WHITE,
+            fg=self.PRIMARY
+        ).pack(anchor='w')
+        source = "keš" if report['cached'] else f"{report['elapsed_ms']:.0f} ms"
+        tk.Label(
+            header,
+            text=f"{describe_range(report)}  •  generisano {report['generated_at']} ({source})",
+            font=('Arial', 9),
+            bg=self.WHITE,
+            fg=self.DARK
+        ).pack(anchor='w', pady=(2, 0))
+        
+        # Sažetak
+        summary = tk.Frame(window, bg=self.LIGHT, padx=20, pady=10)
+        summary.pack(fill='x', padx=20)
+        for row, (label, value) in enumerate(report['summary']):
+            tk.Label(summary, text=f"{label}:", font=('Arial', 10), bg=self.LIGHT,
+                     fg=self.DARK).grid(row=row, column=0, sticky='w')
+            tk.Label(summary, text=str(value), font=('Arial', 10, 'bold'), bg=self.LIGHT,
+                     fg=self.DARK).grid(row=row, column=1, sticky='w', padx=(15, 0))
+        
+        # Export buttons
+        buttons = tk.Frame(window, bg=self.WHITE, padx=20, pady=10)
+        buttons.pack(side='bottom', fill='x')
+        for text, fmt in (("💾 Izvoz CSV", 'csv'), ("📄 Izvoz PDF", 'pdf')):
+            tk.Button(
+                buttons,
+                text=text,
+                font=('Arial', 10),
+                bg=self.INFO,
+                fg=self.WHITE,
+                bd=0,
+                padx=15,
+                pady=5,
+                cursor="hand2",
+                command=lambda f=fmt: self._export_report(report, f, window)
+            ).pack(side='left', padx=(0, 10))
+        
+        # Tabela
+        table_frame = tk.Frame(window, bg=self.WHITE, padx=20, pady=10)
+        table_frame.pack(fill='both', expand=True)
+        columns = [f"c{i}" for i in range(len(report['columns']))]
+        tree = ttk.Treeview(table_frame, columns=columns, show='headings')
+        scrollbar = ttk.Scrollbar(table_frame, orient='vertical')
+        for col, heading in zip(columns, report['columns']):
+            tree.heading(col, text=heading)
+            tree.column(col, width=110, anchor='w' if col == 'c0' else 'e')
+        tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+        
+        view = VirtualTree(tree, scrollbar)
+        view.set_rows((str(i), tuple(f"{v:.2f}" if isinstance(v, float) else v for v in row))
+                      for i, row in enumerate(report['rows']))
+        if not report['rows']:
+            tk.Label(table_frame, text="Nema podataka za izabrani period.",
+                     font=('Arial', 11), bg=self.WHITE).place(relx=0.5, rely=0.5, anchor='center')
+    
+    def _export_report(self, report, fmt, parent):
+        """Sačuvaj izvještaj kao CSV ili PDF"""
+        from tkinter import filedialog
+        from reports import export_csv, export_pdf
+        params = report['params']
+        default_name = f"{report['kind']}_{params['date_from'] or 'sve'}_{params['date_to'] or 'sve'}.{fmt}"
+        path = filedialog.asksaveasfilename(
+            parent=parent,
+            defaultextension=f".{fmt}",
+            initialfile=default_name,
+            filetypes=[("CSV", "*.csv")] if fmt == 'csv' else [("PDF", "*.pdf")]
+        )
+        if not path:
+            return
+        try:
+            if fmt == 'csv':
+                export_csv(report, path)
+            else:
+                export_pdf(report, path)
+        except ImportError:
+            messagebox.showwarning(
+                "⚠️ PDF trenutno nije dostupan",
+                "PDF funkcionalnost trenutno nije dostupna.\n\nTreba instalirati reportlab:\npip install reportlab",
+                parent=parent
+            )
+            return
+        except OSError as e:
+            messagebox.showerror("Greška", f"Izvoz nije uspio:\n{e}", parent=parent)
+            return
+        messagebox.showinfo("Uspeh", f"Izvještaj sačuvan:\n{path}", parent=parent)
     
     def show_user_panel(self):
         """Prikaži user panel"""
-        # Očisti prozor
+        # Očisti prozor (rezultati starih učitavanja se odbacuju)
+        self.loader.cancel()
         for widget in self.root.winfo_children():
             widget.destroy()
         
@@ -1715,30 +2009,26 @@ Registrovan: {values[5]}
         self.user_notebook = ttk.Notebook(content)
         self.user_notebook.pack(fill='both', expand=True)
         
+        # Tabovi se grade tek kad se prvi put otvore; učitavanja su vezana za tab
+        self._tab_groups = {}
+        self._tab_builders = {}
+        self.user_notebook.bind('<<NotebookTabChanged>>', self._on_tab_changed)
+        
         # Tab 1: Rezervacija
-        booking_tab = tk.Frame(self.user_notebook, bg=self.WHITE)
-        self.user_notebook.add(booking_tab, text="📅 Rezervacija")
-        self._create_booking_tab(booking_tab)
+        self._add_lazy_tab(self.user_notebook, "📅 Rezervacija", self._create_booking_tab, 'booking')
         
         # Tab 2: Moji termini
-        my_appointments_tab = tk.Frame(self.user_notebook, bg=self.WHITE)
-        self.user_notebook.add(my_appointments_tab, text="📋 Moji termini")
-        self._create_my_appointments_tab(my_appointments_tab)
+        self._add_lazy_tab(self.user_notebook, "📋 Moji termini", self._create_my_appointments_tab,
+                           'my_appointments')
         
         # Tab 3: Notifikacije
-        user_notif_tab = tk.Frame(self.user_notebook, bg=self.WHITE)
-        self.user_notebook.add(user_notif_tab, text="🔔 Notifikacije")
-        self._create_user_notifications_tab(user_notif_tab)
+        self._add_lazy_tab(self.user_notebook, "🔔 Notifikacije", self._create_user_notifications_tab)
         
         # Tab 4: Vozila
-        vehicles_tab = tk.Frame(self.user_notebook, bg=self.WHITE)
-        self.user_notebook.add(vehicles_tab, text="🚗 Vozila")
-        self._create_vehicles_tab(vehicles_tab)
+        self._add_lazy_tab(self.user_notebook, "🚗 Vozila", self._create_vehicles_tab, 'vehicles')
         
         # Tab 5: Profil
-        profile_tab = tk.Frame(self.user_notebook, bg=self.WHITE)
-        self.user_notebook.add(profile_tab, text="👤 Profil")
-        self._create_profile_tab(profile_tab)
+        self._add_lazy_tab(self.user_notebook, "👤 Profil", self._create_profile_tab)
     
     def _create_booking_tab(self, parent):
         """Kreira tab za rezervaciju"""
@@ -1766,12 +2056,7 @@ Registrovan: {values[5]}
             bg=self.WHITE
         ).grid(row=0, column=0, sticky='w', pady=(0, 5))
         
-        services = self.db.get_all_services()
-        service_list = [f"{s['name']} - {s['price']} RSD ({s['duration']} min)" for s in services]
-        
-        self.booking_service = ttk.Combobox(form_frame, values=service_list, width=50, state='readonly')
-        if service_list:
-            self.booking_service.current(0)
+        self.booking_service = ttk.Combobox(form_frame, width=50, state='readonly')
         self.booking_service.grid(row=1, column=0, pady=(0, 20))
         
         # Vozilo
@@ -1782,14 +2067,19 @@ Registrovan: {values[5]}
             bg=self.WHITE
         ).grid(row=2, column=0, sticky='w', pady=(0, 5))
         
-        vehicles = self.db.get_user_vehicles(self.current_user['id'])
-        vehicle_list = [f"{v['brand']} {v['model']} ({v['license_plate']})" for v in vehicles]
-        
-        self.booking_vehicle = ttk.Combobox(form_frame, values=vehicle_list, width=50, state='readonly')
-        if vehicle_list:
-            self.booking_vehicle.current(0)
+        self.booking_vehicle = ttk.Combobox(form_frame, width=50, state='readonly')
         self.booking_vehicle.grid(row=3, column=0, pady=(0, 20))
         
+        # Usluge i vozila se učitavaju u pozadini
+        self._booking_services = []
+        self._booking_vehicles = []
+        self.booking_service.set("⏳ Učitavanje...")
+        self.booking_vehicle.set("⏳ Učitavanje...")
+        user_id = self.current_user['id']
+        self._load_async('booking',
+                         lambda: (self.db.get_all_services(), self.db.get_user_vehicles(user_id)),
+                         self._fill_booking_choices)
+        
         # Datum
         tk.Label(
             form_frame,
@@ -1798,6 +2088,8 @@ Registrovan: {values[5]}
             bg=self.WHITE
         ).grid(row=4, column=0, sticky='w', pady=(0, 5))
         
+        from tkcalendar import Calendar  # babel je spor za import, treba samo ovdje
+        
         self.booking_calendar = Calendar(
             form_frame,
             selectmode='day',
@@ -1844,13 +2136,33 @@ Registrovan: {values[5]}
             command=self._create_booking
         ).grid(row=10, column=0)
     
+    def _fill_booking_choices(self, result):
+        """Popuni izbor usluga i vozila kad stignu iz baze"""
+        self._booking_services, self._booking_vehicles = result
+        
+        service_list = [f"{s['name']} - {s['price']} RSD ({s['duration_minutes']} min)" for s in self._booking_services]
+        self.booking_service.config(values=service_list)
+        self.booking_service.set('')
+        if service_list:
+            self.booking_service.current(0)
+        
+        vehicle_list = [f"{v['make']} {v['model']} ({v['license_plate']})" for v in self._booking_vehicles]
+        self.booking_vehicle.config(values=vehicle_list)
+        self.booking_vehicle.set('')
+        if vehicle_list:
+            self.booking_vehicle.current(0)
+    
     def _create_booking(self):
         """Kreiraj rezervaciju"""
-        if not self.booking_service.get():
+        if self.loader.loading('booking'):
+            messagebox.showwarning("Upozorenje", "Podaci se još učitavaju, pokušajte ponovo.")
+            return
+        
+        if self.booking_service.current() < 0:
             messagebox.showwarning("Upozorenje", "Izaberite uslugu!")
             return
         
-        if not self.booking_vehicle.get():
+        if self.booking_vehicle.current() < 0:
             messagebox.showwarning("Upozorenje", "Nemate registrovano vozilo! Dodajte vozilo u 'Vozila' tabu.")
             return
         
@@ -1858,46 +2170,31 @@ Registrovan: {values[5]}
         time = self.booking_time.get()
         note = self.booking_note.get('1.0', 'end').strip()
         
-        # Get service ID
-        service_str = self.booking_service.get()
-        services = self.db.get_all_services()
-        service_id = None
-        for s in services:
-            if s['name'] in service_str:
-                service_id = s['id']
-                break
-        
-        # Get vehicle ID
-        vehicle_str = self.booking_vehicle.get()
-        vehicles = self.db.get_user_vehicles(self.current_user['id'])
-        vehicle_id = None
-        for v in vehicles:
-            if v['license_plate'] in vehicle_str:
-                vehicle_id = v['id']
-                break
+        # Izbori su u istom redoslijedu kao liste učitane za combobox-e
+        service_id = self._booking_services[self.booking_service.current()]['id']
+        vehicle_id = self._booking_vehicles[self.booking_vehicle.current()]['id']
         
         if not service_id or not vehicle_id:
             messagebox.showerror("Greška", "Došlo je do greške!")
             return
         
         # Create appointment
-        success = self.db.create_appointment(
-            self.current_user['id'],
-            service_id,
-            vehicle_id,
-            date,
-            time,
-            note
+        ok, message, appointment_id = self.db.create_appointment(
+            user_id=self.current_user['id'],
+            vehicle_id=vehicle_id,
+            service_id=service_id,
+            appointment_date=f"{date} {time}",
+            notes=note
         )
         
-        if success:
+        if ok:
             messagebox.showinfo(
                 "Uspeh",
                 f"Termin uspešno zakazan!\n\nDatum: {date}\nVreme: {time}"
             )
             self.booking_note.delete('1.0', tk.END)
         else:
-            messagebox.showerror("Greška", "Došlo je do greške pri zakazivanju!")
+            messagebox.showerror("Greška", message)
     
     def _create_my_appointments_tab(self, parent):
         """Kreira tab za moje termine"""
@@ -1929,10 +2226,9 @@ Registrovan: {values[5]}
         self.my_appointments_tree = ttk.Treeview(
             table_frame,
             columns=columns,
-            show='headings',
-            yscrollcommand=scrollbar.set
+            show='headings'
         )
-        scrollbar.config(command=self.my_appointments_tree.yview)
+        self.my_appointments_view = VirtualTree(self.my_appointments_tree, scrollbar)
         
         for col in columns:
             self.my_appointments_tree.heading(col, text=col)
@@ -1949,24 +2245,25 @@ Registrovan: {values[5]}
         self._refresh_my_appointments()
     
     def _refresh_my_appointments(self):
-        """Osveži moje termine"""
-        for item in self.my_appointments_tree.get_children():
-            self.my_appointments_tree.delete(item)
-        
-        appointments = self.db.get_user_appointments(self.current_user['id'])
-        
+        """Osveži moje termine (usluga i vozilo dolaze iz istog upita, u pozadini)"""
+        user_id = self.current_user['id']
+        self._load_async('my_appointments', lambda: self.db.get_user_appointments(user_id),
+                         self._show_my_appointments, widget=self.my_appointments_tree)
+    
+    def _show_my_appointments(self, appointments):
+        """Popuni tabelu mojih termina"""
+        rows = []
         for app in appointments:
-            service = self.db.get_service_by_id(app['service_id'])
-            vehicle = self.db.get_vehicle_by_id(app['vehicle_id'])
-            
-            self.my_appointments_tree.insert('', 'end', values=(
+            date_part, time_part = self._split_appointment_date(app)
+            rows.append((str(app['id']), (
                 app['id'],
-                service['name'] if service else 'N/A',
-                app['appointment_date'],
-                app['appointment_time'],
+                app.get('service_name') or 'N/A',
+                date_part,
+                time_part,
                 app['status'],
-                f"{vehicle['brand']} {vehicle['model']}" if vehicle else 'N/A'
-            ))
+                self._vehicle_label(app)
+            )))
+        self.my_appointments_view.set_rows(rows)
     
     def _show_my_appointment_menu(self, event):
         """Prikaži context menu za termin"""
@@ -2142,16 +2439,19 @@ Vozilo: {values[5]}
         self._refresh_vehicles()
     
     def _refresh_vehicles(self):
-        """Osveži vozila"""
-        for item in self.vehicles_tree.get_children():
-            self.vehicles_tree.delete(item)
-        
-        vehicles = self.db.get_user_vehicles(self.current_user['id'])
+        """Osveži vozila (upit u pozadini)"""
+        user_id = self.current_user['id']
+        self._load_async('vehicles', lambda: self.db.get_user_vehicles(user_id),
+                         self._show_vehicles, widget=self.vehicles_tree)
+    
+    def _show_vehicles(self, vehicles):
+        """Popuni tabelu vozila"""
+        self.vehicles_tree.delete(*self.vehicles_tree.get_children())
         
         for v in vehicles:
             self.vehicles_tree.insert('', 'end', values=(
                 v['id'],
-                v['brand'],
+                v['make'],
                 v['model'],
                 v['license_plate'],
                 v.get('year', 'N/A'),
@@ -0,0 +1,291 @@
+"""
+Auto Servis Pro - Metrics
+Request and DB latency histograms exposed in the Prometheus text format
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Seconds; SQLite calls are mostly sub-millisecond, requests a few ms
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+# AutoServiceDB methods that are not queries (or are the stats we export)
+NOT_TIMED = {'get_connection', 'transaction', 'in_transaction', 'close', 'release_connections',
+             'pool_stats', 'contention_stats', 'cache_stats', 'event_stats', 'slow_query_stats'}
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+ENVIRON_KEY = 'autoservice.metrics'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _number(value) -> str:
+    if isinstance(value, float):
+        return repr(value) if value != int(value) else str(int(value))
+    return str(value)
+
+
+class Counter:
+    """Monotonic counter per label set."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}')
+        return lines
+
+
+class Histogram:
+    """Bucketed observations per label set.
+
+    observe() is one bisect and three additions under a lock; buckets are
+    stored non-cumulative and summed only when rendered.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket
+                le = '+Inf' if bound == float('inf') else _number(float(bound))
+                bucket_labels = _labels(self.labelnames, labels, 'le="%s"' % le)
+                lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(round(total, 6))}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {count}')
+        return lines
+
+
+class Metrics:
+    """Process-wide metrics registry for the API.
+
+    Counters and histograms are recorded as requests run; gauges such as
+    pool and session stats come from collectors that are only called when
+    /metrics is scraped. Values are per process: with several gunicorn
+    workers each scrape sees the worker that answered it.
+    """
+
+    def __init__(self):
+        self.requests = Counter(
+            'autoservice_http_requests_total', 'HTTP requests by route, method and status.',
+            ('route', 'method', 'status'))
+        self.request_seconds = Histogram(
+            'autoservice_http_request_duration_seconds', 'Time to build the HTTP response.',
+            ('route', 'method'))
+        self.request_db_calls = Histogram(
+            'autoservice_http_request_db_calls', 'AutoServiceDB calls made while handling one request.',
+            ('route',), buckets=COUNT_BUCKETS)
+        self.db_seconds = Histogram(
+            'autoservice_db_call_duration_seconds', 'AutoServiceDB method latency.', ('method',))
+        self.db_errors = Counter(
+            'autoservice_db_call_errors_total', 'AutoServiceDB calls that raised.', ('method',))
+        self.started_at = time.time()
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, list]]]] = []
+        self._local = threading.local()
+
+    # ---- request scope -------------------------------------------------
+
+    def begin_request(self, count_db_calls: bool = True) -> Tuple[float, Optional[int]]:
+        """Scope to hand back to end_request (start time, DB calls so far on this thread).
+
+        count_db_calls=False for requests whose DB calls run on other threads
+        (the ASGI native routes); they are left out of the DB calls histogram.
+        """
+        return time.perf_counter(), getattr(self._local, 'db_calls', 0) if count_db_calls else None
+
+    def end_request(self, scope: Tuple[float, Optional[int]], route: str, method: str, status: int):
+        started, db_calls = scope
+        self.request_seconds.observe((route, method), time.perf_counter() - started)
+        self.requests.inc((route, method, str(status)))
+        if db_calls is not None:
+            self.request_db_calls.observe((route,), getattr(self._local, 'db_calls', 0) - db_calls)
+
+    # ---- DB ------------------------------------------------------------
+
+    def time_db_method(self, name: str, method: Callable) -> Callable:
+        """Wrap one DB method so every call is timed and counted."""
+        histogram = self.db_seconds
+        errors = self.db_errors
+        local = self._local
+        labels = (name,)
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            except Exception:
+                errors.inc(labels)
+                raise
+            finally:
+                histogram.observe(labels, time.perf_counter() - start)
+                local.db_calls = getattr(local, 'db_calls', 0) + 1
+        return timed
+
+    # ---- gauges ----------------------------------------------------------
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, list]]]):
+        """collector() yields (name, type, help, [(labels dict, value), ...]) at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = [
+            '# HELP autoservice_process_start_time_seconds Start time of the process (unix epoch).',
+            '# TYPE autoservice_process_start_time_seconds gauge',
+            f'autoservice_process_start_time_seconds {_number(round(self.started_at, 3))}',
+        ]
+        for metric in (self.requests, self.request_seconds, self.request_db_calls,
+                       self.db_seconds, self.db_errors):
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                lines.append(f'# collector {getattr(collector, "__name__", "?")} failed: {_escape(e)}')
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    names = tuple(labels)
+                    lines.append(f'{name}{_labels(names, tuple(labels[n] for n in names))} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def instrument_db(db, metrics: Metrics):
+    """Time every public AutoServiceDB method of this instance.
+
+    The wrappers are set on the instance, so calls from inside other DB
+    methods (self.create_notification(...)) are measured too and the Tk
+    app, which uses its own instance, is not affected.
+    """
+    for name in dir(type(db)):
+        if name.startswith('_') or name in NOT_TIMED:
+            continue
+        method = getattr(db, name)
+        if callable(method):
+            setattr(db, name, metrics.time_db_method(name, method))
+
+
+def instrument_app(app, metrics: Metrics):
+    """Record count, status and latency of every Flask request by route template."""
+    from flask import request
+
+    def finish(status: int):
+        # The scope lives in the WSGI environ: /api/batch sub-requests share
+        # the thread and the app context with the outer request
+        scope = request.environ.pop(ENVIRON_KEY, None)
+        if scope is not None:
+            rule = request.url_rule
+            metrics.end_request(scope, rule.rule if rule is not None else 'unmatched',
+                                request.method, status)
+
+    @app.before_request
+    def _metrics_begin():
+        request.environ[ENVIRON_KEY] = metrics.begin_request()
+
+    @app.after_request
+    def _metrics_end(response):
+        finish(response.status_code)
+        return response
+
+    @app.teardown_request
+    def _metrics_teardown(exc):
+        # Unhandled exceptions skip after_request
+        finish(500)
+
+
+def db_collector(db):
+    """Pool, cache, contention and live-event gauges of an AutoServiceDB."""
+    def collect():
+        pool = db.pool_stats()
+        if pool.get('pooling'):
+            yield ('autoservice_db_pool_connections', 'gauge', 'Pooled SQLite connections by state.', [
+                ({'state': 'open'}, pool['open']),
+                ({'state': 'in_use'}, pool['in_use']),
+                ({'state': 'idle'}, pool['idle']),
+            ])
+            yield ('autoservice_db_pool_max_size', 'gauge', 'Configured pool size.', [({}, pool['max_size'])])
+            yield ('autoservice_db_pool_waits_total', 'counter', 'Acquires that had to wait.',
+                   [({}, pool['waits'])])
+            yield ('autoservice_db_pool_timeouts_total', 'counter', 'Acquires that timed out.',
+                   [({}, pool['timeouts'])])
+            yield ('autoservice_db_pool_wait_seconds_total', 'counter', 'Time spent waiting for a connection.',
+                   [({}, pool['wait_time_total_ms'] / 1000)])
+
+        contention = db.contention.snapshot()
+        yield ('autoservice_db_busy_errors_total', 'counter', 'SQLITE_BUSY errors.',
+               [({}, contention['busy_errors'])])
+        yield ('autoservice_db_busy_retries_total', 'counter', 'Retries after SQLITE_BUSY.',
+               [({}, contention['retries'])])
+
+        cache = db.cache_stats()
+        yield ('autoservice_catalog_cache_lookups_total', 'counter', 'Catalog cache lookups by result.', [
+            ({'result': 'hit'}, cache['hits']),
+            ({'result': 'miss'}, cache['misses']),
+        ])
+        yield ('autoservice_catalog_cache_entries', 'gauge', 'Cached catalog entries.', [({}, cache['entries'])])
+
+        events = db.event_stats()
+        yield ('autoservice_stream_subscribers', 'gauge', 'Open live event subscriptions.',
+               [({}, events['subscribers'])])
+        yield ('autoservice_events_published_total', 'counter', 'Live events published.',
+               [({}, events['published'])])
+    return collect
+
+
+def session_collector(sessions):
+    """Active session gauge of a session store."""
+    def collect():
+        stats = sessions.stats()
+        yield ('autoservice_sessions_active', 'gauge', 'Active API sessions.',
+               [({'backend': stats['backend']}, stats['active'])])
+    return collect
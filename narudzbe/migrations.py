@@ -0,0 +1,180 @@
+"""
+Auto Servis Pro - Schema migrations
+Numbered schema steps tracked with PRAGMA user_version
+"""
+
+import sqlite3
+from typing import List
+
+from search_index import create_search_index
+from rollups import create_rollups
+
+
+def table_version_triggers(table: str) -> List[str]:
+    """Statements that register a table in table_versions and bump its
+    counter on every insert, update and delete (from any process)."""
+    statements = [
+        f"INSERT OR IGNORE INTO table_versions (name, version) VALUES ('{table}', 0)",
+    ]
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        statements.append(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()}
+            AFTER {event} ON {table} BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+            END''')
+    return statements
+
+# Version 0 is the base schema created by AutoServiceDB.init_database().
+# Each step is (version, description, statements); a statement is either an
+# SQL string or a callable taking the raw sqlite3 connection. Steps are
+# append-only: never edit a released step, add a new one instead.
+MIGRATIONS = [
+    (1, 'Indexes for hot appointment, notification, vehicle and reset-token queries', [
+        '''CREATE INDEX IF NOT EXISTS idx_appointments_user_date
+           ON appointments (user_id, appointment_date)''',
+        '''CREATE INDEX IF NOT EXISTS idx_appointments_status_date
+           ON appointments (status, appointment_date)''',
+        '''CREATE INDEX IF NOT EXISTS idx_appointments_date
+           ON appointments (appointment_date)''',
+        '''CREATE INDEX IF NOT EXISTS idx_notifications_user_read_sent
+           ON notifications (user_id, is_read, sent_at)''',
+        '''CREATE INDEX IF NOT EXISTS idx_notifications_user_sent
+           ON notifications (user_id, sent_at)''',
+        '''CREATE INDEX IF NOT EXISTS idx_vehicles_user
+           ON vehicles (user_id, created_at)''',
+        '''CREATE INDEX IF NOT EXISTS idx_users_reset_token
+           ON users (reset_token) WHERE reset_token IS NOT NULL''',
+    ]),
+    (2, 'FTS5 full-text search tables kept in sync by triggers', [
+        create_search_index,
+    ]),
+    (3, 'Index for keyset pagination of the user list', [
+        '''CREATE INDEX IF NOT EXISTS idx_users_created
+           ON users (created_at)''',
+    ]),
+    (4, 'Per-table version counters for cache invalidation (services, vehicle types)', [
+        '''CREATE TABLE IF NOT EXISTS table_versions (
+               name TEXT PRIMARY KEY,
+               version INTEGER NOT NULL DEFAULT 0
+           ) WITHOUT ROWID''',
+        *table_version_triggers('services'),
+        *table_version_triggers('vehicle_types'),
+    ]),
+    (5, 'Version counter for the settings table', [
+        *table_version_triggers('settings'),
+    ]),
+    (6, 'Shared API session store', [
+        '''CREATE TABLE IF NOT EXISTS sessions (
+            token_hash TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            user_data TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID''',
+        "CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)",
+        # A new password (from the API or the Tk app) ends every session of that user
+        '''CREATE TRIGGER IF NOT EXISTS trg_users_password_revoke_sessions
+           AFTER UPDATE OF password_hash ON users
+           WHEN NEW.password_hash IS NOT OLD.password_hash
+           BEGIN
+               DELETE FROM sessions WHERE user_id = NEW.id;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_users_delete_sessions
+           AFTER DELETE ON users
+           BEGIN
+               DELETE FROM sessions WHERE user_id = OLD.id;
+           END''',
+    ]),
+    (7, 'Version counters for HTTP ETags on appointments, vehicles and users', [
+        *table_version_triggers('appointments'),
+        *table_version_triggers('vehicles'),
+        *table_version_triggers('users'),
+    ]),
+    (8, 'Appointment change log for the live workshop board', [
+        '''CREATE TABLE IF NOT EXISTS appointment_changes (
+               seq INTEGER PRIMARY KEY AUTOINCREMENT,
+               appointment_id INTEGER NOT NULL,
+               change TEXT NOT NULL,
+               changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+           )''',
+        '''CREATE INDEX IF NOT EXISTS idx_appointment_changes_appointment
+           ON appointment_changes (appointment_id, seq)''',
+        '''CREATE TRIGGER IF NOT EXISTS appointments_change_insert
+           AFTER INSERT ON appointments BEGIN
+               INSERT INTO appointment_changes (appointment_id, change) VALUES (NEW.id, 'created');
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS appointments_change_update
+           AFTER UPDATE ON appointments BEGIN
+               INSERT INTO appointment_changes (appointment_id, change) VALUES (NEW.id,
+                   CASE WHEN NEW.status IS NOT OLD.status THEN 'status_changed'
+                        WHEN NEW.appointment_date IS NOT OLD.appointment_date THEN 'rescheduled'
+                        ELSE 'updated' END);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS appointments_change_delete
+           AFTER DELETE ON appointments BEGIN
+               INSERT INTO appointment_changes (appointment_id, change) VALUES (OLD.id, 'deleted');
+           END''',
+    ]),
+    (9, 'Daily appointment rollups (day x service x status) kept current by triggers', [
+        create_rollups,
+    ]),
+    # A login writes last_login; bumping 'users' for it would invalidate
+    # every client's appointments ETag and the cached reports
+    (10, 'Users version counter only for the columns ETags and reports show', [
+        'DROP TRIGGER IF EXISTS users_version_update',
+        '''CREATE TRIGGER IF NOT EXISTS users_version_update
+           AFTER UPDATE OF username, full_name, email, phone, role ON users BEGIN
+               UPDATE table_versions SET version = version + 1 WHERE name = 'users';
+           END''',
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def get_schema_version(conn) -> int:
+    """Return the schema version stored in PRAGMA user_version."""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn) -> List[int]:
+    """Apply all pending migrations, one transaction per step.
+
+    Returns the list of versions that were applied.
+    """
+    raw = getattr(conn, 'raw', conn)
+    applied = []
+    current = get_schema_version(raw)
+
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+
+        if raw.in_transaction:
+            raw.commit()
+        old_isolation = raw.isolation_level
+        raw.isolation_level = None
+        try:
+            raw.execute('BEGIN IMMEDIATE')
+            # Another process may have migrated while we waited for the lock
+            if get_schema_version(raw) >= version:
+                raw.execute('ROLLBACK')
+                continue
+            for statement in statements:
+                if callable(statement):
+                    statement(raw)
+                else:
+                    raw.execute(statement)
+            raw.execute(f'PRAGMA user_version = {int(version)}')
+            raw.execute('COMMIT')
+        except sqlite3.Error:
+            if raw.in_transaction:
+                raw.execute('ROLLBACK')
+            raise
+        finally:
+            raw.isolation_level = old_isolation
+
+        applied.append(version)
+
+    return applied
@@ -0,0 +1,63 @@
+"""
+Auto Servis Pro - Keyset pagination helpers
+Opaque cursors for (sort_key, id) pages that stay O(page) at any depth
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta
+from typing import Any, List, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    """Clamp a requested page size into [1, MAX_PAGE_SIZE]."""
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """Encode the last row's (sort value, id) into an opaque URL-safe token."""
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    """Decode a cursor produced by encode_cursor; raises ValueError if malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return sort_value, int(row_id)
+    except Exception:
+        raise ValueError('Invalid pagination cursor')
+
+
+def date_upper_bound(value: str) -> Tuple[str, str]:
+    """Return (operator, bound) for an inclusive 'date_to' filter.
+
+    A plain date like '2025-03-31' covers the whole day, so it becomes
+    '< 2025-04-01'; a full timestamp is compared with '<='.
+    """
+    try:
+        day = datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        return '<=', value
+    return '<', (day + timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+def build_page(rows: List[dict], limit: int, sort_key: str) -> dict:
+    """Trim the extra look-ahead row and build the page dict."""
+    has_more = len(rows) > limit
+    items = rows[:limit]
+    next_cursor = None
+    if has_more and items:
+        last = items[-1]
+        next_cursor = encode_cursor(last[sort_key], last['id'])
+    return {
+        'items': items,
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+    }
@@ -162,7 +162,143 @@ class AppointmentPrinter:
         
         page_number = f"Page 1"
         c.drawRightString(self.page_width - 2*cm, 2*cm, page_number)
-    
+
+    def generate_report_pdf(self, report, filename=None):
+        """
+        Generate PDF for a report from reports.ReportEngine
+
+        Args:
+            report (dict): Report with title, columns, rows and summary
+            filename (str): Optional filename, auto-generated if not provided
+
+        Returns:
+            str: Path to generated PDF file
+        """
+        if not filename:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"report_{report['kind']}_{timestamp}.pdf"
+
+        filepath = os.path.join(self.output_dir, filename)
+        font, bold = self._report_fonts()
+
+        c = canvas.Canvas(filepath, pagesize=A4)
+        c.setTitle(report['title'])
+
+        params = report['params']
+        subtitle = f"Period: {params['date_from'] or '...'} - {params['date_to'] or '...'}"
+        left, right = 2*cm, self.page_width - 2*cm
+        widths = self._report_column_widths(report, right - left)
+        row_height = 0.55*cm
+        page = 1
+
+        def start_page():
+            c.setFont(bold, 16)
+            c.drawString(left, self.page_height - 2.5*cm, report['title'])
+            c.setFont(font, 9)
+            c.drawString(left, self.page_height - 3*cm, subtitle)
+            c.drawRightString(right, self.page_height - 3*cm, f"Generated: {report['generated_at']}")
+            c.setLineWidth(1)
+            c.line(left, self.page_height - 3.3*cm, right, self.page_height - 3.3*cm)
+            c.setFont(font, 8)
+            c.drawString(left, 1.5*cm, "Auto Servis - Professional Car Service")
+            c.drawRightString(right, 1.5*cm, f"Page {page}")
+            return self.page_height - 4.2*cm
+
+        def draw_row(y, values, font_name):
+            c.setFont(font_name, 8)
+            x = left
+            for value, width in zip(values, widths):
+                text = self._fit_text(c, self._report_cell(value), font_name, 8, width - 0.2*cm)
+                if isinstance(value, (int, float)):
+                    c.drawRightString(x + width - 0.1*cm, y, text)
+                else:
+                    c.drawString(x + 0.1*cm, y, text)
+                x += width
+
+        y = start_page()
+
+        # Summary block
+        c.setFont(bold, 11)
+        c.drawString(left, y, "Sažetak")
+        y -= 0.6*cm
+        for label, value in report['summary']:
+            c.setFont(font, 9)
+            c.drawString(left + 0.3*cm, y, f"{label}:")
+            c.drawString(left + 7*cm, y, str(value))
+            y -= 0.5*cm
+        y -= 0.4*cm
+
+        def draw_header(y):
+            c.setFillColor(colors.lightgrey)
+            c.rect(left, y - 0.15*cm, right - left, row_height, stroke=0, fill=1)
+            c.setFillColor(colors.black)
+            draw_row(y, report['columns'], bold)
+            return y - row_height
+
+        # Table, header repeated on every page
+        y = draw_header(y)
+        for values in report['rows']:
+            if y < 2.5*cm:
+                c.showPage()
+                page += 1
+                y = draw_header(start_page())
+            draw_row(y, values, font)
+            y -= row_height
+        if not report['rows']:
+            c.setFont(font, 9)
+            c.drawString(left, y, "Nema podataka za izabrani period.")
+
+        c.save()
+        return filepath
+
+    def _report_fonts(self):
+        """TTF font with č/ć/đ if one is installed, else the built-in Helvetica"""
+        candidates = [
+            ("DejaVuSans.ttf", "DejaVuSans-Bold.ttf"),
+            ("arial.ttf", "arialbd.ttf"),
+            ("Arial.ttf", "Arial Bold.ttf"),
+        ]
+        folders = [
+            "/usr/share/fonts/truetype/dejavu",
+            "/usr/share/fonts/TTF",
+            "/Library/Fonts",
+            os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts"),
+        ]
+        for regular, bold in candidates:
+            for folder in folders:
+                regular_path = os.path.join(folder, regular)
+                bold_path = os.path.join(folder, bold)
+                if os.path.exists(regular_path) and os.path.exists(bold_path):
+                    try:
+                        pdfmetrics.registerFont(TTFont("ReportFont", regular_path))
+                        pdfmetrics.registerFont(TTFont("ReportFont-Bold", bold_path))
+                        return "ReportFont", "ReportFont-Bold"
+                    except Exception as e:
+                        print(f"Font error ({regular_path}): {e}")
+        return "Helvetica", "Helvetica-Bold"
+
+    def _report_column_widths(self, report, total_width):
+        """Split the page width by the longest text in each column"""
+        sample = [report['columns']] + report['rows'][:200]
+        lengths = [max(4, min(30, max(len(self._report_cell(row[i])) for row in sample)))
+                   for i in range(len(report['columns']))]
+        return [total_width * length / sum(lengths) for length in lengths]
+
+    @staticmethod
+    def _report_cell(value):
+        if isinstance(value, float):
+            return f"{value:.2f}"
+        return "" if value is None else str(value)
+
+    @staticmethod
+    def _fit_text(c, text, font_name, size, width):
+        """Cut text with '...' so it fits in width"""
+        if c.stringWidth(text, font_name, size) <= width:
+            return text
+        while text and c.stringWidth(text + "...", font_name, size) > width:
+            text = text[:-1]
+        return text + "..."
+
     def print_pdf(self, filepath):
         """
         Print PDF file using system default printer
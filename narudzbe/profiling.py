@@ -0,0 +1,270 @@
+"""
+Auto Servis Pro - Request profiling
+On-demand cProfile or sampling profiles of single API requests, kept in a ring buffer
+"""
+
+import cProfile
+import hashlib
+import hmac
+import io
+import itertools
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MODES = ('cprofile', 'sample')
+FORMATS = ('text', 'pstats', 'collapsed')
+
+# Per-request state lives in the WSGI environ, so /api/batch sub-requests
+# (which share the thread and the app context) do not clobber it
+ENVIRON_KEY = 'autoservice.profile'
+
+
+class SamplingProfiler:
+    """Records one thread's call stack every ``interval`` seconds.
+
+    Runs on a helper thread and only reads sys._current_frames(), so the
+    profiled request runs at full speed; the result is a Counter of
+    collapsed stacks ('outer;inner;leaf' -> samples) for flamegraph tools.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self) -> 'SamplingProfiler':
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+
+class RequestProfiler:
+    """Profiles selected requests and keeps the last ``capacity`` results.
+
+    A request is profiled when it carries a signed profile token (see
+    make_token), when an admin asks for it explicitly, or at random with
+    probability ``sample_rate``. Only one request is profiled at a time;
+    others that ask meanwhile simply run unprofiled.
+    """
+
+    def __init__(self, secret: bytes, capacity: int = 20, sample_rate: float = 0.0,
+                 sample_mode: str = 'cprofile', interval: float = 0.001):
+        self._secret = secret
+        self._profiles = deque(maxlen=capacity)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._active = threading.Lock()
+        self.sample_rate = sample_rate
+        self.sample_mode = sample_mode
+        self.interval = interval
+        self.skipped = 0
+
+    # ---- triggers --------------------------------------------------------
+
+    def make_token(self, ttl: int = 600, mode: str = 'cprofile') -> str:
+        """Token that turns on profiling for any request sending it, until it expires."""
+        payload = f"{int(time.time()) + int(ttl)}.{mode}"
+        return f"{payload}.{self._sign(payload)}"
+
+    def check_token(self, token: str) -> Optional[str]:
+        """Profiling mode of a valid, unexpired token (None otherwise)."""
+        try:
+            expires, mode, signature = token.split('.')
+            expires = int(expires)
+        except ValueError:
+            return None
+        if mode not in MODES or expires < time.time():
+            return None
+        if not hmac.compare_digest(signature, self._sign(f"{expires}.{mode}")):
+            return None
+        return mode
+
+    def _sign(self, payload: str) -> str:
+        return hmac.new(self._secret, payload.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def sampled(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def set_sampling(self, rate: float, mode: str = None):
+        self.sample_rate = min(max(float(rate), 0.0), 1.0)
+        if mode:
+            self.sample_mode = mode
+
+    # ---- one request -------------------------------------------------------
+
+    def start(self, mode: str) -> Optional[Tuple[str, Any, float]]:
+        """Start profiling the current thread; None if another profile is running."""
+        if not self._active.acquire(blocking=False):
+            self.skipped += 1
+            return None
+        try:
+            if mode == 'sample':
+                profiler = SamplingProfiler(threading.get_ident(), self.interval).start()
+            else:
+                profiler = cProfile.Profile()
+                profiler.enable()
+        except Exception:
+            self._active.release()
+            raise
+        return mode, profiler, time.perf_counter()
+
+    def finish(self, session, info: Dict[str, Any]) -> int:
+        """Stop the profiler from start() and store the result with request info."""
+        mode, profiler, started = session
+        try:
+            if mode == 'sample':
+                data = profiler.stop()
+            else:
+                profiler.disable()
+                profiler.create_stats()
+                data = profiler.stats
+        finally:
+            self._active.release()
+
+        entry = dict(info)
+        entry.update({
+            'id': next(self._ids),
+            'mode': mode,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+            'created_at': datetime.now().isoformat(),
+            '_data': data,
+        })
+        with self._lock:
+            self._profiles.append(entry)
+        return entry['id']
+
+    # ---- results -----------------------------------------------------------
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{k: v for k, v in p.items() if k != '_data'} for p in reversed(self._profiles)]
+
+    def get(self, profile_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for profile in self._profiles:
+                if profile['id'] == profile_id:
+                    return profile
+        return None
+
+    def render(self, profile: Dict[str, Any], fmt: str = 'text', limit: int = 50) -> Tuple[bytes, str]:
+        """(body, content type) of a stored profile.
+
+        text: pstats report by cumulative time (cprofile) or the heaviest
+        stacks (sample); pstats: marshalled stats, loadable with
+        pstats.Stats(path) or snakeviz; collapsed: 'a;b;c count' lines for
+        flamegraph.pl / speedscope (sample mode only).
+        """
+        data = profile['_data']
+        if profile['mode'] == 'sample':
+            if fmt == 'pstats':
+                raise ValueError("pstats format needs a cprofile profile")
+            lines = [f"{stack} {count}" for stack, count in data.most_common()]
+            if fmt == 'text':
+                lines = lines[:limit]
+            return ('\n'.join(lines) + '\n').encode(), 'text/plain; charset=utf-8'
+
+        if fmt == 'collapsed':
+            raise ValueError("collapsed format needs a sample profile")
+        if fmt == 'pstats':
+            return marshal.dumps(data), 'application/octet-stream'
+        out = io.StringIO()
+        stats = pstats.Stats(_StatsSource(data), stream=out)
+        stats.sort_stats('cumulative').print_stats(limit)
+        return out.getvalue().encode(), 'text/plain; charset=utf-8'
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stored = len(self._profiles)
+        return {
+            'stored': stored,
+            'capacity': self._profiles.maxlen,
+            'sample_rate': self.sample_rate,
+            'sample_mode': self.sample_mode,
+            'skipped_busy': self.skipped,
+        }
+
+
+class _StatsSource:
+    """Minimal object pstats.Stats() accepts in place of a Profile."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def instrument_app(app, profiler: RequestProfiler, is_admin: Callable[[], bool]):
+    """Profile flagged or sampled Flask requests; the response gets X-Profile-Id.
+
+    Flag a request with the X-Profile header or ?profile= parameter: either
+    a token from make_token(), or a mode name (cprofile, sample) when the
+    caller is an admin. Streams are never profiled.
+    """
+    from flask import request
+
+    def requested_mode() -> Optional[str]:
+        flag = request.headers.get('X-Profile') or request.args.get('profile')
+        if flag:
+            if flag in MODES or flag == '1':
+                return ('cprofile' if flag == '1' else flag) if is_admin() else None
+            return profiler.check_token(flag)
+        return profiler.sample_mode if profiler.sampled() else None
+
+    def finish(status: int) -> Optional[int]:
+        session = request.environ.pop(ENVIRON_KEY, None)
+        if session is None:
+            return None
+        return profiler.finish(session, {
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'route': request.url_rule.rule if request.url_rule is not None else None,
+            'status': status,
+        })
+
+    @app.before_request
+    def _profile_begin():
+        if request.path.endswith('/stream'):
+            return
+        mode = requested_mode()
+        if mode:
+            session = profiler.start(mode)
+            if session is not None:
+                request.environ[ENVIRON_KEY] = session
+
+    @app.after_request
+    def _profile_end(response):
+        profile_id = finish(response.status_code)
+        if profile_id is not None:
+            response.headers['X-Profile-Id'] = str(profile_id)
+        return response
+
+    @app.teardown_request
+    def _profile_teardown(exc):
+        # Unhandled exceptions skip after_request
+        finish(500)
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Auto Servis Pro - Slow query log
+Opt-in tracer: every statement is timed and the slow ones are written to a
+rotating JSONL file together with their EXPLAIN QUERY PLAN
+
+    AutoServiceDB(slow_query_ms=50)            # or DB_SLOW_QUERY_MS=50 for the API
+    python narudzbe/query_log.py slow_queries.jsonl [--top 20] [--by total|max|count]
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+# Statements worth an EXPLAIN QUERY PLAN
+_EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+PLAN_CACHE_SIZE = 256
+PLAN_CACHE_TTL = 300.0
+
+
+def normalize_sql(sql: str) -> str:
+    """SQL with literals replaced by ? and whitespace collapsed, for grouping."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (?...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def params_shape(params) -> Any:
+    """Types of the bound parameters, never their values (they hold passwords, e-mails...)."""
+    if params is None:
+        return []
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    try:
+        shape = [type(value).__name__ for value in params]
+    except TypeError:
+        return type(params).__name__
+    if len(shape) > 20:
+        return shape[:20] + [f'... ({len(shape)} total)']
+    return shape
+
+
+def _caller() -> Optional[str]:
+    """Name of the public AutoServiceDB method that ran the statement."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename.endswith('database.py') and not code.co_name.startswith('_'):
+            return code.co_name
+        frame = frame.f_back
+    return None
+
+
+class SlowQueryLog:
+    """Writes statements slower than threshold_ms to a rotating JSONL file.
+
+    The plan of each distinct (normalized) statement is looked up once per
+    PLAN_CACHE_TTL seconds, so a query that is slow on every call does not
+    pay for a second EXPLAIN each time.
+    """
+
+    def __init__(self, path: str = 'slow_queries.jsonl', threshold_ms: float = 100.0,
+                 max_bytes: int = 5 * 1024 * 1024, backups: int = 3, explain: bool = True):
+        self.path = path
+        self.threshold = threshold_ms / 1000.0
+        self.explain = explain
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self.statements = 0
+        self.slow = 0
+
+        self._logger = logging.getLogger(f'autoservice.slow_queries.{id(self)}')
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                            encoding='utf-8', delay=True)
+        self._handler.setFormatter(logging.Formatter('%(message)s'))
+        self._logger.addHandler(self._handler)
+
+    def connection_factory(self):
+        """sqlite3.connect(factory=...) class whose cursors report to this log."""
+        log = self
+
+        class Connection(TracingConnection):
+            query_log = log
+        return Connection
+
+    def record(self, conn: sqlite3.Connection, sql: str, params, elapsed: float, rows: int):
+        with self._lock:
+            self.statements += 1
+        if elapsed < self.threshold:
+            return
+        normalized = normalize_sql(sql)
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'ms': round(elapsed * 1000, 3),
+            'sql': normalized,
+            'params': params_shape(params),
+            'rows': rows,
+            'method': _caller(),
+            'plan': self._plan(conn, sql, normalized, params) if self.explain else None,
+        }
+        with self._lock:
+            self.slow += 1
+        self._logger.info(json.dumps(entry, ensure_ascii=False))
+
+    def _plan(self, conn, sql: str, normalized: str, params) -> Optional[List[str]]:
+        if not normalized.upper().startswith(_EXPLAINABLE):
+            return None
+        now = time.monotonic()
+        with self._lock:
+            cached = self._plans.get(normalized)
+            if cached is not None and now - cached[0] < PLAN_CACHE_TTL:
+                return cached[1]
+        try:
+            rows = sqlite3.Connection.execute(conn, f'EXPLAIN QUERY PLAN {sql}',
+                                              params if params is not None else ()).fetchall()
+            plan = [row[3] for row in rows]
+        except sqlite3.Error as e:
+            plan = [f'EXPLAIN failed: {e}']
+        with self._lock:
+            self._plans[normalized] = (now, plan)
+            self._plans.move_to_end(normalized)
+            while len(self._plans) > PLAN_CACHE_SIZE:
+                self._plans.popitem(last=False)
+        return plan
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'path': self.path,
+                'threshold_ms': self.threshold * 1000,
+                'statements': self.statements,
+                'slow': self.slow,
+            }
+
+    def close(self):
+        self._logger.removeHandler(self._handler)
+        self._handler.close()
+
+
+class TracingCursor(sqlite3.Cursor):
+    """Cursor that times execute() plus the fetch that reads its rows.
+
+    A statement is reported when its rows have been read (fetchall, or the
+    first fetchone/fetchmany), or right after execute() if it returns none.
+    """
+
+    _pending = None
+
+    def execute(self, sql, parameters=()):
+        self._report()
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        self._pending = [sql, parameters, time.perf_counter() - start]
+        if self.description is None:
+            self._report(max(self.rowcount, 0))
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._report()
+        # The first parameter set stands in for the batch in the log and
+        # for EXPLAIN, which needs real bindings
+        parameters = iter(seq_of_parameters)
+        first = next(parameters, None)
+        batch = parameters if first is None else itertools.chain([first], parameters)
+        start = time.perf_counter()
+        super().executemany(sql, batch)
+        self._pending = [sql, first, time.perf_counter() - start]
+        self._report(max(self.rowcount, 0))
+        return self
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._report(len(rows), time.perf_counter() - start)
+        return rows
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._report(0 if row is None else 1, time.perf_counter() - start)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(size) if size is not None else super().fetchmany()
+        self._report(len(rows), time.perf_counter() - start)
+        return rows
+
+    def close(self):
+        self._report()
+        super().close()
+
+    def _report(self, rows: int = 0, extra: float = 0.0):
+        pending = self._pending
+        if pending is None:
+            return
+        self._pending = None
+        sql, params, elapsed = pending
+        self.connection.query_log.record(self.connection, sql, params, elapsed + extra, rows)
+
+
+class TracingConnection(sqlite3.Connection):
+    """Connection whose cursors (and execute shortcuts) are traced."""
+
+    query_log: SlowQueryLog = None
+
+    def cursor(self, factory=TracingCursor):
+        return super().cursor(factory)
+
+    # sqlite3.Connection.execute() would bypass cursor(), so route it through
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# ==================== CLI ====================
+
+def read_entries(path: str) -> List[Dict[str, Any]]:
+    """Entries from path and its rotated backups (path.1, path.2, ...), oldest first."""
+    files = []
+    n = 1
+    while os.path.exists(f'{path}.{n}'):
+        files.append(f'{path}.{n}')
+        n += 1
+    files = list(reversed(files))
+    if os.path.exists(path):
+        files.append(path)
+
+    entries = []
+    for name in files:
+        with open(name, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+    return entries
+
+
+def summarize(entries: List[Dict[str, Any]], by: str = 'total') -> List[Dict[str, Any]]:
+    """Group entries by normalized SQL, worst first."""
+    groups = {}
+    for entry in entries:
+        group = groups.get(entry['sql'])
+        if group is None:
+            group = groups[entry['sql']] = {
+                'sql': entry['sql'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                'rows': 0, 'methods': set(), 'plan': None,
+            }
+        group['count'] += 1
+        group['total_ms'] += entry['ms']
+        group['max_ms'] = max(group['max_ms'], entry['ms'])
+        group['rows'] += entry.get('rows') or 0
+        if entry.get('method'):
+            group['methods'].add(entry['method'])
+        if entry.get('plan'):
+            group['plan'] = entry['plan']
+
+    key = {'total': 'total_ms', 'max': 'max_ms', 'count': 'count'}[by]
+    result = sorted(groups.values(), key=lambda g: g[key], reverse=True)
+    for group in result:
+        group['avg_ms'] = group['total_ms'] / group['count']
+        group['avg_rows'] = group['rows'] / group['count']
+        group['methods'] = sorted(group['methods'])
+        group['full_scan'] = any(step.startswith('SCAN') for step in group['plan'] or [])
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Auto Servis Pro - najsporiji upiti iz slow query loga")
+    parser.add_argument('path', nargs='?', default=os.environ.get('DB_SLOW_QUERY_LOG', 'slow_queries.jsonl'))
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--by', choices=['total', 'max', 'count'], default='total')
+    parser.add_argument('--json', action='store_true', help='print the summary as JSON')
+    args = parser.parse_args(argv)
+
+    entries = read_entries(args.path)
+    if not entries:
+        print(f"Nema zapisa u {args.path}")
+        return
+    top = summarize(entries, args.by)[:args.top]
+
+    if args.json:
+        print(json.dumps(top, indent=2, ensure_ascii=False))
+        return
+
+    print("=" * 72)
+    print(f"  {len(entries)} sporih upita, {len(top)} najgorih po '{args.by}'")
+    print("=" * 72)
+    for i, group in enumerate(top, 1):
+        flag = '  [FULL SCAN]' if group['full_scan'] else ''
+        print(f"\n#{i}  {group['count']}x  total {group['total_ms']:.1f} ms  "
+              f"avg {group['avg_ms']:.1f} ms  max {group['max_ms']:.1f} ms  "
+              f"avg rows {group['avg_rows']:.0f}{flag}")
+        if group['methods']:
+            print(f"    method: {', '.join(group['methods'])}")
+        sql = group['sql']
+        print(f"    sql:    {sql if len(sql) <= 300 else sql[:300] + ' ...'}")
+        for step in group['plan'] or []:
+            print(f"    plan:   {step}")
+
+
+if __name__ == '__main__':
+    main()
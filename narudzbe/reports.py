@@ -0,0 +1,269 @@
+"""
+Auto Servis Pro - Reports
+Izvještaji za tab Izvještaji: agregatni SQL, keš po verziji podataka i izvoz u CSV / PDF
+"""
+
+import csv
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+REPORTS = {
+    'appointments': "Izvještaj o terminima",
+    'finance': "Finansijski izvještaj",
+    'customers': "Izvještaj o korisnicima",
+    'services': "Izvještaj o uslugama",
+}
+PERIODS = {'day': "Dan", 'week': "Sedmica", 'month': "Mjesec"}
+
+STATUS_LABELS = OrderedDict([
+    ('pending', "Na čekanju"),
+    ('scheduled', "Zakazano"),
+    ('confirmed', "Potvrđeno"),
+    ('in_progress', "U toku"),
+    ('completed', "Završeno"),
+    ('cancelled', "Otkazano"),
+])
+
+CUSTOMER_LIMIT = 100
+CACHE_SIZE = 32
+
+# A cached report is valid while these table_versions counters stay put
+SOURCE_TABLES = ('appointments', 'services', 'users')
+
+
+def default_range() -> Tuple[str, str]:
+    """Tekuća godina (od, do)."""
+    year = date.today().year
+    return f"{year}-01-01", f"{year}-12-31"
+
+
+def _status_label(status: str) -> str:
+    return STATUS_LABELS.get(status, status or "-")
+
+
+def _money(value) -> float:
+    return round(float(value or 0), 2)
+
+
+class ReportEngine:
+    """Builds the Reports tab's reports from AutoServiceDB aggregates.
+
+    A report is a plain dict: kind, title, columns, rows (lists of plain
+    values, ready for CSV), summary ([label, value] pairs), params,
+    generated_at, elapsed_ms and cached. Results are cached per (kind,
+    params) together with the table_versions of SOURCE_TABLES; those
+    counters are bumped by triggers on every write from any process, so a
+    cached report is served only while the data it was built from has not
+    changed.
+    """
+
+    def __init__(self, db, cache_size: int = CACHE_SIZE):
+        self.db = db
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def run(self, kind: str, date_from: str = None, date_to: str = None,
+            period: str = 'month') -> Dict[str, Any]:
+        """Report kind for [date_from, date_to] (inclusive), from the cache if still valid."""
+        if kind not in REPORTS:
+            raise ValueError(f"Nepoznat izvještaj: {kind}")
+        if period not in PERIODS:
+            raise ValueError(f"Nepoznat period: {period}")
+        key = (kind, date_from, date_to, period if kind in ('appointments', 'finance') else None)
+
+        version = self.db.get_table_versions(*SOURCE_TABLES)
+        cacheable = None not in version
+        with self._lock:
+            cached = self._cache.get(key)
+            if cacheable and cached is not None and cached[0] == version:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return dict(cached[1], cached=True)
+            self.misses += 1
+
+        start = time.perf_counter()
+        builder = getattr(self, f'_build_{kind}')
+        columns, rows, summary = builder(date_from, date_to, period)
+        report = {
+            'kind': kind,
+            'title': REPORTS[kind],
+            'columns': columns,
+            'rows': rows,
+            'summary': summary,
+            'params': {'date_from': date_from, 'date_to': date_to,
+                       'period': key[3]},
+            'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 1),
+            'cached': False,
+        }
+        if cacheable:
+            with self._lock:
+                self._cache[key] = (version, report)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return report
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'entries': len(self._cache), 'hits': self.hits, 'misses': self.misses}
+
+    # ---- builders: (columns, rows, summary) ---------------------------------
+
+    def _build_appointments(self, date_from, date_to, period):
+        totals = self.db.get_appointment_totals(date_from, date_to, period)
+        statuses = self._statuses(totals)
+        by_period = OrderedDict()
+        for row in totals:
+            counts = by_period.setdefault(row['period'], {})
+            counts[row['status']] = row['count']
+
+        rows = []
+        for label, counts in by_period.items():
+            rows.append([label, sum(counts.values())] + [counts.get(s, 0) for s in statuses])
+
+        overall = {s: sum(r['count'] for r in totals if r['status'] == s) for s in statuses}
+        total = sum(overall.values())
+        summary = [["Ukupno termina", total]]
+        for status in statuses:
+            share = f" ({overall[status] * 100 / total:.1f}%)" if total else ""
+            summary.append([_status_label(status), f"{overall[status]}{share}"])
+        columns = [PERIODS[period], "Ukupno"] + [_status_label(s) for s in statuses]
+        return columns, rows, summary
+
+    def _build_finance(self, date_from, date_to, period):
+        totals = self.db.get_appointment_totals(date_from, date_to, period)
+        by_period = OrderedDict()
+        for row in totals:
+            entry = by_period.setdefault(row['period'], {'completed': 0, 'revenue': 0.0,
+                                                         'open': 0.0, 'cancelled': 0})
+            if row['status'] == 'completed':
+                entry['completed'] += row['count']
+                entry['revenue'] += row['revenue']
+            elif row['status'] == 'cancelled':
+                entry['cancelled'] += row['count']
+            else:
+                # Booked but not done yet: what the period can still bring in
+                entry['open'] += row['revenue']
+
+        rows = []
+        for label, e in by_period.items():
+            average = e['revenue'] / e['completed'] if e['completed'] else 0
+            rows.append([label, e['completed'], _money(e['revenue']), _money(average),
+                         _money(e['open']), e['cancelled']])
+
+        revenue = sum(e['revenue'] for e in by_period.values())
+        completed = sum(e['completed'] for e in by_period.values())
+        summary = [
+            ["Ukupan prihod", f"{revenue:.2f}"],
+            ["Završenih termina", completed],
+            ["Prosjek po terminu", f"{revenue / completed:.2f}" if completed else "0.00"],
+            ["Očekivani prihod (otvoreni termini)", f"{sum(e['open'] for e in by_period.values()):.2f}"],
+        ]
+        if rows:
+            best = max(rows, key=lambda r: r[2])
+            summary.append(["Najbolji period", f"{best[0]} ({best[2]:.2f})"])
+        columns = [PERIODS[period], "Završeno", "Prihod", "Prosjek", "Očekivano", "Otkazano"]
+        return columns, rows, summary
+
+    def _build_services(self, date_from, date_to, period):
+        services = OrderedDict()
+        for row in self.db.get_service_totals(date_from, date_to):
+            entry = services.setdefault(row['service_id'], {
+                'name': row['service_name'] or f"#{row['service_id']}",
+                'count': 0, 'completed': 0, 'cancelled': 0, 'revenue': 0.0, 'minutes': 0})
+            entry['count'] += row['count']
+            if row['status'] == 'completed':
+                entry['completed'] += row['count']
+                entry['revenue'] += row['revenue']
+            if row['status'] == 'cancelled':
+                entry['cancelled'] += row['count']
+            else:
+                entry['minutes'] += row['minutes']
+
+        total = sum(e['count'] for e in services.values())
+        ranked = sorted(services.values(), key=lambda e: (-e['count'], e['name']))
+        rows = [[e['name'], e['count'], e['completed'], e['cancelled'], _money(e['revenue']),
+                 round(e['minutes'] / 60, 1), round(e['count'] * 100 / total, 1) if total else 0]
+                for e in ranked]
+
+        summary = [["Usluga u upotrebi", len(rows)], ["Ukupno termina", total]]
+        if rows:
+            summary.append(["Najpopularnija usluga", f"{rows[0][0]} ({rows[0][1]})"])
+            top_revenue = max(rows, key=lambda r: r[4])
+            summary.append(["Najveći prihod", f"{top_revenue[0]} ({top_revenue[4]:.2f})"])
+        columns = ["Usluga", "Termina", "Završeno", "Otkazano", "Prihod", "Sati rada", "Udio %"]
+        return columns, rows, summary
+
+    def _build_customers(self, date_from, date_to, period):
+        customers = self.db.get_customer_totals(date_from, date_to)
+        rows = []
+        for c in customers[:CUSTOMER_LIMIT]:
+            rows.append([c['full_name'] or c['username'] or f"#{c['user_id']}", c['email'] or "",
+                         c['count'], c['completed'] or 0, c['cancelled'] or 0,
+                         _money(c['revenue']), str(c['last_appointment'] or '')[:16]])
+
+        revenue = sum(c['revenue'] or 0 for c in customers)
+        summary = [
+            ["Aktivnih klijenata", len(customers)],
+            ["Termina po klijentu", f"{sum(c['count'] for c in customers) / len(customers):.1f}"
+             if customers else "0"],
+            ["Ukupan prihod", f"{revenue:.2f}"],
+        ]
+        if len(customers) > CUSTOMER_LIMIT:
+            summary.append(["Prikazano", f"prvih {CUSTOMER_LIMIT} po prihodu"])
+        columns = ["Klijent", "Email", "Termina", "Završeno", "Otkazano", "Prihod", "Posljednji termin"]
+        return columns, rows, summary
+
+    @staticmethod
+    def _statuses(totals: List[Dict]) -> List[str]:
+        """Statuses present in totals, known ones in workflow order."""
+        present = {row['status'] for row in totals}
+        known = [s for s in STATUS_LABELS if s in present]
+        return known + sorted(present - set(known))
+
+
+# ==================== IZVOZ ====================
+
+def export_csv(report: Dict[str, Any], path: str, delimiter: str = ',') -> str:
+    """Zapiši izvještaj u CSV (UTF-8 sa BOM-om, da ga Excel otvori sa našim slovima)."""
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        writer.writerow(report['columns'])
+        writer.writerows(report['rows'])
+    return path
+
+
+def export_pdf(report: Dict[str, Any], path: str) -> str:
+    """Zapiši izvještaj u PDF preko pdf_printer (treba reportlab)."""
+    import os
+    from pdf_printer import AppointmentPrinter  # reportlab je spor za import
+
+    printer = AppointmentPrinter(output_dir=os.path.dirname(os.path.abspath(path)))
+    return printer.generate_report_pdf(report, os.path.basename(path))
+
+
+def describe_range(report: Dict[str, Any]) -> str:
+    params = report['params']
+    text = f"{params['date_from'] or '...'} - {params['date_to'] or '...'}"
+    if params.get('period'):
+        text += f", po periodu: {PERIODS[params['period']].lower()}"
+    return text
+
+
+def parse_day(value: str) -> Optional[str]:
+    """'YYYY-MM-DD' ili None za prazno polje; ValueError za neispravan datum."""
+    value = (value or '').strip()
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
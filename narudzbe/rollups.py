@@ -0,0 +1,166 @@
+"""
+Auto Servis Pro - Daily rollups
+Dnevni zbirovi termina (dan × usluga × status) za izvještaje i kontrolnu tablu,
+ažurirani triggerima pri svakoj izmjeni termina
+
+    python narudzbe/rollups.py [autoservice.db] [--check]
+"""
+
+import argparse
+import os
+import sys
+from typing import List
+
+# One row per (day, service_id, status) that has appointments. status is
+# lower-cased (the Tk app and the API do not agree on case), a missing
+# service is service_id 0, and minutes is always count * the service's
+# current duration_minutes, so it can be derived for a rebuild and kept
+# when a duration changes. Reading a year costs ~365 * services * statuses
+# rows, however many appointments there are.
+TABLE = 'appointment_daily_rollups'
+
+_DAY = "substr({row}.appointment_date, 1, 10)"
+_STATUS = "LOWER(COALESCE({row}.status, ''))"
+_SERVICE = "COALESCE({row}.service_id, 0)"
+_DURATION = "COALESCE((SELECT duration_minutes FROM services WHERE id = {row}.service_id), 0)"
+
+
+def _key(row: str) -> str:
+    return (f"day = {_DAY.format(row=row)} AND service_id = {_SERVICE.format(row=row)} "
+            f"AND status = {_STATUS.format(row=row)}")
+
+
+def _add(row: str) -> str:
+    """Count the appointment in row (new/old) into its rollup."""
+    return f'''
+        INSERT INTO {TABLE} (day, service_id, status, count, revenue, minutes)
+        VALUES ({_DAY.format(row=row)}, {_SERVICE.format(row=row)}, {_STATUS.format(row=row)},
+                1, COALESCE({row}.total_price, 0), {_DURATION.format(row=row)})
+        ON CONFLICT (day, service_id, status) DO UPDATE SET
+            count = count + 1,
+            revenue = revenue + excluded.revenue,
+            minutes = minutes + excluded.minutes;'''
+
+
+def _subtract(row: str) -> str:
+    """Take the appointment in row (old) out of its rollup, dropping emptied rows."""
+    return f'''
+        UPDATE {TABLE} SET
+            count = count - 1,
+            revenue = revenue - COALESCE({row}.total_price, 0),
+            minutes = minutes - {_DURATION.format(row=row)}
+        WHERE {_key(row)};
+        DELETE FROM {TABLE} WHERE {_key(row)} AND count <= 0;'''
+
+
+SCHEMA = [
+    f'''CREATE TABLE IF NOT EXISTS {TABLE} (
+        day TEXT NOT NULL,
+        service_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0,
+        minutes INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, service_id, status)
+    ) WITHOUT ROWID''',
+
+    f'''CREATE TRIGGER IF NOT EXISTS appointments_rollup_ai AFTER INSERT ON appointments BEGIN
+        {_add('new')}
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS appointments_rollup_ad AFTER DELETE ON appointments BEGIN
+        {_subtract('old')}
+    END''',
+    # Only the columns a rollup depends on; other updates cost nothing here
+    f'''CREATE TRIGGER IF NOT EXISTS appointments_rollup_au
+    AFTER UPDATE OF appointment_date, service_id, status, total_price ON appointments BEGIN
+        {_subtract('old')}
+        {_add('new')}
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS services_rollup_duration
+    AFTER UPDATE OF duration_minutes ON services
+    WHEN NEW.duration_minutes IS NOT OLD.duration_minutes BEGIN
+        UPDATE {TABLE} SET minutes = count * COALESCE(new.duration_minutes, 0)
+        WHERE service_id = new.id;
+    END''',
+]
+
+# The rollup rows as a from-scratch aggregate of appointments
+AGGREGATE = f'''
+    SELECT t.day, t.service_id, t.status, t.count, t.revenue,
+           t.count * COALESCE(s.duration_minutes, 0) as minutes
+    FROM (
+        SELECT {_DAY.format(row='a')} as day, {_SERVICE.format(row='a')} as service_id,
+               {_STATUS.format(row='a')} as status,
+               COUNT(*) as count, COALESCE(SUM(a.total_price), 0) as revenue
+        FROM appointments a
+        GROUP BY 1, 2, 3
+    ) t
+    LEFT JOIN services s ON s.id = t.service_id'''
+
+REBUILD = [
+    f"DELETE FROM {TABLE}",
+    f"INSERT INTO {TABLE} (day, service_id, status, count, revenue, minutes) {AGGREGATE}",
+]
+
+
+def create_rollups(conn):
+    """Create the rollup table and triggers (idempotent) and fill it from appointments.
+
+    Used as a migration step.
+    """
+    for statement in SCHEMA:
+        conn.execute(statement)
+    rebuild_rollups(conn)
+
+
+def rebuild_rollups(conn):
+    """Regenerate every rollup row from the appointments table."""
+    for statement in REBUILD:
+        conn.execute(statement)
+
+
+def rollup_differences(conn) -> List[tuple]:
+    """Rollup rows that do not match a fresh aggregate: (day, service_id, status, stored, expected)."""
+    fresh = {}
+    for row in conn.execute(AGGREGATE):
+        fresh[tuple(row[:3])] = (row[3], round(row[4], 2), row[5])
+    stored = {}
+    for row in conn.execute(f"SELECT day, service_id, status, count, revenue, minutes FROM {TABLE}"):
+        stored[tuple(row[:3])] = (row[3], round(row[4], 2), row[5])
+    return [(*key, stored.get(key), fresh.get(key))
+            for key in sorted(set(fresh) | set(stored))
+            if stored.get(key) != fresh.get(key)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Auto Servis Pro - ponovo izgradi dnevne zbirove termina")
+    parser.add_argument('path', nargs='?', default='autoservice.db')
+    parser.add_argument('--check', action='store_true',
+                        help='only compare the rollups with the appointments, change nothing')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        print(f"Baza ne postoji: {args.path}")
+        sys.exit(1)
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from database import AutoServiceDB
+
+    db = AutoServiceDB(args.path)  # applies pending migrations, incl. the rollup table
+    if args.check:
+        conn = db.get_connection()
+        differences = rollup_differences(conn)
+        conn.close()
+        for day, service_id, status, stored, expected in differences[:20]:
+            print(f"  {day}  usluga {service_id}  {status or '-'}: {stored} != {expected}")
+        print(f"{len(differences)} neusklađenih redova")
+        db.close()
+        sys.exit(1 if differences else 0)
+
+    rows = db.rebuild_rollups()
+    print(f"Dnevni zbirovi ponovo izgrađeni: {rows} redova")
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
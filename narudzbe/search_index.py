@@ -0,0 +1,177 @@
+"""
+Auto Servis Pro - Full-text search index
+FTS5 tables and triggers behind AutoServiceDB.search_* methods
+"""
+
+import re
+import sqlite3
+from typing import Optional
+
+# Diacritics are folded so "cisc" finds "Čišćenje" and "dordevic" finds "Đorđević"
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+HIGHLIGHT_OPEN = '<mark>'
+HIGHLIGHT_CLOSE = '</mark>'
+
+# users, services and vehicles use external-content tables: the FTS index
+# reads column values straight from the base table, so nothing is stored
+# twice. Appointment search spans four joined tables, which external content
+# cannot express, so appointments_fts stores its own denormalized copy and
+# triggers on every source table keep it current.
+SCHEMA = [
+    f'''CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+        username, email, full_name, phone,
+        content='users', content_rowid='id',
+        tokenize='{TOKENIZER}', prefix='2 3')''',
+    f'''CREATE VIRTUAL TABLE IF NOT EXISTS services_fts USING fts5(
+        name, category, description,
+        content='services', content_rowid='id',
+        tokenize='{TOKENIZER}', prefix='2 3')''',
+    f'''CREATE VIRTUAL TABLE IF NOT EXISTS vehicles_fts USING fts5(
+        license_plate, make, model, vin,
+        content='vehicles', content_rowid='id',
+        tokenize='{TOKENIZER}', prefix='2 3')''',
+    f'''CREATE VIRTUAL TABLE IF NOT EXISTS appointments_fts USING fts5(
+        license_plate, make, model, username, full_name, status, service_name,
+        tokenize='{TOKENIZER}', prefix='2 3')''',
+
+    # --- users ---
+    '''CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts(rowid, username, email, full_name, phone)
+        VALUES (new.id, new.username, new.email, new.full_name, new.phone);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, username, email, full_name, phone)
+        VALUES ('delete', old.id, old.username, old.email, old.full_name, old.phone);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS users_fts_au AFTER UPDATE OF username, email, full_name, phone ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, username, email, full_name, phone)
+        VALUES ('delete', old.id, old.username, old.email, old.full_name, old.phone);
+        INSERT INTO users_fts(rowid, username, email, full_name, phone)
+        VALUES (new.id, new.username, new.email, new.full_name, new.phone);
+        UPDATE appointments_fts SET username = new.username, full_name = new.full_name
+        WHERE rowid IN (SELECT id FROM appointments WHERE user_id = new.id);
+    END''',
+
+    # --- services ---
+    '''CREATE TRIGGER IF NOT EXISTS services_fts_ai AFTER INSERT ON services BEGIN
+        INSERT INTO services_fts(rowid, name, category, description)
+        VALUES (new.id, new.name, new.category, new.description);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS services_fts_ad AFTER DELETE ON services BEGIN
+        INSERT INTO services_fts(services_fts, rowid, name, category, description)
+        VALUES ('delete', old.id, old.name, old.category, old.description);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS services_fts_au AFTER UPDATE OF name, category, description ON services BEGIN
+        INSERT INTO services_fts(services_fts, rowid, name, category, description)
+        VALUES ('delete', old.id, old.name, old.category, old.description);
+        INSERT INTO services_fts(rowid, name, category, description)
+        VALUES (new.id, new.name, new.category, new.description);
+        UPDATE appointments_fts SET service_name = new.name
+        WHERE rowid IN (SELECT id FROM appointments WHERE service_id = new.id);
+    END''',
+
+    # --- vehicles ---
+    '''CREATE TRIGGER IF NOT EXISTS vehicles_fts_ai AFTER INSERT ON vehicles BEGIN
+        INSERT INTO vehicles_fts(rowid, license_plate, make, model, vin)
+        VALUES (new.id, new.license_plate, new.make, new.model, new.vin);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS vehicles_fts_ad AFTER DELETE ON vehicles BEGIN
+        INSERT INTO vehicles_fts(vehicles_fts, rowid, license_plate, make, model, vin)
+        VALUES ('delete', old.id, old.license_plate, old.make, old.model, old.vin);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS vehicles_fts_au AFTER UPDATE OF license_plate, make, model, vin ON vehicles BEGIN
+        INSERT INTO vehicles_fts(vehicles_fts, rowid, license_plate, make, model, vin)
+        VALUES ('delete', old.id, old.license_plate, old.make, old.model, old.vin);
+        INSERT INTO vehicles_fts(rowid, license_plate, make, model, vin)
+        VALUES (new.id, new.license_plate, new.make, new.model, new.vin);
+        UPDATE appointments_fts SET license_plate = new.license_plate, make = new.make, model = new.model
+        WHERE rowid IN (SELECT id FROM appointments WHERE vehicle_id = new.id);
+    END''',
+
+    # --- appointments ---
+    '''CREATE TRIGGER IF NOT EXISTS appointments_fts_ai AFTER INSERT ON appointments BEGIN
+        INSERT INTO appointments_fts(rowid, license_plate, make, model, username, full_name, status, service_name)
+        SELECT new.id, v.license_plate, v.make, v.model, u.username, u.full_name, new.status, s.name
+        FROM (SELECT 1) LEFT JOIN vehicles v ON v.id = new.vehicle_id
+        LEFT JOIN users u ON u.id = new.user_id
+        LEFT JOIN services s ON s.id = new.service_id;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS appointments_fts_ad AFTER DELETE ON appointments BEGIN
+        DELETE FROM appointments_fts WHERE rowid = old.id;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS appointments_fts_au
+    AFTER UPDATE OF status, user_id, vehicle_id, service_id ON appointments BEGIN
+        DELETE FROM appointments_fts WHERE rowid = old.id;
+        INSERT INTO appointments_fts(rowid, license_plate, make, model, username, full_name, status, service_name)
+        SELECT new.id, v.license_plate, v.make, v.model, u.username, u.full_name, new.status, s.name
+        FROM (SELECT 1) LEFT JOIN vehicles v ON v.id = new.vehicle_id
+        LEFT JOIN users u ON u.id = new.user_id
+        LEFT JOIN services s ON s.id = new.service_id;
+    END''',
+]
+
+REBUILD = [
+    "INSERT INTO users_fts(users_fts) VALUES ('rebuild')",
+    "INSERT INTO services_fts(services_fts) VALUES ('rebuild')",
+    "INSERT INTO vehicles_fts(vehicles_fts) VALUES ('rebuild')",
+    "DELETE FROM appointments_fts",
+    '''INSERT INTO appointments_fts(rowid, license_plate, make, model, username, full_name, status, service_name)
+       SELECT a.id, v.license_plate, v.make, v.model, u.username, u.full_name, a.status, s.name
+       FROM appointments a
+       LEFT JOIN vehicles v ON v.id = a.vehicle_id
+       LEFT JOIN users u ON u.id = a.user_id
+       LEFT JOIN services s ON s.id = a.service_id''',
+]
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts5_available(conn) -> bool:
+    """True if this SQLite build ships the FTS5 extension."""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp._fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def search_index_exists(conn) -> bool:
+    """True if the FTS tables have been created in this database."""
+    row = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'appointments_fts'"
+    ).fetchone()
+    return row[0] > 0
+
+
+def create_search_index(conn):
+    """Create FTS tables and triggers (idempotent) and fill them from the base tables.
+
+    Used as a migration step; silently does nothing on SQLite builds
+    without FTS5, where the search_* methods fall back to LIKE.
+    """
+    if not fts5_available(conn):
+        return
+    for statement in SCHEMA:
+        conn.execute(statement)
+    rebuild_search_index(conn)
+
+
+def rebuild_search_index(conn):
+    """Regenerate every FTS table from its source rows."""
+    for statement in REBUILD:
+        conn.execute(statement)
+
+
+def build_match_query(text: str) -> Optional[str]:
+    """Turn free user input into a safe FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term, all terms must match:
+    'golf sa-12' -> '"golf"* "sa"* "12"*'. Returns None when the input
+    contains no searchable characters.
+    """
+    tokens = _TOKEN_RE.findall(text or '')
+    if not tokens:
+        return None
+    return ' '.join('"' + token.replace('"', '""') + '"*' for token in tokens)
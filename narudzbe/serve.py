@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Auto Servis Pro - Production server
+API i web panel (narudzbe/web) na produkcijskom WSGI serveru umjesto Flask dev servera
+
+    python narudzbe/serve.py [--workers 4] [--threads 8] [--port 7000]
+
+Every option can also be set from the environment (HOST, PORT,
+SERVER_WORKERS, SERVER_THREADS, ...); command line flags win.
+
+- gunicorn (Linux/macOS): preloaded app, one forked worker process per
+  CPU core, each with a thread pool; SO_REUSEPORT, keep-alive and a
+  bounded accept queue per worker. Sessions default to the shared SQLite
+  store so every worker (and a restarted one) sees the same logins.
+- waitress (Windows, or when gunicorn is not installed): a single process
+  with a thread pool sized to the CPU count.
+
+Load shedding: connections beyond --max-connections per process wait in
+the listen backlog (--backlog), and beyond that are refused. Live streams
+(SSE) hold a thread for as long as they are open, so at most --max-streams
+run per process; more get 503 instead of starving normal requests.
+
+Live /api/stream events are delivered within one process: with several
+workers a client only sees pushes for changes made through its own worker
+(the workshop board stream reads the change log and sees all of them).
+Use --workers 1 with more threads, or asgi_server, when that matters.
+"""
+
+import argparse
+import os
+import socket
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+WEB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'web')
+
+BUSY_BODY = b'{"error": "Server je trenutno preopterecen, pokusajte ponovo"}'
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Server options from the command line, falling back to the environment."""
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Auto Servis Pro - API i web panel (produkcija)")
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=_env_int('PORT', 7000))
+    parser.add_argument('--server', choices=['auto', 'gunicorn', 'waitress'],
+                        default=os.environ.get('SERVER', 'auto'))
+    parser.add_argument('--workers', type=int, default=_env_int('SERVER_WORKERS', cores),
+                        help='worker processes (gunicorn); default: CPU cores')
+    parser.add_argument('--threads', type=int, default=_env_int('SERVER_THREADS', 0),
+                        help='threads per process; default: 8 (gunicorn), 4 per core (waitress)')
+    parser.add_argument('--backlog', type=int, default=_env_int('SERVER_BACKLOG', 128),
+                        help='listen queue for connections not yet accepted')
+    parser.add_argument('--max-connections', type=int, default=_env_int('SERVER_MAX_CONNECTIONS', 256),
+                        help='open connections per process (keep-alive ones included)')
+    parser.add_argument('--max-streams', type=int, default=_env_int('SERVER_MAX_STREAMS', 0),
+                        help='open SSE streams per process; default: half the threads')
+    parser.add_argument('--keepalive', type=int, default=_env_int('SERVER_KEEPALIVE', 5),
+                        help='seconds an idle keep-alive connection stays open')
+    parser.add_argument('--timeout', type=int, default=_env_int('SERVER_TIMEOUT', 60),
+                        help='seconds before a stuck worker is restarted (gunicorn)')
+    args = parser.parse_args(argv)
+
+    if args.server == 'auto':
+        args.server = 'waitress' if sys.platform == 'win32' or not _has_gunicorn() else 'gunicorn'
+    if args.server == 'waitress':
+        args.workers = 1
+    args.workers = max(1, args.workers)
+    if args.threads <= 0:
+        args.threads = 8 if args.server == 'gunicorn' else 4 * cores
+    if args.max_streams <= 0:
+        args.max_streams = max(1, args.threads // 2)
+    return args
+
+
+def _has_gunicorn() -> bool:
+    try:
+        import gunicorn  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class StreamLimiter:
+    """WSGI middleware: at most max_streams open SSE responses, 503 beyond that."""
+
+    def __init__(self, app, max_streams: int):
+        self.app = app
+        self.max_streams = max_streams
+        self._slots = threading.BoundedSemaphore(max_streams)
+        self.rejected = 0
+
+    def __call__(self, environ, start_response):
+        if not environ.get('PATH_INFO', '').endswith('/stream'):
+            return self.app(environ, start_response)
+
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            start_response('503 Service Unavailable', [
+                ('Content-Type', 'application/json'),
+                ('Content-Length', str(len(BUSY_BODY))),
+                ('Retry-After', '5'),
+            ])
+            return [BUSY_BODY]
+
+        from werkzeug.wsgi import ClosingIterator
+        try:
+            return ClosingIterator(self.app(environ, start_response), self._slots.release)
+        except BaseException:
+            self._slots.release()
+            raise
+
+
+def build_app(max_streams: int = 8):
+    """API plus the static web panel as one WSGI app.
+
+    /api/... goes straight to Flask; anything else is looked up in
+    narudzbe/web ('/' is index.html) and falls through to Flask when
+    there is no such file.
+    """
+    from werkzeug.middleware.shared_data import SharedDataMiddleware
+    from api_server import app as api_app
+
+    api = StreamLimiter(api_app.wsgi_app, max_streams)
+    # cache_timeout=0: browsers revalidate (ETag) so a new panel shows up at once
+    panel = SharedDataMiddleware(api, {'/': WEB_DIR}, cache_timeout=0)
+
+    def application(environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if path.startswith('/api/'):
+            return api(environ, start_response)
+        if path in ('', '/'):
+            environ['PATH_INFO'] = '/index.html'
+        return panel(environ, start_response)
+
+    return application
+
+
+def end_streams():
+    """Let open SSE streams finish so a worker can exit without waiting on them."""
+    import api_server
+    api_server.stream_shutdown.set()
+    api_server.db.events.wake_all()
+
+
+def run_gunicorn(args):
+    """Preforked gunicorn with threaded (gthread) workers."""
+    from gunicorn.app.base import BaseApplication
+    from gunicorn.workers.gthread import ThreadWorker
+
+    class Worker(ThreadWorker):
+        def handle_exit(self, sig, frame):
+            end_streams()
+            super().handle_exit(sig, frame)
+
+        def handle_quit(self, sig, frame):
+            end_streams()
+            super().handle_quit(sig, frame)
+
+    def post_fork(server, worker):
+        # Threads do not survive fork(): every worker needs its own sweeper
+        import api_server
+        from session_store import SessionSweeper
+        api_server.session_sweeper = SessionSweeper(
+            api_server.sessions, interval=api_server.session_sweeper.interval).start()
+
+    class Application(BaseApplication):
+        def load_config(self):
+            options = {
+                'bind': f'{args.host}:{args.port}',
+                'workers': args.workers,
+                'threads': args.threads,
+                'worker_class': Worker,
+                'worker_connections': args.max_connections,
+                'backlog': args.backlog,
+                'keepalive': args.keepalive,
+                'timeout': args.timeout,
+                'graceful_timeout': int(float(os.environ.get('SHUTDOWN_TIMEOUT', 10))),
+                'preload_app': True,
+                'reuse_port': True,
+                'post_fork': post_fork,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            import api_server
+            application = build_app(args.max_streams)
+            # Migrations and imports ran once here; the workers must not share
+            # the master's sqlite handles or its sweeper thread.
+            api_server.session_sweeper.stop()
+            api_server.sessions.close()
+            api_server.db.release_connections()
+            return application
+
+    Application().run()
+
+
+def run_waitress(args):
+    """Single process waitress with a thread pool (works on Windows)."""
+    from waitress import serve
+
+    application = build_app(args.max_streams)
+    try:
+        serve(application, host=args.host, port=args.port,
+              threads=args.threads,
+              connection_limit=args.max_connections,
+              backlog=args.backlog,
+              channel_timeout=max(args.keepalive, 30),
+              ident='AutoServisPro')
+    except KeyboardInterrupt:
+        print("\n🛑 Server zaustavljen")
+    finally:
+        end_streams()
+
+
+def get_local_ip() -> str:
+    """Local network IP address (for the startup banner)."""
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.connect(("8.8.8.8", 80))
+        ip = s.getsockname()[0]
+        s.close()
+        return ip
+    except OSError:
+        return "127.0.0.1"
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Must be decided before api_server is imported: several processes
+    # need the shared session table, and each pool matches its threads.
+    if args.server == 'gunicorn':
+        os.environ.setdefault('SESSION_BACKEND', 'sqlite')
+    os.environ.setdefault('DB_POOL_SIZE', str(args.threads))
+
+    processes = f"{args.workers} x {args.threads} threads" if args.server == 'gunicorn' \
+        else f"{args.threads} threads"
+    print("=" * 60)
+    print("🚗 Auto Servis Pro - produkcijski server")
+    print("=" * 60)
+    print(f"   Server:  {args.server} ({processes})")
+    print(f"   Local:   http://localhost:{args.port}")
+    print(f"   Network: http://{get_local_ip()}:{args.port}")
+    print(f"   Sessions: {os.environ.get('SESSION_BACKEND', 'memory')}, "
+          f"max {args.max_streams} live streams per process")
+    print("=" * 60)
+
+    if args.server == 'gunicorn':
+        run_gunicorn(args)
+    else:
+        run_waitress(args)
+
+
+if __name__ == '__main__':
+    main()
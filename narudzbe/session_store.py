@@ -0,0 +1,321 @@
+"""
+Auto Servis Pro - Session store
+Token sessions with TTL, sliding expiry and revocation, in memory or in SQLite
+"""
+
+import hashlib
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+# Only these user fields travel with a session; handlers need id and role
+SESSION_FIELDS = ('id', 'username', 'email', 'full_name', 'role')
+
+DEFAULT_TTL = 8 * 3600
+DEFAULT_MAX_ENTRIES = 10000
+
+
+def session_user(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact copy of a user row for storing in a session."""
+    return {field: user.get(field) for field in SESSION_FIELDS}
+
+
+def hash_token(token: str) -> str:
+    """Tokens are stored hashed, so a leaked sessions table is useless."""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class MemorySessionStore:
+    """Process-local LRU + TTL store.
+
+    Lookups are one dict access. Every successful lookup pushes the expiry
+    forward (sliding expiry). When ``max_entries`` is reached the least
+    recently used session is evicted.
+    """
+
+    def __init__(self, ttl: int = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 clock: Callable[[], float] = time.time):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()   # token hash -> [user, expires_at]
+        self.evictions = 0
+        self.expirations = 0
+
+    def create(self, user: Dict[str, Any]) -> str:
+        """Start a session for user and return its token."""
+        token = secrets.token_urlsafe(32)
+        key = hash_token(token)
+        with self._lock:
+            self._sessions[key] = [session_user(user), self._clock() + self.ttl]
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        return token
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Session user for token, or None if unknown/expired."""
+        key = hash_token(token)
+        now = self._clock()
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self._sessions[key]
+                self.expirations += 1
+                return None
+            entry[1] = now + self.ttl
+            self._sessions.move_to_end(key)
+            return entry[0]
+
+    def revoke(self, token: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(hash_token(token), None) is not None
+
+    def revoke_user(self, user_id: int) -> int:
+        with self._lock:
+            keys = [k for k, (user, _) in self._sessions.items() if user.get('id') == user_id]
+            for key in keys:
+                del self._sessions[key]
+        return len(keys)
+
+    def sweep(self) -> int:
+        """Drop expired sessions; returns how many were removed."""
+        now = self._clock()
+        with self._lock:
+            expired = [k for k, (_, expires_at) in self._sessions.items() if expires_at <= now]
+            for key in expired:
+                del self._sessions[key]
+            self.expirations += len(expired)
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'active': len(self._sessions),
+                'ttl': self.ttl,
+                'max_entries': self.max_entries,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def close(self):
+        pass
+
+
+class SQLiteSessionStore:
+    """Sessions in the shared autoservice.db, usable by several API workers.
+
+    The ``sessions`` table (migration 6) is the source of truth; each worker
+    keeps a small in-memory copy of sessions it has already validated, so
+    ``get()`` does not touch the database on every request:
+
+    * a cached session is re-checked against the table at most every
+      ``recheck_interval`` seconds, which bounds how long a session revoked
+      by another process (logout, password change) stays usable here;
+    * the sliding expiry is written back at most every ``touch_interval``
+      seconds instead of once per request.
+
+    Revocations made through this store take effect immediately in this
+    process. A trigger on users.password_hash deletes the user's sessions,
+    so password changes made by the Tk app also revoke API sessions.
+    """
+
+    def __init__(self, db_path: str, ttl: int = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, recheck_interval: float = 30.0,
+                 touch_interval: float = None, on_connect: Callable = None,
+                 clock: Callable[[], float] = time.time):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.recheck_interval = recheck_interval
+        self.touch_interval = touch_interval if touch_interval is not None else min(ttl / 10, 300)
+        self._on_connect = on_connect
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # token hash -> [user, expires_at, checked_at, touched_at]
+        self._cache = OrderedDict()
+        self.db_reads = 0
+        self.db_writes = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            if self._on_connect:
+                self._on_connect(conn)
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, key: str, user: Dict, expires_at: float, now: float):
+        with self._lock:
+            self._cache[key] = [user, expires_at, now, now]
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _forget(self, key: str):
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def create(self, user: Dict[str, Any]) -> str:
+        """Start a session for user and return its token."""
+        token = secrets.token_urlsafe(32)
+        key = hash_token(token)
+        now = self._clock()
+        data = session_user(user)
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO sessions (token_hash, user_id, user_data, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, data['id'], json.dumps(data), now, now + self.ttl)
+            )
+        self.db_writes += 1
+        self._remember(key, data, now + self.ttl, now)
+        return token
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Session user for token, or None if unknown/expired/revoked."""
+        key = hash_token(token)
+        now = self._clock()
+        user = None
+        touch = False
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[1] > now and now - entry[2] < self.recheck_interval:
+                entry[1] = now + self.ttl
+                self._cache.move_to_end(key)
+                user = entry[0]
+                if now - entry[3] >= self.touch_interval:
+                    entry[3] = now
+                    touch = True
+
+        if user is not None:
+            if touch:
+                self._touch(key, now)
+            return user
+
+        # Not cached, or due for a re-check against the table
+        conn = self._conn()
+        self.db_reads += 1
+        row = conn.execute(
+            "SELECT user_data, expires_at FROM sessions WHERE token_hash = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            self._forget(key)
+            return None
+
+        user = json.loads(row[0])
+        self._touch(key, now)
+        self._remember(key, user, now + self.ttl, now)
+        return user
+
+    def _touch(self, key: str, now: float):
+        """Push the expiry forward in the table (sliding expiry)."""
+        try:
+            conn = self._conn()
+            with conn:
+                conn.execute("UPDATE sessions SET expires_at = ? WHERE token_hash = ?",
+                             (now + self.ttl, key))
+            self.db_writes += 1
+        except sqlite3.OperationalError as e:
+            # A busy database must not fail the request; retry on the next touch
+            print(f"Session touch skipped: {e}")
+
+    def revoke(self, token: str) -> bool:
+        key = hash_token(token)
+        self._forget(key)
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute("DELETE FROM sessions WHERE token_hash = ?", (key,))
+        self.db_writes += 1
+        return cursor.rowcount > 0
+
+    def revoke_user(self, user_id: int) -> int:
+        with self._lock:
+            for key in [k for k, entry in self._cache.items() if entry[0].get('id') == user_id]:
+                del self._cache[key]
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+        self.db_writes += 1
+        return cursor.rowcount
+
+    def sweep(self) -> int:
+        now = self._clock()
+        with self._lock:
+            for key in [k for k, entry in self._cache.items() if entry[1] <= now]:
+                del self._cache[key]
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+        self.db_writes += 1
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        active = self._conn().execute(
+            "SELECT COUNT(*) FROM sessions WHERE expires_at > ?", (self._clock(),)
+        ).fetchone()[0]
+        with self._lock:
+            cached = len(self._cache)
+        return {
+            'backend': 'sqlite',
+            'active': active,
+            'cached': cached,
+            'ttl': self.ttl,
+            'recheck_interval': self.recheck_interval,
+            'db_reads': self.db_reads,
+            'db_writes': self.db_writes,
+        }
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class SessionSweeper:
+    """Daemon thread that calls store.sweep() every ``interval`` seconds."""
+
+    def __init__(self, store, interval: float = 300.0):
+        self.store = store
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='session-sweeper', daemon=True)
+
+    def start(self) -> 'SessionSweeper':
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.store.sweep()
+            except Exception as e:
+                print(f"Session sweep failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+
+def create_session_store(backend: str = 'memory', db_path: str = None, **options):
+    """Build a session store by name ('memory' or 'sqlite')."""
+    if backend == 'memory':
+        options.pop('on_connect', None)
+        return MemorySessionStore(**options)
+    if backend == 'sqlite':
+        if not db_path:
+            raise ValueError("The sqlite session store needs db_path")
+        return SQLiteSessionStore(db_path, **options)
+    raise ValueError(f"Unknown session backend '{backend}' (available: memory, sqlite)")
@@ -0,0 +1,60 @@
+"""
+Auto Servis Pro - Unit of work
+Groups several AutoServiceDB calls into one transaction and one commit
+"""
+
+import sqlite3
+from typing import Callable, List
+
+
+class UnitOfWork:
+    """Connection handle shared by every DB method inside ``db.transaction()``.
+
+    While a unit of work is active on a thread, ``get_connection()`` returns
+    this handle, so the methods' own ``commit()``/``close()`` calls become
+    no-ops and everything is committed (or rolled back) once at the end.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._after_commit: List[Callable] = []
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return self._conn.cursor(*args, **kwargs)
+
+    def execute(self, *args, **kwargs):
+        return self._conn.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self._conn.executemany(*args, **kwargs)
+
+    def commit(self):
+        """Deferred until the unit of work ends."""
+
+    def close(self):
+        """The unit of work owns the connection."""
+
+    def rollback(self):
+        raise sqlite3.OperationalError(
+            "rollback() inside db.transaction(); raise an exception to abort instead"
+        )
+
+    def after_commit(self, callback: Callable):
+        """Run callback once the transaction has been committed."""
+        self._after_commit.append(callback)
+
+    def _finish(self, commit: bool):
+        if commit:
+            self._conn.commit()
+        elif self._conn.in_transaction:
+            self._conn.rollback()
+        callbacks, self._after_commit = self._after_commit, []
+        if commit:
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"after_commit callback failed: {e}")
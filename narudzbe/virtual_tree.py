@@ -0,0 +1,194 @@
+"""
+Auto Servis Pro - Virtual Treeview
+Drži sve redove tabele u memoriji, a u ttk.Treeview su samo redovi oko vidljivog
+dijela (prozor od nekoliko stranica); redovi koji izađu iz prozora se brišu
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+PAGE_SIZE = 200
+# Rows kept as widget items: this many pages around the visible part
+WINDOW_PAGES = 3
+# Move the window once the view passes this fraction of it (or 1 - it at the top)
+PREFETCH_AT = 0.9
+
+
+class VirtualTree:
+    """Windowed view of many rows in a ttk.Treeview.
+
+    Inserting 10k items into a Treeview takes seconds and the widget keeps
+    slowing down as it grows; here only a window of WINDOW_PAGES pages
+    around what the user is looking at are widget items. When the view
+    nears either end of the window it moves by a page: rows scrolled out
+    are deleted, the next ones inserted, and the view is put back on the
+    same top row. The scrollbar is driven from here, so it shows (and
+    drags to) the position in all the rows, not in the window.
+
+    Widget items keep the row iids, so tree.item(iid, 'values') and
+    selections work for the rows in the window; a selected row that is
+    scrolled far out of it is dropped from the selection.
+    """
+
+    def __init__(self, tree, scrollbar=None, page_size: int = PAGE_SIZE):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.page_size = page_size
+        self._order: List[str] = []                  # iids in display order
+        self._rows: Dict[str, Tuple[tuple, tuple]] = {}  # iid -> (values, tags)
+        self._start = 0                              # _order[_start:_end] are widget items
+        self._end = 0
+        self._first = 0.0                            # widget's own yview, within the window
+        self._job = None
+        tree.configure(yscrollcommand=self._on_scroll)
+        if scrollbar is not None:
+            scrollbar.configure(command=self._yview)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, iid: str) -> bool:
+        return iid in self._rows
+
+    @property
+    def window_size(self) -> int:
+        return self.page_size * WINDOW_PAGES
+
+    @property
+    def window(self) -> Tuple[int, int]:
+        """(start, end) indices of the rows that are widget items."""
+        return self._start, self._end
+
+    def values(self, iid: str) -> tuple:
+        return self._rows[iid][0]
+
+    def set_rows(self, rows: Iterable[Tuple[str, tuple]]):
+        """Zamijeni sve redove ((iid, values), ...) i prikaži prvu stranicu."""
+        self._cancel()
+        self.tree.delete(*self.tree.get_children())
+        self._order = []
+        self._rows = {}
+        for iid, values in rows:
+            if iid not in self._rows:
+                self._order.append(iid)
+            self._rows[iid] = (values, ())
+        self._start = self._end = 0
+        self._render(0)
+        self.tree.yview_moveto(0)
+
+    def scroll_to(self, index: int):
+        """Put row index at the top of the view."""
+        top = max(0, min(index, len(self._order) - 1))
+        self._render(top - self.page_size)
+        self.tree.yview_moveto((top - self._start) / max(1, self._end - self._start))
+
+    def upsert(self, iid: str, values: tuple, tags: tuple = (), front: bool = False):
+        """Ažuriraj red na mjestu ili ga dodaj (na vrh ako je front)."""
+        if iid in self._rows:
+            self._rows[iid] = (values, tags)
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=values, tags=tags)
+            return
+
+        self._rows[iid] = (values, tags)
+        if front:
+            self._order.insert(0, iid)
+            if self._start > 0:
+                # Window is further down: it keeps the same rows
+                self._start += 1
+                self._end += 1
+                return
+            self.tree.insert('', 0, iid=iid, values=values, tags=tags)
+            self._end += 1
+            if self._end - self._start > self.window_size:
+                self._end -= 1
+                self.tree.delete(self._order[self._end])
+        else:
+            self._order.append(iid)
+            # Only shown right away if the window reaches the end and has room
+            if self._end == len(self._order) - 1 and self._end - self._start < self.window_size:
+                self.tree.insert('', 'end', iid=iid, values=values, tags=tags)
+                self._end += 1
+
+    def remove(self, iid: str):
+        """Ukloni red (bez greške ako ga nema)."""
+        if self._rows.pop(iid, None) is None:
+            return
+        index = self._order.index(iid)
+        del self._order[index]
+        if index < self._start:
+            self._start -= 1
+            self._end -= 1
+        elif index < self._end:
+            self.tree.delete(iid)
+            self._end -= 1
+
+    # ---- window ------------------------------------------------------------
+
+    def _render(self, start: int):
+        """Make _order[start:start + window_size] (clamped) the widget items,
+        keeping the items the old and new windows share."""
+        total = len(self._order)
+        start = max(0, min(start, total - self.window_size))
+        end = min(total, start + self.window_size)
+
+        if end <= self._start or start >= self._end:
+            self.tree.delete(*self.tree.get_children())
+            self._insert(self._order[start:end], 'end')
+        else:
+            if start > self._start:
+                self.tree.delete(*self._order[self._start:start])
+            if end < self._end:
+                self.tree.delete(*self._order[end:self._end])
+            if start < self._start:
+                self._insert(self._order[start:self._start], 0)
+            if end > self._end:
+                self._insert(self._order[self._end:end], 'end')
+        self._start, self._end = start, end
+
+    def _insert(self, iids: List[str], index):
+        """Insert iids in order, from position index (0) or at 'end'."""
+        for offset, iid in enumerate(iids):
+            values, tags = self._rows[iid]
+            self.tree.insert('', index if index == 'end' else index + offset,
+                             iid=iid, values=values, tags=tags)
+
+    def _top(self) -> int:
+        """Index (in all rows) of the row at the top of the view."""
+        return self._start + int(round(self._first * (self._end - self._start)))
+
+    # ---- scrolling ---------------------------------------------------------
+
+    def _on_scroll(self, first, last):
+        """yscrollcommand of the widget: fractions of the window, not of all rows."""
+        first, last = float(first), float(last)
+        self._first = first
+        if self.scrollbar is not None:
+            total = len(self._order)
+            count = self._end - self._start
+            if total and count:
+                self.scrollbar.set((self._start + first * count) / total,
+                                   (self._start + last * count) / total)
+            else:
+                self.scrollbar.set(0, 1)
+
+        near_end = last >= PREFETCH_AT and self._end < len(self._order)
+        near_start = first <= 1 - PREFETCH_AT and self._start > 0
+        if (near_end or near_start) and self._job is None:
+            # Not from inside the widget's own scroll callback
+            self._job = self.tree.after_idle(self._move_window)
+
+    def _move_window(self):
+        self._job = None
+        self.scroll_to(self._top())
+
+    def _yview(self, *args):
+        """Scrollbar command: dragging maps to all rows, arrows/pages scroll the widget."""
+        if args and args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * len(self._order)))
+        else:
+            self.tree.yview(*args)
+
+    def _cancel(self):
+        if self._job is not None:
+            self.tree.after_cancel(self._job)
+            self._job = None